@@ -0,0 +1,113 @@
+"""
+Command line tools for the audio catalog.
+
+    python -m app.cli import catalog.jsonl --audio-base audio_base.json
+    python -m app.cli export-onnx
+    python -m app.cli evaluate queries.jsonl --audio-base audio_base.json
+
+``import`` streams a JSONL or JSON catalog into the audio base: entries are
+validated, encoded in batches (reusing the embedding cache) and the merged
+catalog is written back atomically.
+
+``export-onnx`` exports Config.MODEL_NAME for the ``onnx`` encoder backend, with
+an int8 dynamically quantized copy, into Config.ONNX_MODEL_DIR.
+
+``evaluate`` replays a labeled query log (JSONL of {text, expected}) against the
+audio base and sweeps similarity thresholds and hybrid weights, reporting the
+precision, recall and no-match rate of every setting and the queries per second.
+"""
+import argparse
+import json
+import logging
+import sys
+from typing import List
+
+from app.config.settings import Config
+from app.services.catalog_io import FORMATS, format_progress
+
+
+def cmd_import(args: argparse.Namespace) -> int:
+    from app.services.audio_matcher import AudioMatcher
+
+    if args.batch_size:
+        Config.IMPORT_BATCH_SIZE = args.batch_size
+    matcher = AudioMatcher(args.audio_base)
+    report = matcher.import_file(
+        args.path,
+        args.format,
+        progress=lambda report: print(format_progress(report), file=sys.stderr, flush=True)
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if report["status"] == "completed" else 1
+
+
+def cmd_export_onnx(args: argparse.Namespace) -> int:
+    from app.services.encoders import export_onnx, onnx_model_dir
+
+    model_name = args.model or Config.MODEL_NAME
+    path = export_onnx(model_name, onnx_model_dir(model_name, args.output_dir), quantize=not args.no_quantize)
+    print(path)
+    return 0
+
+
+def cmd_evaluate(args: argparse.Namespace) -> int:
+    from app.services.audio_matcher import AudioMatcher
+    from app.services.evaluation import SweepEvaluator, parse_grid, read_query_log
+
+    if args.batch_size:
+        Config.ENCODE_BATCH_SIZE = args.batch_size
+    matcher = AudioMatcher(args.audio_base)
+    evaluator = SweepEvaluator(matcher, parse_grid(args.thresholds), parse_grid(args.weights), args.chunk_size)
+    with open(args.path, "r", encoding="utf-8") as f:
+        report = evaluator.run(
+            read_query_log(f),
+            progress=lambda queries, seconds: print(f"{queries} queries, {queries / max(seconds, 1e-9):.0f} q/s",
+                                                    file=sys.stderr, flush=True),
+            full=bool(args.output)
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        for curve in report["curves"]:
+            curve.pop("sweep", None)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if report["queries"] else 1
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Audio catalog tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="Bulk import a JSONL or JSON catalog into the audio base")
+    importer.add_argument("path", help="Catalog file: JSONL of {audio_file, descriptions} or audio_base.json layout")
+    importer.add_argument("--format", choices=FORMATS, help="Catalog format; taken from the extension when omitted")
+    importer.add_argument("--audio-base", default="audio_base.json", help="Audio base file to merge into")
+    importer.add_argument("--batch-size", type=int, default=0, help="Audios encoded per batch (default: IMPORT_BATCH_SIZE)")
+    importer.set_defaults(handler=cmd_import)
+
+    exporter = commands.add_parser("export-onnx", help="Export the sentence-transformers model for the onnx encoder backend")
+    exporter.add_argument("--model", help="Model to export (default: MODEL_NAME)")
+    exporter.add_argument("--output-dir", help="Base directory of exported models (default: ONNX_MODEL_DIR)")
+    exporter.add_argument("--no-quantize", action="store_true", help="Skip the int8 dynamically quantized copy")
+    exporter.set_defaults(handler=cmd_export_onnx)
+
+    evaluator = commands.add_parser("evaluate", help="Sweep thresholds and hybrid weights over a labeled query log")
+    evaluator.add_argument("path", help="JSONL of {text, expected}; a null or \"none\" expected means no audio should match")
+    evaluator.add_argument("--audio-base", default="audio_base.json", help="Audio base to evaluate")
+    evaluator.add_argument("--thresholds", default="0:1:0.01", help="Thresholds as start:stop:step or a comma list (default: 0:1:0.01)")
+    evaluator.add_argument("--weights", default="0:1:0.1", help="Hybrid individual weights, same format (default: 0:1:0.1)")
+    evaluator.add_argument("--chunk-size", type=int, default=4096, help="Queries scored per chunk (default: 4096)")
+    evaluator.add_argument("--batch-size", type=int, default=0, help="Texts per encoder call (default: ENCODE_BATCH_SIZE)")
+    evaluator.add_argument("--output", help="Write the full report, with every threshold of every curve, to this JSON file")
+    evaluator.set_defaults(handler=cmd_evaluate)
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,12 +2,58 @@ import os
 from typing import Dict, List
 
 class Config:
-    MODEL_NAME = "all-MiniLM-L6-v2"
+    MODEL_NAME = os.getenv("MODEL_NAME", "all-MiniLM-L6-v2")
+    ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "sentence-transformers")
+    ENCODER_THREADS = int(os.getenv("ENCODER_THREADS", "0"))
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", ".onnx_models")
+    ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"
+    HASHING_DIMENSION = int(os.getenv("HASHING_DIMENSION", "384"))
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.7"))
     MAX_DESCRIPTIONS = int(os.getenv("MAX_AUDIO_DESCRIPTIONS", "100"))
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".embedding_cache")
+    ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "64"))
+    EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "float32")
+    RESCORE_CANDIDATES = int(os.getenv("RESCORE_CANDIDATES", "20"))
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "512"))
+    PERSIST_CATALOG = os.getenv("PERSIST_CATALOG", "true").lower() == "true"
+    CATALOG_WATCH_SECONDS = float(os.getenv("CATALOG_WATCH_SECONDS", "0"))
+    SHARED_INDEX_DIR = os.getenv("SHARED_INDEX_DIR", "")
+    SHARED_INDEX_POLL_SECONDS = float(os.getenv("SHARED_INDEX_POLL_SECONDS", "1"))
+    AUDIO_DIR = os.getenv("AUDIO_DIR", "audios")
+    REQUIRE_AUDIO_FILES = os.getenv("REQUIRE_AUDIO_FILES", "false").lower() == "true"
+    AUDIO_CACHE_SIZE = int(os.getenv("AUDIO_CACHE_SIZE", "128"))
+    AUDIO_CACHE_MAX_FILE_BYTES = int(os.getenv("AUDIO_CACHE_MAX_FILE_BYTES", str(256 * 1024)))
+    
+    INDEX_BACKEND = os.getenv("INDEX_BACKEND", "exact")
+    IVF_N_LISTS = int(os.getenv("IVF_N_LISTS", "0"))
+    IVF_N_PROBE = int(os.getenv("IVF_N_PROBE", "8"))
+    ANN_CANDIDATES = int(os.getenv("ANN_CANDIDATES", "100"))
+    ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "10000"))
+    
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+    RESULT_CACHE = os.getenv("RESULT_CACHE", "true").lower() == "true"
+    
+    LEXICAL_FAST_PATH = os.getenv("LEXICAL_FAST_PATH", "true").lower() == "true"
+    LEXICAL_WEIGHT = float(os.getenv("LEXICAL_WEIGHT", "0.0"))
+    LEXICAL_PREFILTER = int(os.getenv("LEXICAL_PREFILTER", "0"))
+    
+    QUERY_BATCHING = os.getenv("QUERY_BATCHING", "false").lower() == "true"
+    QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+    QUERY_BATCH_MAX_WAIT_MS = float(os.getenv("QUERY_BATCH_MAX_WAIT_MS", "5"))
+    
+    EXECUTOR_MODE = os.getenv("EXECUTOR_MODE", "thread")
+    EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+    EXECUTOR_MAX_QUEUE = int(os.getenv("EXECUTOR_MAX_QUEUE", "64"))
+    REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "10"))
+    
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    LEAN_RESPONSES = os.getenv("LEAN_RESPONSES", "true").lower() == "true"
     
     DEBUG_MODE = False
     PORT = int(os.getenv("PORT", "8000"))
+    WORKERS = int(os.getenv("WORKERS", "1"))
+    BACKGROUND_STARTUP = os.getenv("BACKGROUND_STARTUP", "true").lower() == "true"
     
     NO_MATCH_RESPONSE = "none"
     ERROR_RESPONSE = "error"
\ No newline at end of file
@@ -2,7 +2,7 @@ from fastapi import FastAPI
 import logging
 
 from app.routes.api import router as api_router
-from app.routes.api import initialize_matcher
+from app.routes.api import initialize_matcher, install_reload_signal, shutdown_matcher
 from app.config.settings import Config
 
 logging.basicConfig(
@@ -31,8 +31,14 @@ async def root():
 async def startup_event():
     try:
         logger.info("Starting system...")
-        initialize_matcher()
-        logger.info("System started successfully")
+        install_reload_signal()
+        initialize_matcher(background=Config.BACKGROUND_STARTUP)
+        if not Config.BACKGROUND_STARTUP:
+            logger.info("System started successfully")
     except Exception as e:
         logger.error(f"Error on startup: {e}")
-        raise
\ No newline at end of file
+        raise
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_matcher()
\ No newline at end of file
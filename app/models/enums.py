@@ -14,6 +14,16 @@ class ResponseStatus(str, Enum):
     NO_MATCH = "no_match"
     ERROR = "error"
 
+class StartupPhase(str, Enum):
+    """Enum for the phases of the matcher startup"""
+    PENDING = "pending"
+    LOADING_MODEL = "loading_model"
+    LOADING_CATALOG = "loading_catalog"
+    ENCODING = "encoding"
+    BUILDING_INDEX = "building_index"
+    READY = "ready"
+    FAILED = "failed"
+
 MatchingMethodType = Literal["individual", "combined", "hybrid", "max"]
 ConfidenceScore = float  #0.0 to 1.0
 AudioFileName = str
\ No newline at end of file
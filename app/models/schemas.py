@@ -2,9 +2,17 @@ from pydantic import BaseModel, Field, validator
 from typing import Optional, Dict, List, Any, Union
 from .enums import MatchingMethod, ResponseStatus, MatchingMethodType, ConfidenceScore, AudioFileName
 
+def check_confidence(value: float) -> float:
+    """Shared by QueryResponse and the lean /process serializer, so both reject the same values"""
+    if not 0.0 <= value <= 1.0:
+        raise ValueError('Confidence must be between 0.0 and 1.0')
+    return value
+
 class QueryRequest(BaseModel):
     text: str = Field(..., min_length=1, description="Query text to match against audio descriptions")
     method: MatchingMethodType = Field(default="hybrid", description="Matching method to use")
+    top_k: Optional[int] = Field(default=None, ge=1, le=100, description="Number of ranked audios to return as suggestions")
+    return_audio: bool = Field(default=False, description="Answer a match with the audio file itself, the match in X-Match-* headers")
     
     @validator('text')
     def text_must_not_be_empty(cls, v):
@@ -22,6 +30,7 @@ class HybridScores(BaseModel):
     """Schema for hybrid method scoring information"""
     individual_scores: Optional[Dict[str, float]] = None
     combined_scores: Optional[Dict[str, float]] = None
+    lexical_scores: Optional[Dict[str, float]] = None
     weights: Optional[Dict[str, float]] = None
 
 class ComparisonInfo(BaseModel):
@@ -29,6 +38,12 @@ class ComparisonInfo(BaseModel):
     combined_score: Optional[float] = None
     individual_score: Optional[float] = None
 
+class RankedMatch(BaseModel):
+    """Schema for one entry of the ranked suggestions"""
+    audio_file: AudioFileName
+    score: float
+    matched_description: Optional[str] = None
+
 class QueryResponse(BaseModel):
     response: Union[AudioFileName, str]
     confidence: ConfidenceScore
@@ -41,13 +56,12 @@ class QueryResponse(BaseModel):
     detailed_scores: Optional[Union[Dict[str, DetailedScores], HybridScores]] = None
     method_used: Optional[str] = None
     compared_with: Optional[ComparisonInfo] = None
+    top_matches: Optional[List[RankedMatch]] = None
     error: Optional[str] = None
     
     @validator('confidence')
     def confidence_must_be_valid(cls, v):
-        if not 0.0 <= v <= 1.0:
-            raise ValueError('Confidence must be between 0.0 and 1.0')
-        return v
+        return check_confidence(v)
 
 class AudioRequest(BaseModel):
     audio_file: AudioFileName = Field(..., description="Audio file name")
@@ -59,6 +73,9 @@ class AudioRequest(BaseModel):
             raise ValueError('At least one non-empty description is required')
         return [desc.strip() for desc in v if desc.strip()]
 
+class DeleteAudioRequest(BaseModel):
+    audio_file: AudioFileName = Field(..., description="Audio file name to remove from the catalog")
+
 class ThresholdRequest(BaseModel):
     threshold: ConfidenceScore = Field(..., ge=0.0, le=1.0, description="Similarity threshold between 0.0 and 1.0")
 
@@ -68,8 +85,23 @@ class StatsResponse(BaseModel):
     model: str
     current_threshold: ConfidenceScore
     available_audios: List[AudioFileName]
+    index: Optional[Dict[str, Any]] = None
+    cache: Optional[Dict[str, Any]] = None
+    batching: Optional[Dict[str, Any]] = None
+    executor: Optional[Dict[str, Any]] = None
+    last_import: Optional[Dict[str, Any]] = None
+    last_reload: Optional[Dict[str, Any]] = None
+    audio_files: Optional[Dict[str, Any]] = None
 
 class HealthResponse(BaseModel):
     """Schema for health check response"""
     status: str
-    system_initialized: bool
\ No newline at end of file
+    system_initialized: bool
+
+class ReadinessResponse(BaseModel):
+    """Schema for readiness check response"""
+    ready: bool
+    phase: str
+    progress: float
+    elapsed_seconds: float
+    error: Optional[str] = None
\ No newline at end of file
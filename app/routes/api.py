@@ -1,37 +1,142 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict
+import asyncio
+import json
+import logging
+import os
+import signal
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from typing import Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from app.models.schemas import (
-    QueryRequest, QueryResponse, AudioRequest, ThresholdRequest, 
-    StatsResponse, HealthResponse
+    QueryRequest, QueryResponse, AudioRequest, DeleteAudioRequest, ThresholdRequest, 
+    StatsResponse, HealthResponse, ReadinessResponse, check_confidence
 )
-from app.models.enums import MatchingMethod
+from app.models.enums import MatchingMethod, ResponseStatus, StartupPhase
+from app.config.settings import Config
+from app.services.audio_files import AudioFileResponse
 from app.services.audio_matcher import AudioMatcher
+from app.services.catalog_io import FORMATS, ImportInProgress
+from app.services.query_batcher import QueryBatcher
+from app.services.matcher_executor import MatcherExecutor, ExecutorOverloaded
+from app.services.metrics import (
+    ERRORS, NO_MATCHES, REQUEST_SECONDS, REQUESTS, STAGE_SECONDS, MetricsRegistry, registry as metrics_registry
+)
+from app.services.startup import StartupTracker
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 matcher = None
+batcher: Optional[QueryBatcher] = None
+executor: Optional[MatcherExecutor] = None
+startup = StartupTracker()
+
+# Upload bytes gathered before each spool write of /admin/import
+IMPORT_SPOOL_CHUNK_BYTES = 1 << 20
+
+def _not_initialized():
+    if startup.in_progress and startup.phase != StartupPhase.PENDING:
+        return HTTPException(status_code=503, detail="System is starting up", headers={"Retry-After": "5"})
+    return HTTPException(status_code=500, detail="System not initialized")
+
+def _json_bytes(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
 
 def get_matcher():
     if not matcher:
-        raise HTTPException(status_code=500, detail="System not initialized")
+        raise _not_initialized()
     return matcher
 
+def get_executor():
+    if not executor:
+        raise _not_initialized()
+    return executor
+
 @router.post("/process", response_model=QueryResponse)
-async def process_query(request: QueryRequest, matcher: AudioMatcher = Depends(get_matcher)):
+async def process_query(request: QueryRequest, executor: MatcherExecutor = Depends(get_executor)):
     """
     Process a query and return the most appropriate audio
     """
-    if not matcher:
-        raise HTTPException(status_code=500, detail="Sistema no inicializado")
-
+    started = time.perf_counter()
+    method = request.method
+    REQUESTS.inc(method)
     try:
-        result = matcher.find_best_match(request.text, method=request.method)
-        return QueryResponse(**result)
+        result = await executor.find_best_match(request.text, method=request.method, top_k=request.top_k)
+        serialization_started = time.perf_counter()
+        audio = _matched_audio(result) if request.return_audio else None
+        if audio is not None:
+            response = AudioFileResponse(audio, matcher.audio_library, headers=_match_headers(result))
+            STAGE_SECONDS.observe(time.perf_counter() - serialization_started, "serialize", method)
+        elif Config.LEAN_RESPONSES:
+            # The matcher builds every field of QueryResponse itself; serialize it as is,
+            # rejecting the confidences the model's validator would reject
+            check_confidence(result["confidence"])
+            response = Response(content=_json_bytes(result), media_type="application/json")
+            STAGE_SECONDS.observe(time.perf_counter() - serialization_started, "serialize", method)
+        else:
+            response = QueryResponse(**result)
+            STAGE_SECONDS.observe(time.perf_counter() - serialization_started, "validate", method)
+    except ExecutorOverloaded as e:
+        logger.warning(str(e))
+        ERRORS.inc(method, "overloaded")
+        raise HTTPException(status_code=503, detail="Servidor saturado, intente nuevamente", headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        ERRORS.inc(method, "timeout")
+        raise HTTPException(status_code=504, detail=f"La consulta superó el tiempo límite de {executor.timeout}s")
     except ValueError as e:
+        ERRORS.inc(method, "invalid")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
+        ERRORS.inc(method, "internal")
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+    
+    if result["status"] == ResponseStatus.ERROR.value:
+        ERRORS.inc(method, "matcher")
+    elif result["status"] == ResponseStatus.NO_MATCH.value:
+        NO_MATCHES.inc(method)
+    REQUEST_SECONDS.observe(time.perf_counter() - started, method)
+    return response
+
+def _matched_audio(result: Dict):
+    """File of a successful match; None otherwise, and the JSON result is returned instead"""
+    if result["status"] != ResponseStatus.SUCCESS.value or not matcher or matcher.audio_library is None:
+        return None
+    return matcher.audio_library.stat(result["response"])
+
+def _match_headers(result: Dict) -> Dict[str, str]:
+    return {
+        # Header values are latin-1; file names may not be
+        "x-match-audio": quote(result["response"], safe=""),
+        "x-match-confidence": f"{result['confidence']:.6f}",
+        "x-match-method": result["method"],
+        "x-match-method-used": result["method_used"] or "",
+        "cache-control": "no-store"
+    }
+
+@router.api_route("/audio/{audio_file}", methods=["GET", "HEAD"])
+def get_audio(audio_file: str, matcher: AudioMatcher = Depends(get_matcher)):
+    """
+    Stream a catalog audio file, with ETag and Range support
+    """
+    if matcher.audio_library is None:
+        raise HTTPException(status_code=404, detail="Audio serving is disabled")
+    audio = matcher.audio_library.stat(audio_file) if audio_file in matcher.index else None
+    if audio is None:
+        raise HTTPException(status_code=404, detail=f"Audio {audio_file} not found")
+    return AudioFileResponse(audio, matcher.audio_library)
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -40,13 +145,35 @@ async def health_check():
         system_initialized=matcher is not None
     )
 
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check():
+    """
+    Readiness probe: 200 once the model and index are loaded, 503 before
+    """
+    readiness = startup.snapshot()
+    return JSONResponse(
+        status_code=200 if readiness["ready"] else 503,
+        content=ReadinessResponse(**readiness).dict()
+    )
+
 @router.get("/stats", response_model=StatsResponse)
 async def get_stats(matcher: AudioMatcher = Depends(get_matcher)):
     stats = matcher.get_stats()
+    if batcher:
+        stats["batching"] = batcher.get_stats()
+    if executor:
+        stats["executor"] = executor.get_stats()
     return StatsResponse(**stats)
 
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Pipeline metrics in the Prometheus text format
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
 @router.post("/admin/add-audio")
-async def add_audio(request: AudioRequest, matcher: AudioMatcher = Depends(get_matcher)):
+def add_audio(request: AudioRequest, matcher: AudioMatcher = Depends(get_matcher)):
     
     success = matcher.add_audio(request.audio_file, request.descriptions)
     if success:
@@ -54,6 +181,81 @@ async def add_audio(request: AudioRequest, matcher: AudioMatcher = Depends(get_m
     else:
         raise HTTPException(status_code=400, detail="Error adding audio")
 
+@router.post("/admin/replace-audio")
+def replace_audio(request: AudioRequest, matcher: AudioMatcher = Depends(get_matcher)):
+    """
+    Replace the descriptions of an existing audio; only new descriptions are encoded
+    """
+    try:
+        success = matcher.replace_audio(request.audio_file, request.descriptions)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Audio {request.audio_file} not found")
+    if success:
+        return {"message": f"Audio {request.audio_file} replaced successfully"}
+    else:
+        raise HTTPException(status_code=400, detail="Error replacing audio")
+
+@router.post("/admin/delete-audio")
+def delete_audio(request: DeleteAudioRequest, matcher: AudioMatcher = Depends(get_matcher)):
+    """
+    Remove an audio from the catalog
+    """
+    if matcher.delete_audio(request.audio_file):
+        return {"message": f"Audio {request.audio_file} deleted successfully"}
+    else:
+        raise HTTPException(status_code=404, detail=f"Audio {request.audio_file} not found")
+
+@router.post("/admin/import")
+async def import_catalog(request: Request, format: str = "jsonl", matcher: AudioMatcher = Depends(get_matcher)):
+    """
+    Bulk import a JSONL or JSON catalog sent as the request body
+
+    The body is spooled to a temporary file chunk by chunk and merged in batches;
+    progress is reported under ``last_import`` in /api/stats while it runs.
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Valid options: {list(FORMATS)}")
+    
+    # File I/O runs in the threadpool, so a slow disk never stalls the event loop
+    spool = await run_in_threadpool(
+        tempfile.NamedTemporaryFile, prefix="catalog-import-", suffix=f".{format}", delete=False
+    )
+    try:
+        try:
+            buffer = bytearray()
+            async for chunk in request.stream():
+                buffer += chunk
+                if len(buffer) >= IMPORT_SPOOL_CHUNK_BYTES:
+                    await run_in_threadpool(spool.write, bytes(buffer))
+                    buffer.clear()
+            await run_in_threadpool(spool.write, bytes(buffer))
+        finally:
+            await run_in_threadpool(spool.close)
+        report = await run_in_threadpool(matcher.import_file, spool.name, format, "request")
+    except ImportInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    finally:
+        await run_in_threadpool(os.unlink, spool.name)
+    
+    if report["status"] != "completed":
+        raise HTTPException(status_code=400, detail=report)
+    return report
+
+@router.post("/admin/reload-catalog")
+def reload_catalog(matcher: AudioMatcher = Depends(get_matcher)):
+    """
+    Reload the audio base file, encoding only added descriptions and changed audios
+
+    The report is also kept under ``last_reload`` in /api/stats.
+    """
+    try:
+        report = matcher.reload_audio_base(trigger="api")
+    except ImportInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if report["status"] == "failed":
+        raise HTTPException(status_code=400, detail=report)
+    return report
+
 @router.post("/admin/update-threshold")
 async def update_threshold(request: ThresholdRequest, matcher: AudioMatcher = Depends(get_matcher)):
     """
@@ -65,8 +267,98 @@ async def update_threshold(request: ThresholdRequest, matcher: AudioMatcher = De
     else:
         raise HTTPException(status_code=400, detail="Invalid threshold (must be between 0.0 and 1.0)")
 
-def initialize_matcher(audio_base_path: str = "audio_base.json"):
-    global matcher
-    if not matcher:
-        matcher = AudioMatcher(audio_base_path)
-    return matcher
\ No newline at end of file
+def _collect_runtime_metrics():
+    """Gauges read from the live matcher, caches and executor on every scrape"""
+    yield "audio_matcher_ready", "gauge", "1 once the model and index are loaded", [({}, float(startup.ready))]
+    if matcher:
+        index = matcher.index
+        yield "audio_matcher_catalog_audios", "gauge", "Audios in the served catalog", [({}, len(index))]
+        yield "audio_matcher_catalog_descriptions", "gauge", "Descriptions in the served catalog", [({}, index.total_descriptions)]
+        yield "audio_matcher_index_memory_bytes", "gauge", "Memory held by the index matrices", [({"storage": index.storage}, index.memory_bytes)]
+        yield "audio_matcher_index_version", "gauge", "Version of the served index snapshot", [({}, index.version)]
+        caches = {"embeddings": matcher.embedding_cache.get_stats(), "results": matcher.result_cache.get_stats()}
+        yield "audio_matcher_cache_hits_total", "counter", "Query cache hits", [({"cache": name}, c["hits"]) for name, c in caches.items()]
+        yield "audio_matcher_cache_misses_total", "counter", "Query cache misses", [({"cache": name}, c["misses"]) for name, c in caches.items()]
+    if executor:
+        stats = executor.get_stats()
+        yield "audio_matcher_in_flight", "gauge", "Queries running or waiting in the executor", [({}, stats["in_flight"])]
+        yield "audio_matcher_rejected_total", "counter", "Queries rejected because the queue was full", [({}, stats["rejected"])]
+        yield "audio_matcher_timeouts_total", "counter", "Queries that exceeded the request timeout", [({}, stats["timeouts"])]
+    if batcher:
+        yield "audio_matcher_batch_queue_depth", "gauge", "Queries waiting for the micro-batcher", [({}, batcher.get_stats()["queue_depth"])]
+
+metrics_registry.register_collector(_collect_runtime_metrics)
+
+def initialize_matcher(audio_base_path: str = "audio_base.json", background: bool = False):
+    """
+    Load the model, build the index and start the execution layer
+
+    With ``background`` the work runs in a separate thread and progress is
+    reported through ``/api/ready``.
+    """
+    if background:
+        thread = threading.Thread(
+            target=_initialize_in_background, args=(audio_base_path,), name="matcher-startup", daemon=True
+        )
+        thread.start()
+        return None
+    return _initialize(audio_base_path)
+
+def _initialize_in_background(audio_base_path: str):
+    try:
+        _initialize(audio_base_path)
+        logger.info("System started successfully")
+    except Exception as e:
+        logger.error(f"Error on startup: {e}")
+
+def _initialize(audio_base_path: str):
+    global matcher, batcher, executor
+    try:
+        loaded = matcher or AudioMatcher(audio_base_path, progress=startup.update)
+        if Config.QUERY_BATCHING and not batcher and Config.EXECUTOR_MODE == "thread":
+            batcher = QueryBatcher(loaded, Config.QUERY_BATCH_MAX_SIZE, Config.QUERY_BATCH_MAX_WAIT_MS)
+            batcher.start()
+        if not executor:
+            executor = MatcherExecutor(
+                loaded,
+                mode=Config.EXECUTOR_MODE,
+                workers=Config.EXECUTOR_WORKERS,
+                max_queue=Config.EXECUTOR_MAX_QUEUE,
+                timeout=Config.REQUEST_TIMEOUT_SECONDS,
+                batcher=batcher,
+                audio_base_path=audio_base_path
+            )
+        matcher = loaded
+    except Exception as e:
+        startup.fail(e)
+        raise
+    startup.update(StartupPhase.READY, 1.0)
+    return matcher
+
+def install_reload_signal():
+    """Reload the audio base file on SIGHUP; needs the main thread and a platform with SIGHUP"""
+    if not hasattr(signal, "SIGHUP") or threading.current_thread() is not threading.main_thread():
+        return
+    signal.signal(signal.SIGHUP, _on_reload_signal)
+
+def _on_reload_signal(signum, frame):
+    # Signal handlers must return quickly; the reload runs in its own thread
+    if matcher:
+        threading.Thread(target=_reload_catalog, args=("signal",), name="catalog-reload", daemon=True).start()
+
+def _reload_catalog(trigger: str):
+    try:
+        matcher.reload_audio_base(trigger=trigger)
+    except ImportInProgress as e:
+        logger.warning(f"Reload skipped: {e}")
+
+def shutdown_matcher():
+    global batcher, executor
+    if matcher:
+        matcher.close()
+    if executor:
+        executor.shutdown()
+        executor = None
+    if batcher:
+        batcher.stop()
+        batcher = None
\ No newline at end of file
@@ -0,0 +1,215 @@
+import mimetypes
+import os
+import stat
+from email.utils import formatdate
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.services.query_cache import LRUCache
+
+mimetypes.add_type("audio/ogg", ".ogg")
+mimetypes.add_type("audio/ogg", ".oga")
+mimetypes.add_type("audio/opus", ".opus")
+
+CHUNK_SIZE = 64 * 1024
+
+
+class AudioFile(NamedTuple):
+    """A catalog audio on disk, as stat'ed when it was requested"""
+    name: str
+    path: str
+    size: int
+    mtime: float
+    etag: str
+    media_type: str
+
+
+class AudioLibrary:
+    """
+    Audio files of the catalog, read from one directory
+
+    Only plain file names are resolved, so requests cannot escape the
+    directory. Files up to ``cache_max_file_bytes`` are kept in an LRU cache
+    keyed by size and modification time, so a replaced file is never served
+    stale; larger files are always streamed from disk.
+    """
+
+    def __init__(self, directory: str, cache_size: int = 128, cache_max_file_bytes: int = 256 * 1024):
+        """
+        Args:
+            directory: Directory holding the audio files
+            cache_size: Small files kept in memory; 0 disables the cache
+            cache_max_file_bytes: Largest file size kept in memory
+        """
+        self.directory = os.path.abspath(directory)
+        self.cache = LRUCache(cache_size)
+        self.cache_max_file_bytes = cache_max_file_bytes
+
+    def stat(self, audio_file: str) -> Optional[AudioFile]:
+        """The audio file named ``audio_file``, or None when it is missing or not a plain file name"""
+        if not audio_file or os.path.basename(audio_file) != audio_file or audio_file in (".", ".."):
+            return None
+        path = os.path.join(self.directory, audio_file)
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+        etag = f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+        media_type = mimetypes.guess_type(audio_file)[0] or "application/octet-stream"
+        return AudioFile(audio_file, path, stat_result.st_size, stat_result.st_mtime, etag, media_type)
+
+    def missing(self, audio_files: Iterable[str]) -> List[str]:
+        """Names of ``audio_files`` without a file in the directory"""
+        return [audio_file for audio_file in audio_files if self.stat(audio_file) is None]
+
+    def cached_bytes(self, audio: AudioFile) -> Optional[bytes]:
+        """Contents of a small file from the cache, reading it on a miss; None for large files"""
+        if audio.size > self.cache_max_file_bytes or not self.cache.max_size:
+            return None
+        key = (audio.path, audio.size, audio.mtime)
+        data = self.cache.get(key)
+        if data is None:
+            with open(audio.path, "rb") as f:
+                data = f.read()
+            if len(data) != audio.size:
+                # Rewritten between stat and read; serve what was read, but do not cache it under the old key
+                return data
+            self.cache.put(key, data)
+        return data
+
+    def get_stats(self) -> Dict:
+        return {
+            "directory": self.directory,
+            "cache": self.cache.get_stats(),
+            "cache_max_file_bytes": self.cache_max_file_bytes
+        }
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Byte range of a single-range ``Range`` header as ``(start, stop)``
+
+    Returns None when the header should be ignored (another unit, several
+    ranges, malformed) and raises ValueError when it is unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first:
+            start = int(first)
+            stop = min(int(last) + 1, size) if last else size
+        elif last:
+            start, stop = max(size - int(last), 0), size
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size or stop <= start:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return start, stop
+
+
+class AudioFileResponse(Response):
+    """
+    ASGI response delivering an audio file with ETag, conditional and Range support
+
+    The body is sent, in order of preference, from the small-file cache, with
+    the ``http.response.zerocopysend`` extension (the server calls sendfile on
+    the file descriptor), with ``http.response.pathsend`` for whole files, or
+    read in chunks in a worker thread.
+    """
+
+    def __init__(self,
+                 audio: AudioFile,
+                 library: AudioLibrary,
+                 headers: Optional[Mapping[str, str]] = None,
+                 status_code: int = 200):
+        self.audio = audio
+        self.library = library
+        self.extra_headers = dict(headers or {})
+        self.status_code = status_code
+        self.media_type = audio.media_type
+        self.background = None
+
+    def _headers(self, length: Optional[int], content_range: Optional[str] = None) -> List[Tuple[bytes, bytes]]:
+        headers = {
+            "etag": self.audio.etag,
+            "last-modified": formatdate(self.audio.mtime, usegmt=True),
+            "accept-ranges": "bytes",
+            **self.extra_headers
+        }
+        if length is not None:
+            headers["content-type"] = self.audio.media_type
+            headers["content-length"] = str(length)
+        if content_range:
+            headers["content-range"] = content_range
+        return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await self._respond(scope, send)
+        if self.background is not None:
+            await self.background()
+
+    async def _respond(self, scope: Scope, send: Send):
+        request_headers = Headers(scope=scope)
+        size = self.audio.size
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or self.audio.etag in [tag.strip() for tag in if_none_match.split(",")]):
+            await send({"type": "http.response.start", "status": 304, "headers": self._headers(None)})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start, stop, status, content_range = 0, size, self.status_code, None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and size and (if_range is None or if_range.strip() == self.audio.etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                await send({"type": "http.response.start", "status": 416,
+                            "headers": self._headers(0, f"bytes */{size}")})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            if byte_range is not None:
+                start, stop = byte_range
+                status, content_range = 206, f"bytes {start}-{stop - 1}/{size}"
+
+        await send({"type": "http.response.start", "status": status, "headers": self._headers(stop - start, content_range)})
+        if scope["method"].upper() == "HEAD" or stop == start:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_body(scope, send, start, stop)
+
+    async def _send_body(self, scope: Scope, send: Send, start: int, stop: int):
+        extensions = scope.get("extensions") or {}
+        data = await anyio.to_thread.run_sync(self.library.cached_bytes, self.audio)
+        if data is not None:
+            await send({"type": "http.response.body", "body": data[start:stop]})
+        elif "http.response.zerocopysend" in extensions:
+            with open(self.audio.path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f, "offset": start, "count": stop - start})
+        elif "http.response.pathsend" in extensions and start == 0 and stop == self.audio.size:
+            await send({"type": "http.response.pathsend", "path": self.audio.path})
+        else:
+            async with await anyio.open_file(self.audio.path, mode="rb") as f:
+                await f.seek(start)
+                while start < stop:
+                    chunk = await f.read(min(CHUNK_SIZE, stop - start))
+                    if not chunk:
+                        break
+                    start += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": start < stop})
+                if start < stop:
+                    # The file shrank after the headers were sent; end the response anyway
+                    await send({"type": "http.response.body", "body": b""})
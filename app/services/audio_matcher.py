@@ -1,57 +1,348 @@
 import json
 import logging
-from typing import Dict, List, Optional, Union, Tuple
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Union, Tuple
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 from app.config.settings import Config
-from app.models.enums import MatchingMethod, ResponseStatus, ConfidenceScore, AudioFileName
-from app.models.schemas import QueryResponse, DetailedScores, HybridScores, ComparisonInfo
+from app.services.audio_files import AudioLibrary
+from app.models.enums import MatchingMethod, ResponseStatus, AudioFileName, StartupPhase
+from app.services.catalog_io import (
+    CatalogReader, ImportInProgress, catalog_digest, detect_format, empty_report, format_progress, read_audio_base,
+    write_catalog
+)
+from app.services.embedding_index import AudioUpdate, EmbeddingIndex, IndexScores, normalize_rows
+from app.services.embedding_store import EmbeddingStore
+from app.services.encoders import cache_namespace, encoder_name, is_uncased, load_encoder
+from app.services.index_segments import SegmentStore
+from app.services.lexical_index import LexicalIndex, LexicalVocabulary
+from app.services.metrics import CATALOG_RELOADS, LEXICAL_HITS, STAGE_SECONDS
+from app.services.query_cache import LRUCache, normalize_query
+from app.services.vector_index import SearchParams, top_k as select_top_k
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class MatchResult(NamedTuple):
+    """Outcome of a matching method: the best audio and its score, before any response is built"""
+    audio_file: Optional[AudioFileName]  # None when no audio scored above zero
+    score: float
+    method: MatchingMethod               # method whose scores produced the match
+    method_used: Optional[str] = None    # MAX: which method won and why; "exact_match" for lexical hits
+    compared_with: Optional[Dict[str, Optional[float]]] = None
+
 class AudioMatcher:
-    def __init__(self, audio_base_path: str = "audio_base.json"):
+    HYBRID_WEIGHT_INDIVIDUAL = 0.7
+    HYBRID_WEIGHT_COMBINED = 0.3
+    
+    def __init__(self,
+                 audio_base_path: str = "audio_base.json",
+                 model=None,
+                 progress: Optional[Callable[[StartupPhase, float], None]] = None,
+                 attach: bool = True):
         """
         Initialize the audio matcher
         
         Args:
             audio_base_path: Path to the JSON file with the audio database
+            model: Already loaded encoder exposing ``encode``; loads Config.MODEL_NAME with
+                the Config.ENCODER_BACKEND backend when omitted
+            progress: Called with the current startup phase and its completed fraction
+            attach: With Config.SHARED_INDEX_DIR, map the published index instead of
+                building one; False rebuilds it from the catalog and publishes it
         """
-        self.model = None
-        self.audio_descriptions = {}
-        self.embeddings = {}
-        self.individual_embeddings = {}
-        self.combined_embeddings = {}
+        self.model = model
+        self._progress = progress
+        self.audio_base_path = audio_base_path
+        self.index: Optional[EmbeddingIndex] = None
+        self._write_lock = threading.RLock()
+        self._import_lock = threading.Lock()
+        self.last_import: Optional[Dict[str, any]] = None
+        self.last_reload: Optional[Dict[str, any]] = None
+        self._catalog_seen: Optional[Tuple[int, int, int]] = None
+        # Digest of the audio base file as last read or written, recorded in published segments
+        self._catalog_digest: Optional[str] = None
+        self._texts_encoded = 0
+        self._texts_from_store = 0
+        self.store: Optional[EmbeddingStore] = None
+        self.segments: Optional[SegmentStore] = None
+        self._segment: Optional[str] = None
+        self._closed = threading.Event()
+        self._lexical_vocabulary = LexicalVocabulary()
+        self.audio_library: Optional[AudioLibrary] = None
+        if Config.AUDIO_DIR:
+            self.audio_library = AudioLibrary(Config.AUDIO_DIR, Config.AUDIO_CACHE_SIZE, Config.AUDIO_CACHE_MAX_FILE_BYTES)
+        self.missing_audio_files: frozenset = frozenset()
         self.threshold = Config.SIMILARITY_THRESHOLD
+        self.embedding_cache = LRUCache(Config.QUERY_CACHE_SIZE, Config.QUERY_CACHE_TTL_SECONDS)
+        self.result_cache = LRUCache(Config.QUERY_CACHE_SIZE if Config.RESULT_CACHE else 0, Config.QUERY_CACHE_TTL_SECONDS)
         
-        self._load_model()
-        self._load_audio_base(audio_base_path)
-        self._precompute_embeddings()
+        if self.model is None:
+            self._report(StartupPhase.LOADING_MODEL)
+            self._load_model()
+        self.encoder = encoder_name(self.model)
+        self.lowercase_queries = is_uncased(self.model)
+        self._report(StartupPhase.LOADING_CATALOG)
+        self._open_embedding_store()
+        self._open_segment_store()
+        self._load_index(audio_base_path, attach)
+        self._start_segment_watcher()
+        self._start_catalog_watcher()
+        self._progress = None
+    
+    def _report(self, phase: StartupPhase, fraction: float = 0.0):
+        if self._progress:
+            self._progress(phase, fraction)
     
     def _load_model(self):
         try:
-            logger.info(f"Loading model {Config.MODEL_NAME}...")
-            self.model = SentenceTransformer(Config.MODEL_NAME)
+            logger.info(f"Loading model {Config.MODEL_NAME} ({Config.ENCODER_BACKEND})...")
+            self.model = load_encoder()
             logger.info("Model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             raise
     
-    def _load_audio_base(self, path: str):
+    def _open_embedding_store(self):
+        if not Config.EMBEDDING_CACHE_DIR:
+            return
+        try:
+            self.store = EmbeddingStore(Config.EMBEDDING_CACHE_DIR, cache_namespace(self.model))
+        except Exception as e:
+            logger.warning(f"Embedding cache disabled: {e}")
+            self.store = None
+    
+    def _open_segment_store(self):
+        if not Config.SHARED_INDEX_DIR:
+            return
+        try:
+            self.segments = SegmentStore(Config.SHARED_INDEX_DIR, cache_namespace(self.model))
+        except OSError as e:
+            logger.warning(f"Shared index disabled: {e}")
+    
+    def _load_index(self, audio_base_path: str, attach: bool):
+        # Taken before reading, so a change made while loading is still picked up by a reload
+        self._catalog_seen = self._catalog_signature()
+        if self.segments is None:
+            index = self._precompute_embeddings(self._load_audio_base(audio_base_path))
+            self._load_cached_lexical(index)
+            self._swap_index(index)
+            return
+        # The first process to get here builds and publishes; the others wait for the lock and map its segment
+        with self.segments.lock():
+            if attach and self._sync_segment():
+                self._reconcile_segment(audio_base_path)
+                return
+            self._swap_index(self._precompute_embeddings(self._load_audio_base(audio_base_path)))
+    
+    def _reconcile_segment(self, audio_base_path: str):
+        """Apply edits made to the audio base file since the mapped segment was published, e.g. while no process ran"""
+        try:
+            catalog = read_audio_base(audio_base_path)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            logger.error(f"Serving segment {self._segment} as published; {audio_base_path} is invalid: {e}")
+            return
+        digest = catalog_digest(catalog.items())
+        if digest == self._catalog_digest:
+            return
+        logger.info(f"{audio_base_path} cambió desde la publicación del segmento {self._segment}; aplicando diferencias")
+        report = self._apply_catalog(catalog, digest)
+        logger.info(
+            f"Segmento reconciliado: +{report['audios_added']} ~{report['audios_changed']} "
+            f"-{report['audios_removed']} audios, {report['texts_encoded']} textos codificados"
+        )
+    
+    def _sync_segment(self) -> bool:
+        """Swap in the latest published segment if it is newer than the served one; False if none is usable"""
+        latest = self.segments.current()
+        if latest is None:
+            return False
+        if latest == self._segment:
+            return True
+        try:
+            name, index = self.segments.attach(latest, self._search_params())
+        except Exception as e:
+            logger.warning(f"Could not map shared segment {latest}: {e}")
+            return False
+        if index.storage != Config.EMBEDDING_STORAGE:
+            logger.warning(f"Shared segment {name} uses {index.storage} storage instead of {Config.EMBEDDING_STORAGE}")
+            return False
+        if index.encoder != self.encoder:
+            logger.warning(f"Shared segment {name} was encoded with {index.encoder} instead of {self.encoder}")
+            return False
+        self._segment = name
+        self._catalog_digest = index.catalog_digest
+        # Built and checked by another process; only record what is missing here
+        self._check_audio_files(index.audio_files, replace=True, strict=False)
+        self._swap_index(index, publish=False)
+        logger.info(f"Índice compartido {name} cargado: {len(index)} audios ({index.total_descriptions} descripciones)")
+        return True
+    
+    def _start_segment_watcher(self):
+        if self.segments is None or Config.SHARED_INDEX_POLL_SECONDS <= 0:
+            return
+        threading.Thread(target=self._watch_segments, name="segment-watcher", daemon=True).start()
+    
+    def _watch_segments(self):
+        """Pick up segments published by other processes"""
+        while not self._closed.wait(Config.SHARED_INDEX_POLL_SECONDS):
+            if self.segments.current() == self._segment:
+                continue
+            # A writer of this process syncs before editing anyway; try again on the next tick
+            if not self._write_lock.acquire(blocking=False):
+                continue
+            try:
+                self._sync_segment()
+            finally:
+                self._write_lock.release()
+    
+    def _start_catalog_watcher(self):
+        if Config.CATALOG_WATCH_SECONDS <= 0:
+            return
+        threading.Thread(target=self._watch_catalog, name="catalog-watcher", daemon=True).start()
+    
+    def _watch_catalog(self):
+        """Reload the audio base file after it changes, once it has been stable for a poll interval"""
+        pending = None
+        while not self._closed.wait(Config.CATALOG_WATCH_SECONDS):
+            signature = self._catalog_signature()
+            if signature is None or signature == self._catalog_seen:
+                pending = None
+                continue
+            if signature != pending:
+                # Possibly still being written by an editor that does not replace the file atomically
+                pending = signature
+                continue
+            try:
+                self.reload_audio_base(trigger="watcher")
+            except ImportInProgress:
+                continue
+            pending = None
+    
+    def _catalog_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat_result = os.stat(self.audio_base_path)
+        except OSError:
+            return None
+        return stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino
+    
+    def close(self):
+        """Stop following the shared index and the audio base file"""
+        self._closed.set()
+    
+    @contextmanager
+    def _editing(self):
+        """
+        Serialize catalog writers
+        
+        With a shared index, writers in other processes are excluded as well and
+        the edit starts from the latest published segment, so no edit is lost.
+        """
+        with self._write_lock:
+            if self.segments is None:
+                yield
+                return
+            with self.segments.lock():
+                self._sync_segment()
+                yield
+    
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, reusing embeddings from the persistent store when available"""
+        cached = self.store.get_many(texts) if self.store is not None else [None] * len(texts)
+        missing = [i for i, emb in enumerate(cached) if emb is None]
+        
+        if missing:
+            encoded = self._encode_batched([texts[i] for i in missing])
+            for i in missing:
+                cached[i] = encoded[texts[i]]
+        
+        if self.store is not None and missing:
+            self.store.put_many([texts[i] for i in missing], [cached[i] for i in missing])
+            try:
+                self.store.flush()
+            except OSError as e:
+                logger.warning(f"Could not persist embedding cache: {e}")
+        
+        self._texts_encoded += len(missing)
+        self._texts_from_store += len(texts) - len(missing)
+        logger.info(f"Encoded {len(missing)} texts, {len(texts) - len(missing)} reused from embedding cache")
+        
+        return np.asarray(cached, dtype=np.float32)
+    
+    def _encode_batched(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Encode unique texts in length-sorted batches of ``Config.ENCODE_BATCH_SIZE``
+        
+        Sorting by length keeps padding inside each batch small; every batch is a
+        single forward pass and the results are scattered back by text.
+        """
+        unique_texts = sorted(set(texts), key=len)
+        batch_size = max(1, Config.ENCODE_BATCH_SIZE)
+        encoded: Dict[str, np.ndarray] = {}
+        
+        for start in range(0, len(unique_texts), batch_size):
+            batch = unique_texts[start:start + batch_size]
+            embeddings = self.model.encode(batch, batch_size=len(batch), convert_to_numpy=True, show_progress_bar=False)
+            encoded.update(zip(batch, np.asarray(embeddings, dtype=np.float32)))
+            self._report(StartupPhase.ENCODING, len(encoded) / len(unique_texts))
+        
+        return encoded
+    
+    def _embed_audios(self,
+                      index: EmbeddingIndex,
+                      audios: Sequence[Tuple[AudioFileName, List[str]]]) -> List[AudioUpdate]:
+        """
+        Individual and combined embeddings of several audios, with a single batched encode
+        
+        Descriptions an audio already has in ``index`` reuse their indexed
+        embeddings, so only new texts and the combined texts are encoded.
+        """
+        reused: List[Dict[str, np.ndarray]] = []
+        pending: Dict[str, None] = {}
+        for audio_file, descriptions in audios:
+            known: Dict[str, np.ndarray] = {}
+            if audio_file in index:
+                position = index.position(audio_file)
+                known = dict(zip(index.descriptions[position], index.description_matrix[index.description_range(position)]))
+            reused.append(known)
+            pending.update((text, None) for text in descriptions if text not in known)
+            pending[" ".join(descriptions)] = None
+        
+        texts = list(pending)
+        encoded = dict(zip(texts, self._encode_texts(texts))) if texts else {}
+        updates: List[AudioUpdate] = []
+        for (audio_file, descriptions), known in zip(audios, reused):
+            individual = np.asarray([known[text] if text in known else encoded[text] for text in descriptions], dtype=np.float32)
+            updates.append((audio_file, descriptions, individual, encoded[" ".join(descriptions)]))
+        return updates
+    
+    @property
+    def audio_descriptions(self) -> Dict[AudioFileName, List[str]]:
+        """Descriptions of every audio in the current index snapshot"""
+        index = self.index
+        if index is None:
+            return {}
+        return dict(zip(index.audio_files, index.descriptions))
+    
+    def _load_audio_base(self, path: str) -> Dict[AudioFileName, List[str]]:
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                self.audio_descriptions = json.load(f)
-            logger.info(f"Loaded {len(self.audio_descriptions)} audios")
+            audio_descriptions = read_audio_base(path)
+            self._catalog_digest = catalog_digest(audio_descriptions.items())
+            logger.info(f"Loaded {len(audio_descriptions)} audios")
+            return audio_descriptions
         except FileNotFoundError:
             logger.error(f"File {path} not found")
-            self._create_default_audio_base(path)
+            return self._create_default_audio_base(path)
         except Exception as e:
             logger.error(f"Error loading audio database: {e}")
             raise
     
-    def _create_default_audio_base(self, path: str):
+    def _create_default_audio_base(self, path: str) -> Dict[AudioFileName, List[str]]:
         default_base = {
             "example.ogg": [
                 "example question",
@@ -60,178 +351,444 @@ class AudioMatcher:
         }
         with open(path, 'w', encoding='utf-8') as f:
             json.dump(default_base, f, indent=2, ensure_ascii=False)
-        self.audio_descriptions = default_base
+        self._catalog_digest = catalog_digest(default_base.items())
         logger.info("Created default base file")
+        return default_base
     
-    def _precompute_embeddings(self):
+    def _precompute_embeddings(self, audio_descriptions: Dict[AudioFileName, List[str]]) -> EmbeddingIndex:
         logger.info("Precomputing embeddings...")
         
-        for audio_file, descriptions in self.audio_descriptions.items():
-            individual_embs = []
-            for desc in descriptions:
-                emb = self.model.encode(desc)
-                individual_embs.append(emb)
-            
-            self.individual_embeddings[audio_file] = individual_embs
-            
-            combined_text = " ".join(descriptions)
-            combined_emb = self.model.encode(combined_text)
-            self.combined_embeddings[audio_file] = combined_emb
+        audio_files = list(audio_descriptions.keys())
+        self._check_audio_files(audio_files, replace=True)
+        texts: List[str] = []
+        for descriptions in audio_descriptions.values():
+            texts.extend(descriptions)
+            texts.append(" ".join(descriptions))
+        
+        self._report(StartupPhase.ENCODING)
+        embeddings = self._encode_texts(texts)
+        
+        self._report(StartupPhase.BUILDING_INDEX)
+        individual: List[np.ndarray] = []
+        combined: List[np.ndarray] = []
+        start = 0
+        for audio_file in audio_files:
+            count = len(audio_descriptions[audio_file])
+            individual.append(embeddings[start:start + count])
+            combined.append(embeddings[start + count])
+            start += count + 1
             
             if Config.DEBUG_MODE:
-                logger.debug(f"Embeddings calculados para {audio_file}: {len(individual_embs)} individuales + 1 combinado")
+                logger.debug(f"Embeddings calculados para {audio_file}: {count} individuales + 1 combinado")
         
-        logger.info(f"Embeddings precomputados para {len(self.individual_embeddings)} audios")
+        index = EmbeddingIndex.build(
+            audio_files, list(audio_descriptions.values()), individual, combined,
+            self._search_params(), Config.EMBEDDING_STORAGE, self.encoder,
+            self.model.get_sentence_embedding_dimension() or 0
+        )
+        logger.info(f"Embeddings precomputados para {len(index)} audios ({index.total_descriptions} descripciones)")
+        if index.quantization is not None:
+            logger.info(f"Embeddings almacenados como {index.storage}: {index.quantization}")
+            if self.store is None and Config.RESCORE_CANDIDATES > 0:
+                logger.warning("Full-precision rescoring needs the embedding cache; scores stay quantized")
+        return index
      
-    def find_best_match(self, query: str, method: Union[MatchingMethod, str] = MatchingMethod.HYBRID) -> Dict[str, any]:
-        try:
-            if isinstance(method, str):
-                try:
-                    method = MatchingMethod(method)
-                except ValueError:
-                    raise ValueError(f"Unknown method: {method}. Valid options: {[m.value for m in MatchingMethod]}")
+    @staticmethod
+    def _search_params() -> SearchParams:
+        return SearchParams(
+            backend=Config.INDEX_BACKEND,
+            n_lists=Config.IVF_N_LISTS,
+            n_probe=Config.IVF_N_PROBE,
+            candidates=Config.ANN_CANDIDATES,
+            min_vectors=Config.ANN_MIN_VECTORS
+        )
+    
+    def find_best_match(self,
+                        query: str,
+                        method: Union[MatchingMethod, str] = MatchingMethod.HYBRID,
+                        top_k: Optional[int] = None) -> Dict[str, any]:
+        return self.find_best_matches([query], [method], [top_k])[0]
+    
+    def find_best_matches(self,
+                          queries: List[str],
+                          methods: List[Union[MatchingMethod, str]],
+                          top_ks: Optional[List[Optional[int]]] = None) -> List[Dict[str, any]]:
+        """
+        Match several queries with a single encoder call and a single scoring pass
+        
+        Args:
+            queries: Query texts
+            methods: Matching method of each query
+            top_ks: Number of ranked audios to return with each query, if any
+        """
+        top_ks = top_ks or [None] * len(queries)
+        results: List[Optional[Dict[str, any]]] = [None] * len(queries)
+        resolved: List[MatchingMethod] = [MatchingMethod.HYBRID] * len(queries)
+        cache_keys: List[Optional[tuple]] = [None] * len(queries)
+        pending: List[int] = []
+        threshold = self.threshold
+        # Every query of the call is answered from the same snapshot, even if an admin update swaps it meanwhile
+        index = self.index
+        lexical = index.lexical
+        # The fast path answers without scores, so it cannot fill rankings or debug details
+        fast_path = lexical is not None and Config.LEXICAL_FAST_PATH and not Config.DEBUG_MODE
+        
+        for i, (query, method) in enumerate(zip(queries, methods)):
+            try:
+                resolved[i] = self._resolve_method(method)
+            except ValueError as e:
+                results[i] = self._create_internal_error_response(e, MatchingMethod.HYBRID)
+                continue
             
             if not query.strip():
-                return self._create_error_response(
+                results[i] = self._create_error_response(
                     "Empty query provided. Please provide a non-empty query.", 
-                    method, 
+                    resolved[i], 
                     confidence=0.0
                 )
+                continue
             
-            query_embedding = self.model.encode(query)
-            
-            match method:
-                case MatchingMethod.INDIVIDUAL:
-                    result = self._match_individual(query_embedding, query)
-                case MatchingMethod.COMBINED:
-                    result = self._match_combined(query_embedding, query)
-                case MatchingMethod.HYBRID:
-                    result = self._match_hybrid(query_embedding, query)
-                case MatchingMethod.MAX:
-                    result = self._match_max(query_embedding, query)
-                case _:
-                    raise ValueError(f"Método no implementado: {method}")
-            
-            return result
+            if fast_path and not top_ks[i]:
+                lookup_started = time.perf_counter()
+                hit = lexical.lookup(query)
+                if hit is not None:
+                    match = MatchResult(index.audio_files[hit[0]], 1.0, resolved[i], method_used="exact_match")
+                    results[i] = self._format_response(match, None, resolved[i])
+                    STAGE_SECONDS.observe(time.perf_counter() - lookup_started, "lexical", resolved[i].value)
+                    LEXICAL_HITS.inc(resolved[i].value)
+                    continue
             
+            cache_keys[i] = (normalize_query(query, self.lowercase_queries), resolved[i].value, threshold, top_ks[i], index.version)
+            cached = self.result_cache.get(cache_keys[i])
+            if cached is not None:
+                results[i] = dict(cached)
+                continue
+            pending.append(i)
+        
+        if not pending:
+            return results
+        
+        try:
+            started = time.perf_counter()
+            query_embeddings = self._encode_queries([queries[i] for i in pending])
+            encoded = time.perf_counter()
+            batch_scores = self._score_queries(index, [queries[i] for i in pending], query_embeddings)
+            scored = time.perf_counter()
         except Exception as e:
-            logger.error(f"Error en find_best_match: {e}")
-            return self._create_error_response(
-                f"Error interno del sistema: {str(e)}",
-                method if isinstance(method, MatchingMethod) else MatchingMethod.HYBRID,
-                error=str(e)
-            )
-
-    def _match_individual(self, query_embedding: np.ndarray, query: str) -> Dict[str, any]:
-        best_match: Optional[AudioFileName] = None
-        best_score: ConfidenceScore = 0.0
-        scores: Dict[str, float] = {}
-        detailed_scores: Dict[str, DetailedScores] = {}
-        
-        for audio_file, embeddings_list in self.individual_embeddings.items():
-            similarities: List[float] = []
-            for emb in embeddings_list:
-                sim = cosine_similarity([query_embedding], [emb])[0][0]
-                similarities.append(float(sim))
-            
-            max_sim = max(similarities) if similarities else 0.0
-            scores[audio_file] = max_sim
-            
-            detailed_scores[audio_file] = {
-                "individual_scores": similarities,
-                "descriptions": self.audio_descriptions[audio_file],
-                "max_score": max_sim
-            }
-            
-            if max_sim > best_score:
-                best_score = max_sim
-                best_match = audio_file
+            for i in pending:
+                results[i] = self._create_internal_error_response(e, resolved[i])
+            return results
         
-        return self._format_response(best_match, best_score, scores, detailed_scores, MatchingMethod.INDIVIDUAL)
-    
-    def _match_combined(self, query_embedding: np.ndarray, query: str) -> Dict[str, any]:
-        best_match: Optional[AudioFileName] = None
-        best_score: ConfidenceScore = 0.0
-        scores: Dict[str, float] = {}
+        rescore = index.store_rows is not None and Config.RESCORE_CANDIDATES > 0
+        for i, scores, query_embedding in zip(pending, batch_scores, query_embeddings):
+            try:
+                matching_started = time.perf_counter()
+                if rescore:
+                    self._rescore(scores, query_embedding)
+                match = self._match_scores(scores, resolved[i])
+                top_matches = self._rank(scores, resolved[i], top_ks[i]) if top_ks[i] else None
+                formatting_started = time.perf_counter()
+                results[i] = self._format_response(match, scores, resolved[i], top_matches)
+                formatted = time.perf_counter()
+                self.result_cache.put(cache_keys[i], dict(results[i]))
+            except Exception as e:
+                results[i] = self._create_internal_error_response(e, resolved[i])
+                continue
+            # The encoder call and the index scan are shared by the batch; each query waited for all of it
+            method = resolved[i].value
+            STAGE_SECONDS.observe(encoded - started, "encode", method)
+            STAGE_SECONDS.observe(scored - encoded + formatting_started - matching_started, "score", method)
+            STAGE_SECONDS.observe(formatted - formatting_started, "format", method)
         
-        for audio_file, audio_embedding in self.combined_embeddings.items():
-            similarity = cosine_similarity([query_embedding], [audio_embedding])[0][0]
-            scores[audio_file] = float(similarity)
-            
-            if similarity > best_score:
-                best_score = similarity
-                best_match = audio_file
+        return results
+    
+    def _score_queries(self, index: EmbeddingIndex, queries: List[str], query_embeddings: np.ndarray) -> List[IndexScores]:
+        """Scores of every query against ``index``, lexically prefiltered and blended as configured"""
+        lexical_scores = self._lexical_scores(index.lexical, queries)
+        if lexical_scores is not None and Config.LEXICAL_PREFILTER > 0:
+            batch_scores = index.score_positions(query_embeddings, [self._lexical_candidates(s) for s in lexical_scores])
+        else:
+            batch_scores = index.score_batch(query_embeddings)
+        if lexical_scores is not None and Config.LEXICAL_WEIGHT > 0:
+            batch_scores = [scores._replace(lexical_scores=s) for scores, s in zip(batch_scores, lexical_scores)]
+        return batch_scores
+    
+    @staticmethod
+    def _lexical_enabled() -> bool:
+        return Config.LEXICAL_FAST_PATH or Config.LEXICAL_WEIGHT > 0 or Config.LEXICAL_PREFILTER > 0
+    
+    def _attach_lexical(self, index: EmbeddingIndex):
+        """Build the lexical index of a snapshot unless it carries one already, e.g. mapped from a segment"""
+        if index.lexical is None and self._lexical_enabled():
+            index.lexical = LexicalIndex(index.descriptions, index.offsets, self._lexical_vocabulary)
+    
+    def _load_cached_lexical(self, index: EmbeddingIndex):
+        """
+        Map the lexical index saved next to the embedding cache for this exact catalog,
+        or build it and save it there for the next start
+        """
+        if self.store is None or not self._lexical_enabled():
+            return
+        path = os.path.join(self.store.path, f"lexical-{catalog_digest(zip(index.audio_files, index.descriptions))}")
+        try:
+            index.lexical = LexicalIndex.load(path, index.offsets)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable lexical index {path}: {e}")
+        if index.lexical is not None:
+            logger.info(f"Índice léxico cargado desde {path}")
+            return
         
-        return self._format_response(best_match, best_score, scores, None, MatchingMethod.COMBINED)
+        self._attach_lexical(index)
+        # Written aside and renamed, so concurrent workers never map a partial directory
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            index.lexical.save(tmp_path)
+            os.rename(tmp_path, path)
+        except OSError as e:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.isdir(path):
+                logger.warning(f"Could not persist lexical index: {e}")
+                return
+        for entry in os.listdir(self.store.path):
+            if entry.startswith("lexical-") and os.path.join(self.store.path, entry) != path and not entry.endswith(".tmp"):
+                shutil.rmtree(os.path.join(self.store.path, entry), ignore_errors=True)
     
-    def _match_hybrid(self, query_embedding: np.ndarray, query: str) -> Dict[str, any]:
-        individual_result = self._match_individual(query_embedding, query)
-        combined_result = self._match_combined(query_embedding, query)
+    @staticmethod
+    def _lexical_scores(lexical: Optional[LexicalIndex], queries: List[str]) -> Optional[List[np.ndarray]]:
+        """Per-audio BM25 scores of every query, when the prefilter or the hybrid blend needs them"""
+        if lexical is None or (Config.LEXICAL_WEIGHT <= 0 and Config.LEXICAL_PREFILTER <= 0):
+            return None
+        return [lexical.audio_scores(lexical.score(query)) for query in queries]
+    
+    @staticmethod
+    def _lexical_candidates(lexical_scores: np.ndarray) -> np.ndarray:
+        """Best ``LEXICAL_PREFILTER`` audios sharing terms with the query; every audio when none does"""
+        candidates = select_top_k(lexical_scores, Config.LEXICAL_PREFILTER)
+        candidates = candidates[lexical_scores[candidates] > 0.0]
+        return candidates if len(candidates) else np.arange(len(lexical_scores))
+    
+    def _rescore(self, scores: IndexScores, query_embedding: np.ndarray):
+        """
+        Recompute the best candidates of a quantized index at full precision, in place
         
-        weight_individual = 0.7
-        weight_combined = 0.3
+        Float32 vectors are read from the memory-mapped embedding store, so only the
+        rows of the rescored audios are paged in. When any of them is missing from
+        the store the quantized scores are kept.
+        """
+        k = Config.RESCORE_CANDIDATES
+        positions = np.unique(np.concatenate([
+            select_top_k(scores.individual_scores, k),
+            select_top_k(scores.combined_scores, k),
+            select_top_k(self._hybrid_scores(scores), k)
+        ]))
+        if scores.scored is not None:
+            # Never promote audios the candidate search left out
+            positions = np.intersect1d(positions, scores.scored)
         
-        ind_scores = individual_result.get("all_scores", {}) or {}
-        comb_scores = combined_result.get("all_scores", {}) or {}
+        description_rows, combined_rows = scores.snapshot.store_rows
+        rows = [np.arange(r.start, r.stop) for r in map(scores.snapshot.description_range, positions)]
+        index_rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        store_rows = np.concatenate([description_rows[index_rows], combined_rows[positions]])
+        if (store_rows < 0).any():
+            return
         
-        hybrid_scores: Dict[str, float] = {}
-        for audio_file in self.audio_descriptions.keys():
-            ind_score = float(ind_scores.get(audio_file, 0))
-            comb_score = float(comb_scores.get(audio_file, 0))
-            
-            hybrid_score = (weight_individual * ind_score) + (weight_combined * comb_score)
-            hybrid_scores[audio_file] = float(hybrid_score)
+        query = normalize_rows(query_embedding)[0]
+        similarities = np.clip(normalize_rows(self.store.vectors_at(store_rows)) @ query, -1.0, 1.0)
+        description_similarities = similarities[:len(index_rows)]
+        scores.description_scores[index_rows] = description_similarities
+        start = 0
+        for position, audio_rows in zip(positions, rows):
+            if len(audio_rows):
+                scores.individual_scores[position] = description_similarities[start:start + len(audio_rows)].max()
+            start += len(audio_rows)
+        scores.combined_scores[positions] = similarities[len(index_rows):]
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Encode queries in one call, reusing cached embeddings of normalized query text"""
+        keys = [normalize_query(query, self.lowercase_queries) for query in queries]
+        embeddings: List[Optional[np.ndarray]] = [self.embedding_cache.get(key) for key in keys]
         
-        hybrid_detailed_scores: HybridScores = {
-            "individual_scores": ind_scores,
-            "combined_scores": comb_scores,
-            "weights": {"individual": weight_individual, "combined": weight_combined}
-        }
+        missing: Dict[str, List[int]] = {}
+        for i, emb in enumerate(embeddings):
+            if emb is None:
+                missing.setdefault(keys[i], []).append(i)
+        
+        if missing:
+            texts = [queries[positions[0]] for positions in missing.values()]
+            encoded = self.model.encode(texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False)
+            for (key, positions), emb in zip(missing.items(), np.asarray(encoded, dtype=np.float32)):
+                self.embedding_cache.put(key, emb)
+                for i in positions:
+                    embeddings[i] = emb
         
-        if not hybrid_scores:
-            return self._format_response(None, 0.0, {}, hybrid_detailed_scores, MatchingMethod.HYBRID)
+        return np.stack(embeddings)
+    
+    @staticmethod
+    def _resolve_method(method: Union[MatchingMethod, str]) -> MatchingMethod:
+        if isinstance(method, MatchingMethod):
+            return method
+        try:
+            return MatchingMethod(method)
+        except ValueError:
+            raise ValueError(f"Unknown method: {method}. Valid options: {[m.value for m in MatchingMethod]}")
+    
+    def _match_scores(self, scores: IndexScores, method: MatchingMethod) -> "MatchResult":
+        match method:
+            case MatchingMethod.INDIVIDUAL:
+                return self._match_individual(scores)
+            case MatchingMethod.COMBINED:
+                return self._match_combined(scores)
+            case MatchingMethod.HYBRID:
+                return self._match_hybrid(scores)
+            case MatchingMethod.MAX:
+                return self._match_max(scores)
+            case _:
+                raise ValueError(f"Método no implementado: {method}")
+
+    def _method_scores(self, scores: IndexScores, method: MatchingMethod) -> np.ndarray:
+        """Per-audio score vector a method ranks by"""
+        match method:
+            case MatchingMethod.INDIVIDUAL:
+                return scores.individual_scores
+            case MatchingMethod.COMBINED:
+                return scores.combined_scores
+            case MatchingMethod.HYBRID:
+                return self._hybrid_scores(scores)
+            case MatchingMethod.MAX:
+                return np.maximum(scores.individual_scores, scores.combined_scores)
+            case _:
+                raise ValueError(f"Método no implementado: {method}")
+    
+    def _rank(self, scores: IndexScores, method: MatchingMethod, k: int) -> List[Dict[str, any]]:
+        """
+        The ``k`` best audios with their best matching description, via partial selection
         
-        best_match_item = max(hybrid_scores.items(), key=lambda x: float(x[1]))
-        best_audio, best_score = best_match_item
+        Only scored audios are ranked; with candidate search there may be fewer than ``k``.
+        """
+        method_scores = self._method_scores(scores, method)
+        if scores.scored is None:
+            positions = select_top_k(method_scores, k)
+        else:
+            # Audios outside the candidate set keep a -1.0 fill, which is not a score
+            positions = scores.scored[select_top_k(method_scores[scores.scored], k)]
+        ranked: List[Dict[str, any]] = []
+        for position in positions:
+            position = int(position)
+            audio_file = scores.snapshot.audio_files[position]
+            rows = scores.snapshot.description_range(position)
+            matched_description = None
+            if rows.stop > rows.start:
+                best_row = int(np.argmax(scores.description_scores[rows]))
+                matched_description = scores.snapshot.descriptions[position][best_row]
+            ranked.append({
+                "audio_file": audio_file,
+                "score": float(method_scores[position]),
+                "matched_description": matched_description
+            })
+        return ranked
+    
+    @staticmethod
+    def _best_above_zero(scores: np.ndarray) -> Tuple[int, float]:
+        """Position and value of the first maximum, or (-1, 0.0) when no score is positive"""
+        if not len(scores):
+            return -1, 0.0
+        position = int(np.argmax(scores))
+        best_score = float(scores[position])
+        if best_score <= 0.0:
+            return -1, 0.0
+        return position, best_score
+
+    @staticmethod
+    def _scores_dict(index: EmbeddingIndex, scores: np.ndarray) -> Dict[str, float]:
+        return dict(zip(index.audio_files, scores.tolist()))
+
+    @staticmethod
+    def _best_match(scores: IndexScores, method_scores: np.ndarray, method: MatchingMethod) -> "MatchResult":
+        position, best_score = AudioMatcher._best_above_zero(method_scores)
+        return MatchResult(scores.snapshot.audio_files[position] if position >= 0 else None, best_score, method)
+
+    def _match_individual(self, scores: IndexScores) -> "MatchResult":
+        return self._best_match(scores, scores.individual_scores, MatchingMethod.INDIVIDUAL)
+    
+    def _match_combined(self, scores: IndexScores) -> "MatchResult":
+        return self._best_match(scores, scores.combined_scores, MatchingMethod.COMBINED)
+    
+    def _hybrid_scores(self, scores: IndexScores) -> np.ndarray:
+        hybrid_scores = self.HYBRID_WEIGHT_INDIVIDUAL * scores.individual_scores + self.HYBRID_WEIGHT_COMBINED * scores.combined_scores
+        if scores.lexical_scores is not None:
+            hybrid_scores = (1.0 - Config.LEXICAL_WEIGHT) * hybrid_scores + Config.LEXICAL_WEIGHT * scores.lexical_scores
+        return hybrid_scores
+    
+    def _match_hybrid(self, scores: IndexScores) -> "MatchResult":
+        hybrid_scores = self._hybrid_scores(scores)
+        if not len(hybrid_scores):
+            return MatchResult(None, 0.0, MatchingMethod.HYBRID)
         
-        return self._format_response(best_audio, float(best_score), hybrid_scores, hybrid_detailed_scores, MatchingMethod.HYBRID)
+        position = int(np.argmax(hybrid_scores))
+        return MatchResult(scores.snapshot.audio_files[position], float(hybrid_scores[position]), MatchingMethod.HYBRID)
     
-    def _match_max(self, query_embedding: np.ndarray, query: str) -> Dict[str, any]:
+    def _match_max(self, scores: IndexScores) -> "MatchResult":
         """Toma el máximo entre método individual y combinado"""
-        individual_result = self._match_individual(query_embedding, query)
-        combined_result = self._match_combined(query_embedding, query)
-        
-        ind_best = float(individual_result.get("confidence", 0))
-        comb_best = float(combined_result.get("confidence", 0))
-        
-        ind_response = individual_result.get("response")
-        comb_response = combined_result.get("response")
-        
-        if ind_response == Config.NO_MATCH_RESPONSE and comb_response != Config.NO_MATCH_RESPONSE:
-            result = combined_result.copy()
-            result["method"] = MatchingMethod.MAX.value
-            result["method_used"] = "combined_was_only_valid"
-            result["compared_with"] = {"individual_score": ind_best}
-            return result
-        elif comb_response == Config.NO_MATCH_RESPONSE and ind_response != Config.NO_MATCH_RESPONSE:
-            result = individual_result.copy()
-            result["method"] = MatchingMethod.MAX.value
-            result["method_used"] = "individual_was_only_valid"
-            result["compared_with"] = {"combined_score": comb_best}
-            return result
-        
-        if ind_best >= comb_best:
-            result = individual_result.copy()
-            result["method"] = MatchingMethod.MAX.value
-            result["method_used"] = "individual_was_better"
-            result["compared_with"] = {"combined_score": comb_best}
-        else:
-            result = combined_result.copy()
-            result["method"] = MatchingMethod.MAX.value
-            result["method_used"] = "combined_was_better"
-            result["compared_with"] = {"individual_score": ind_best}
+        individual = self._match_individual(scores)
+        combined = self._match_combined(scores)
+        ind_valid = self._is_match(individual)
+        comb_valid = self._is_match(combined)
+        
+        # compared_with carries both ComparisonInfo keys, the method that lost the comparison filled in
+        if not ind_valid and comb_valid:
+            return combined._replace(method_used="combined_was_only_valid",
+                                     compared_with={"combined_score": None, "individual_score": individual.score})
+        elif not comb_valid and ind_valid:
+            return individual._replace(method_used="individual_was_only_valid",
+                                       compared_with={"combined_score": combined.score, "individual_score": None})
+        
+        if individual.score >= combined.score:
+            return individual._replace(method_used="individual_was_better",
+                                       compared_with={"combined_score": combined.score, "individual_score": None})
+        return combined._replace(method_used="combined_was_better",
+                                 compared_with={"combined_score": None, "individual_score": individual.score})
+    
+    def _is_match(self, match: "MatchResult") -> bool:
+        return bool(match.audio_file) and match.score >= self.threshold
+    
+    def _debug_scores(self, scores: IndexScores, method: MatchingMethod) -> Tuple[Dict[str, float], Optional[Dict]]:
+        """All scores and detailed scores of a method, only materialized in debug mode"""
+        snapshot = scores.snapshot
+        if method == MatchingMethod.INDIVIDUAL:
+            all_scores = self._scores_dict(snapshot, scores.individual_scores)
+            detailed_scores = {
+                audio_file: {
+                    "individual_scores": scores.description_scores[snapshot.description_range(i)].tolist(),
+                    "descriptions": snapshot.descriptions[i],
+                    "max_score": all_scores[audio_file]
+                }
+                for i, audio_file in enumerate(snapshot.audio_files)
+            }
+            return all_scores, detailed_scores
+        if method == MatchingMethod.COMBINED:
+            return self._scores_dict(snapshot, scores.combined_scores), None
         
-        return result
+        hybrid_scores = self._hybrid_scores(scores)
+        weights = {"individual": self.HYBRID_WEIGHT_INDIVIDUAL, "combined": self.HYBRID_WEIGHT_COMBINED}
+        lexical_scores = None
+        if scores.lexical_scores is not None:
+            weights["lexical"] = Config.LEXICAL_WEIGHT
+            lexical_scores = self._scores_dict(snapshot, scores.lexical_scores)
+        detailed_scores = {
+            "individual_scores": self._scores_dict(snapshot, scores.individual_scores),
+            "combined_scores": self._scores_dict(snapshot, scores.combined_scores),
+            "lexical_scores": lexical_scores,
+            "weights": weights
+        }
+        return (self._scores_dict(snapshot, hybrid_scores) if len(hybrid_scores) else {}), detailed_scores
+    
+    def _create_internal_error_response(self, error: Exception, method: MatchingMethod) -> Dict[str, any]:
+        logger.error(f"Error en find_best_match: {error}")
+        return self._create_error_response(
+            f"Error interno del sistema: {str(error)}",
+            method,
+            error=str(error)
+        )
     
     def _create_error_response(self, message: str, method: MatchingMethod, confidence: float = 0.0, error: Optional[str] = None) -> Dict[str, any]:
         return {
@@ -245,78 +802,397 @@ class AudioMatcher:
             "all_scores": None,
             "detailed_scores": None,
             "method_used": None,
-            "compared_with": None
+            "compared_with": None,
+            "top_matches": None
         }
     
-    def _format_response(self, 
-                        best_match: Optional[AudioFileName], 
-                        best_score: ConfidenceScore, 
-                        scores: Dict[str, float], 
-                        detailed_scores: Optional[Dict], 
-                        method: Union[MatchingMethod, str]) -> Dict[str, any]:
-        method_str = method.value if isinstance(method, MatchingMethod) else method
+    def _format_response(self,
+                         match: "MatchResult",
+                         scores: Optional[IndexScores],
+                         method: MatchingMethod,
+                         top_matches: Optional[List[Dict[str, any]]] = None) -> Dict[str, any]:
+        """
+        Response dict of a match, built once per query
         
-        if best_score >= self.threshold and best_match:
+        ``match.method`` is the method whose scores produced the match (individual
+        or combined for MAX), ``method`` the one that was requested.
+        """
+        source_method = match.method.value
+        if self._is_match(match):
             status = ResponseStatus.SUCCESS
-            response_value = best_match
-            message = f"Match encontrado con confianza {best_score:.3f} usando método {method_str}"
+            response_value = match.audio_file
+            message = f"Match encontrado con confianza {match.score:.3f} usando método {source_method}"
             best_candidate = None
         else:
             status = ResponseStatus.NO_MATCH
             response_value = Config.NO_MATCH_RESPONSE
-            message = f"No hay match suficientemente bueno. Mejor score: {best_score:.3f} con método {method_str}"
-            best_candidate = best_match
+            message = f"No hay match suficientemente bueno. Mejor score: {match.score:.3f} con método {source_method}"
+            best_candidate = match.audio_file
+        
+        all_scores = detailed_scores = None
+        if Config.DEBUG_MODE:
+            all_scores, detailed_scores = self._debug_scores(scores, match.method)
         
-        response = {
+        return {
             "response": response_value,
-            "confidence": float(best_score),
-            "method": method_str,
+            "confidence": float(match.score),
+            "method": method.value,
             "message": message,
             "status": status.value,
             "best_candidate": best_candidate,
-            "all_scores": scores if Config.DEBUG_MODE else None,
-            "detailed_scores": detailed_scores if Config.DEBUG_MODE and detailed_scores else None,
-            "method_used": None,
-            "compared_with": None,
+            "all_scores": all_scores,
+            "detailed_scores": detailed_scores or None,
+            "method_used": match.method_used,
+            "compared_with": match.compared_with,
+            "top_matches": top_matches,
             "error": None
         }
-        
-        return response
     
     def add_audio(self, audio_file: AudioFileName, descriptions: List[str]) -> bool:
+        """Add an audio, or replace its descriptions if it already exists"""
         try:
-            self.audio_descriptions[audio_file] = descriptions
-            
-            individual_embs = []
-            for desc in descriptions:
-                emb = self.model.encode(desc)
-                individual_embs.append(emb)
-            
-            self.individual_embeddings[audio_file] = individual_embs
-            
-            combined_text = " ".join(descriptions)
-            combined_emb = self.model.encode(combined_text)
-            self.combined_embeddings[audio_file] = combined_emb
-            
-            self.embeddings[audio_file] = combined_emb
-            
+            self._put_audios([(audio_file, descriptions)], persist=Config.PERSIST_CATALOG)
             logger.info(f"Audio added: {audio_file} with {len(descriptions)} descriptions")
             return True
         except Exception as e:
             logger.error(f"Error adding audio: {e}")
             return False
     
+    def replace_audio(self, audio_file: AudioFileName, descriptions: List[str]) -> bool:
+        """
+        Replace the descriptions of an existing audio
+        
+        Raises:
+            KeyError: The audio is not in the catalog
+        """
+        try:
+            self._put_audios([(audio_file, descriptions)], must_exist=True, persist=Config.PERSIST_CATALOG)
+            logger.info(f"Audio replaced: {audio_file} with {len(descriptions)} descriptions")
+            return True
+        except KeyError:
+            raise
+        except Exception as e:
+            logger.error(f"Error replacing audio: {e}")
+            return False
+    
+    def delete_audio(self, audio_file: AudioFileName) -> bool:
+        """Remove an audio from the catalog; False when it does not exist"""
+        with self._editing():
+            if audio_file not in self.index:
+                return False
+            self._swap_index(self.index.without_audio(audio_file), persist=Config.PERSIST_CATALOG)
+            self.missing_audio_files = self.missing_audio_files - {audio_file}
+        logger.info(f"Audio deleted: {audio_file}")
+        return True
+    
+    def import_catalog(self,
+                       reader: CatalogReader,
+                       source: Optional[str] = None,
+                       persist: bool = True,
+                       progress: Optional[Callable[[Dict[str, any]], None]] = None) -> Dict[str, any]:
+        """
+        Merge a streamed catalog into the live index, in batches of ``Config.IMPORT_BATCH_SIZE`` audios
+        
+        Every batch is encoded with one batched call and swapped in as a new
+        snapshot, so memory stays bounded by the batch and queries keep running.
+        The catalog file is written once at the end, atomically, also when the
+        stream fails halfway, so it always matches what is being served.
+        
+        Args:
+            reader: Validated entries of the catalog stream
+            source: Name of the stream, for the report
+            persist: Write the merged catalog to the audio base file
+            progress: Called with the report after every batch
+        
+        Raises:
+            ImportInProgress: Another import is running
+        """
+        if not self._import_lock.acquire(blocking=False):
+            raise ImportInProgress("A catalog import is already running")
+        
+        report = empty_report(source)
+        self.last_import = report
+        started = time.monotonic()
+        try:
+            # With a shared index the whole import is one edit, published once at the end
+            with self._editing() if self.segments is not None else nullcontext():
+                try:
+                    batch_size = max(1, Config.IMPORT_BATCH_SIZE)
+                    batch: List[Tuple[AudioFileName, List[str]]] = []
+                    for entry in reader:
+                        batch.append(entry)
+                        if len(batch) >= batch_size:
+                            self._import_batch(batch, reader, report, started, progress)
+                            batch = []
+                    self._import_batch(batch, reader, report, started, progress)
+                    report["status"] = "completed"
+                except Exception as e:
+                    logger.error(f"Error importing catalog: {e}")
+                    report["status"] = "failed"
+                    report["error"] = str(e)
+                finally:
+                    self._finish_import(report, persist)
+        finally:
+            report["elapsed_seconds"] = time.monotonic() - started
+            self._import_lock.release()
+        
+        logger.info(f"Importación {report['status']}: {format_progress(report)} en {report['elapsed_seconds']:.1f}s")
+        return report
+    
+    def _finish_import(self, report: Dict[str, any], persist: bool):
+        if not (report["audios_added"] or report["audios_replaced"]):
+            return
+        try:
+            if self.segments is not None:
+                self._swap_index(self.index)
+            if persist:
+                self.save_audio_base()
+                report["persisted"] = True
+        except OSError as e:
+            logger.error(f"Error persisting catalog: {e}")
+            report["error"] = report["error"] or f"Catalog not persisted: {e}"
+    
+    def import_file(self,
+                    path: str,
+                    fmt: Optional[str] = None,
+                    source: Optional[str] = None,
+                    persist: bool = True,
+                    progress: Optional[Callable[[Dict[str, any]], None]] = None) -> Dict[str, any]:
+        """Import a JSONL or JSON catalog file; the format follows the extension when omitted"""
+        with open(path, "r", encoding="utf-8") as f:
+            reader = CatalogReader(f, fmt or detect_format(path))
+            return self.import_catalog(reader, source or os.path.basename(path), persist, progress)
+    
+    def _import_batch(self,
+                      batch: List[Tuple[AudioFileName, List[str]]],
+                      reader: CatalogReader,
+                      report: Dict[str, any],
+                      started: float,
+                      progress: Optional[Callable[[Dict[str, any]], None]]):
+        if batch:
+            added, replaced = self._put_audios(batch, publish=False)
+            report["audios_added"] += added
+            report["audios_replaced"] += replaced
+            report["descriptions"] += sum(len(descriptions) for _, descriptions in batch)
+        report["entries_read"] = reader.read
+        report["skipped"] = reader.skipped
+        report["errors"] = list(reader.errors)
+        report["elapsed_seconds"] = time.monotonic() - started
+        logger.info(f"Importación en curso: {format_progress(report)}")
+        if progress:
+            progress(report)
+    
+    def _put_audios(self,
+                    audios: Sequence[Tuple[AudioFileName, List[str]]],
+                    must_exist: bool = False,
+                    persist: bool = False,
+                    publish: bool = True) -> Tuple[int, int]:
+        """
+        Build the next snapshot with ``audios`` added or replaced and swap it in
+        
+        Writers are serialized; queries keep reading the previous snapshot until
+        the swap. Returns the number of added and replaced audios.
+        """
+        with self._editing():
+            index = self.index
+            if must_exist:
+                missing = [audio_file for audio_file, _ in audios if audio_file not in index]
+                if missing:
+                    raise KeyError(missing[0])
+            
+            self._check_audio_files([audio_file for audio_file, _ in audios])
+            replaced = sum(1 for audio_file in dict(audios) if audio_file in index)
+            self._swap_index(index.with_audios(self._embed_audios(index, audios)), persist, publish)
+        return len(dict(audios)) - replaced, replaced
+    
+    def reload_audio_base(self, trigger: str = "manual") -> Dict[str, any]:
+        """
+        Re-read the audio base file and apply only what changed in it
+        
+        Audios no longer in the file are removed and new or changed audios are
+        embedded, reusing the indexed embeddings of the descriptions they keep,
+        so only added descriptions and the combined texts of changed audios are
+        encoded. Everything is swapped in as one snapshot; queries keep reading
+        the previous one meanwhile. An invalid file is reported and leaves the
+        served catalog untouched.
+        
+        Args:
+            trigger: What asked for the reload ("watcher", "signal", "api" or "manual")
+        
+        Raises:
+            ImportInProgress: A catalog import is running
+        """
+        if not self._import_lock.acquire(blocking=False):
+            raise ImportInProgress("A catalog import is running; reload the audio base when it finishes")
+        
+        report = {
+            "status": "running",
+            "trigger": trigger,
+            "started_at": time.time(),
+            "audios_added": 0,
+            "audios_changed": 0,
+            "audios_removed": 0,
+            "texts_encoded": 0,
+            "texts_from_cache": 0,
+            "index_version": None,
+            "elapsed_seconds": 0.0,
+            "error": None
+        }
+        self.last_reload = report
+        started = time.monotonic()
+        try:
+            self._catalog_seen = self._catalog_signature()
+            # Same reader as startup, so a restart would serve exactly what a reload applies
+            catalog = read_audio_base(self.audio_base_path)
+            report.update(self._apply_catalog(catalog, catalog_digest(catalog.items())))
+        except Exception as e:
+            logger.error(f"Error reloading {self.audio_base_path}: {e}")
+            report["status"] = "failed"
+            report["error"] = str(e)
+        finally:
+            report["elapsed_seconds"] = time.monotonic() - started
+            self._import_lock.release()
+        
+        CATALOG_RELOADS.inc(trigger, report["status"])
+        logger.info(
+            f"Recarga {report['status']} ({trigger}): +{report['audios_added']} ~{report['audios_changed']} "
+            f"-{report['audios_removed']} audios, {report['texts_encoded']} textos codificados "
+            f"en {report['elapsed_seconds']:.2f}s"
+        )
+        return report
+    
+    def _check_audio_files(self, audio_files: Sequence[AudioFileName], replace: bool = False, strict: bool = True):
+        """
+        Verify that catalog audios have a file in Config.AUDIO_DIR
+        
+        Missing files are logged and tracked for /api/stats; with
+        Config.REQUIRE_AUDIO_FILES they are an error instead.
+        
+        Args:
+            audio_files: Audios to check
+            replace: ``audio_files`` is the whole catalog, not an update
+            strict: Honor Config.REQUIRE_AUDIO_FILES
+        
+        Raises:
+            FileNotFoundError: Some file is missing and Config.REQUIRE_AUDIO_FILES is set
+        """
+        if self.audio_library is None:
+            return
+        missing = self.audio_library.missing(audio_files)
+        if missing:
+            shown = ", ".join(missing[:10]) + (f" (+{len(missing) - 10})" if len(missing) > 10 else "")
+            message = f"{len(missing)} audios sin archivo en {self.audio_library.directory}: {shown}"
+            if strict and Config.REQUIRE_AUDIO_FILES:
+                raise FileNotFoundError(message)
+            logger.warning(message)
+        if replace:
+            self.missing_audio_files = frozenset(missing)
+        else:
+            self.missing_audio_files = (self.missing_audio_files - set(audio_files)) | set(missing)
+    
+    def _apply_catalog(self, catalog: Dict[AudioFileName, List[str]], digest: str) -> Dict[str, any]:
+        """
+        Make the served catalog equal ``catalog``, the audio base file with ``digest``
+        
+        Audios no longer in it are removed and new or changed audios are embedded
+        with ``_embed_audios``, then everything is swapped in as one snapshot.
+        Returns the counts of the reload report.
+        """
+        report: Dict[str, any] = {"texts_encoded": 0, "texts_from_cache": 0}
+        with self._editing():
+            index = self.index
+            removed = [audio_file for audio_file in index.audio_files if audio_file not in catalog]
+            changed = [(audio_file, descriptions) for audio_file, descriptions in catalog.items()
+                       if audio_file not in index or index.descriptions[index.position(audio_file)] != descriptions]
+            if removed or changed:
+                self._check_audio_files([audio_file for audio_file, _ in changed])
+                encoded, from_store = self._texts_encoded, self._texts_from_store
+                updated = index.without_audios(removed)
+                updated = updated.with_audios(self._embed_audios(updated, changed))
+                self._catalog_digest = digest
+                self._swap_index(updated)
+                self.missing_audio_files = self.missing_audio_files - set(removed)
+                report["texts_encoded"] = self._texts_encoded - encoded
+                report["texts_from_cache"] = self._texts_from_store - from_store
+            report["audios_added"] = sum(1 for audio_file, _ in changed if audio_file not in index)
+            report["audios_changed"] = len(changed) - report["audios_added"]
+            report["audios_removed"] = len(removed)
+            self._catalog_digest = digest
+            report["index_version"] = self.index.version
+            report["status"] = "reloaded" if removed or changed else "unchanged"
+        return report
+    
+    def _swap_index(self, index: EmbeddingIndex, persist: bool = False, publish: bool = True):
+        if persist:
+            # Published segments record the file they match, and it is about to be rewritten from this snapshot
+            self._catalog_digest = catalog_digest(zip(index.audio_files, index.descriptions))
+        index.catalog_digest = self._catalog_digest
+        if self.segments is not None and publish:
+            # Built before publishing, so other workers map it with the segment instead of rebuilding it
+            self._attach_lexical(index)
+            # Serve the mapped segment, not the private copy, so this process shares the matrices too
+            self._segment, index = self.segments.publish(index, self._search_params())
+        self._prepare_index(index)
+        self.index = index
+        # Query embeddings do not depend on the catalog, only results do; keys also carry the version
+        self.result_cache.clear()
+        if persist:
+            try:
+                self.save_audio_base()
+            except OSError as e:
+                logger.error(f"Error persisting catalog: {e}")
+    
+    def _prepare_index(self, index: EmbeddingIndex):
+        """Attach the per-snapshot lookups of the query path, so no query ever builds them"""
+        if index.quantization is not None and self.store is not None and Config.RESCORE_CANDIDATES > 0:
+            index.store_rows = (
+                self.store.rows([text for texts in index.descriptions for text in texts]),
+                self.store.rows([" ".join(texts) for texts in index.descriptions])
+            )
+        self._attach_lexical(index)
+    
+    def save_audio_base(self, path: Optional[str] = None):
+        """Write the current catalog to the audio base file, atomically"""
+        with self._write_lock:
+            index = self.index
+            write_catalog(path or self.audio_base_path, zip(index.audio_files, index.descriptions))
+            if path is None or path == self.audio_base_path:
+                # Our own write; the watcher should not reload it
+                self._catalog_seen = self._catalog_signature()
+                self._catalog_digest = catalog_digest(zip(index.audio_files, index.descriptions))
+    
+    def _audio_file_stats(self) -> Optional[Dict]:
+        if self.audio_library is None:
+            return None
+        missing = sorted(self.missing_audio_files)
+        return {**self.audio_library.get_stats(), "missing": len(missing), "missing_sample": missing[:20]}
+    
     def update_threshold(self, new_threshold: float):
         if 0.0 <= new_threshold <= 1.0:
             self.threshold = new_threshold
+            self.result_cache.clear()
             logger.info(f"Threshold updated to {new_threshold}")
             return True
         return False
     
     def get_stats(self) -> Dict:
+        index = self.index
+        index_stats = index.get_stats()
+        if self.segments is not None:
+            index_stats["segment"] = self._segment
+        if index.lexical is not None:
+            index_stats["lexical"] = index.lexical.get_stats()
         return {
-            "total_audios": len(self.audio_descriptions),
+            "total_audios": len(index),
             "model": Config.MODEL_NAME,
             "current_threshold": self.threshold,
-            "available_audios": list(self.audio_descriptions.keys())
+            "available_audios": list(index.audio_files),
+            "index": index_stats,
+            "last_import": dict(self.last_import) if self.last_import else None,
+            "last_reload": dict(self.last_reload) if self.last_reload else None,
+            "audio_files": self._audio_file_stats(),
+            "cache": {
+                "embeddings": self.embedding_cache.get_stats(),
+                "results": self.result_cache.get_stats()
+            }
         }
\ No newline at end of file
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+
+from app.models.enums import AudioFileName
+from app.models.schemas import AudioRequest
+
+FORMATS = ("jsonl", "json")
+
+_WHITESPACE = re.compile(r"\s*")
+
+
+class ImportInProgress(RuntimeError):
+    """Raised when a bulk import starts while another one is running"""
+
+
+class _ChunkedJson:
+    """Reads consecutive JSON values from a text stream, holding at most one value plus a chunk"""
+
+    def __init__(self, stream: TextIO, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or an empty string at the end of the stream"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self, expected: str):
+        found = self.peek()
+        if found != expected:
+            raise ValueError(f"Invalid JSON catalog: expected {expected!r}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise ValueError(f"Invalid JSON catalog: {e}") from e
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_entries(stream: TextIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Stream the entries of a JSON catalog without loading the whole document
+
+    Accepts the ``audio_base.json`` layout (an object mapping audio file names to
+    description lists) or an array of ``{"audio_file", "descriptions"}`` objects.
+    """
+    reader = _ChunkedJson(stream, chunk_size)
+    first = reader.peek()
+    if first not in ("{", "["):
+        raise ValueError("Invalid JSON catalog: expected an object or an array")
+    closing = "}" if first == "{" else "]"
+    reader.take(first)
+    if reader.peek() == closing:
+        return
+
+    while True:
+        if first == "{":
+            audio_file = reader.value()
+            reader.take(":")
+            yield {"audio_file": audio_file, "descriptions": reader.value()}
+        else:
+            yield reader.value()
+        if reader.peek() != ",":
+            break
+        reader.take(",")
+    reader.take(closing)
+    if reader.peek():
+        raise ValueError("Invalid JSON catalog: unexpected data after the end of the document")
+
+
+def iter_jsonl_entries(stream: TextIO) -> Iterator[Any]:
+    """Stream one ``{"audio_file", "descriptions"}`` object per line; blank lines are skipped"""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield ValueError(f"Invalid JSON line: {e}")
+
+
+def read_audio_base(path: str) -> Dict[AudioFileName, List[str]]:
+    """
+    Catalog of an ``audio_base.json`` file, exactly as written
+
+    Startup and reloads both read the file through here, so they agree on its
+    contents: unlike imports, descriptions are kept verbatim and an audio may
+    have none.
+
+    Raises:
+        FileNotFoundError: The file does not exist
+        ValueError: The file is not a JSON catalog of description lists
+    """
+    catalog: Dict[AudioFileName, List[str]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for position, entry in enumerate(iter_json_entries(f), start=1):
+            if not isinstance(entry, dict):
+                raise ValueError(f"Entry {position}: must be an object with audio_file and descriptions")
+            audio_file, descriptions = entry.get("audio_file"), entry.get("descriptions")
+            if not isinstance(audio_file, str) or not audio_file:
+                raise ValueError(f"Entry {position}: audio_file must be a non-empty string")
+            if not isinstance(descriptions, list) or not all(isinstance(text, str) for text in descriptions):
+                raise ValueError(f"Entry {position} ({audio_file}): descriptions must be a list of strings")
+            catalog[audio_file] = descriptions
+    return catalog
+
+
+def detect_format(path: str) -> str:
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "json"
+
+
+class CatalogReader:
+    """
+    Validated entries of a catalog stream, one at a time
+
+    Invalid entries are skipped and recorded in ``errors`` (up to ``max_errors``
+    of them) with their 1-based position in the stream.
+    """
+
+    def __init__(self, stream: TextIO, fmt: str = "jsonl", max_errors: int = 100):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown catalog format: {fmt}. Valid options: {list(FORMATS)}")
+        self.stream = stream
+        self.format = fmt
+        self.max_errors = max_errors
+        self.read = 0
+        self.skipped = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def __iter__(self) -> Iterator[Tuple[AudioFileName, List[str]]]:
+        entries = iter_jsonl_entries(self.stream) if self.format == "jsonl" else iter_json_entries(self.stream)
+        for entry in entries:
+            self.read += 1
+            try:
+                if isinstance(entry, Exception):
+                    raise entry
+                if not isinstance(entry, dict):
+                    raise ValueError("Entry must be an object with audio_file and descriptions")
+                request = AudioRequest(**entry)
+            except (ValidationError, ValueError, TypeError) as e:
+                self._skip(e)
+                continue
+            yield request.audio_file, request.descriptions
+
+    def _skip(self, error: Exception):
+        self.skipped += 1
+        if len(self.errors) < self.max_errors:
+            if isinstance(error, ValidationError):
+                message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors())
+            else:
+                message = str(error)
+            self.errors.append({"entry": self.read, "error": message})
+
+
+def write_catalog(path: str, items: Iterable[Tuple[AudioFileName, List[str]]]):
+    """
+    Write a catalog in the ``audio_base.json`` layout, atomically
+
+    Entries are streamed to a temporary file next to ``path``, which is then
+    renamed over it, so readers never see a partially written catalog.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("{")
+            count = 0
+            for audio_file, descriptions in items:
+                body = json.dumps(descriptions, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+                f.write(f"{',' if count else ''}\n  {json.dumps(audio_file, ensure_ascii=False)}: {body}")
+                count += 1
+            f.write("\n}" if count else "}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def catalog_digest(items: Iterable[Tuple[AudioFileName, List[str]]]) -> str:
+    """SHA-1 of a catalog's audio files and descriptions in order, whatever file format they came from"""
+    digest = hashlib.sha1()
+    for audio_file, descriptions in items:
+        digest.update(json.dumps([audio_file, descriptions], ensure_ascii=False).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def format_progress(report: Dict[str, Any]) -> str:
+    return (f"{report['entries_read']} entries read, {report['audios_added']} added, "
+            f"{report['audios_replaced']} replaced, {report['skipped']} skipped")
+
+
+def empty_report(source: Optional[str]) -> Dict[str, Any]:
+    return {
+        "status": "running",
+        "source": source,
+        "entries_read": 0,
+        "audios_added": 0,
+        "audios_replaced": 0,
+        "descriptions": 0,
+        "skipped": 0,
+        "errors": [],
+        "persisted": False,
+        "elapsed_seconds": 0.0,
+        "error": None
+    }
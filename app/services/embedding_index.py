@@ -0,0 +1,380 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+import numpy as np
+
+from app.models.enums import AudioFileName
+from app.services.embedding_matrix import EmbeddingMatrix, quantization_error
+from app.services.lexical_index import LexicalIndex
+from app.services.vector_index import IVFIndex, SearchParams, build_search_index, top_k
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize every row so cosine similarity becomes a plain dot product"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+class IndexScores(NamedTuple):
+    """Scores of one query against the whole catalog, produced in a single pass"""
+    description_scores: np.ndarray  # (n_descriptions,)
+    individual_scores: np.ndarray   # (n_audios,) best description score per audio
+    combined_scores: np.ndarray     # (n_audios,)
+    snapshot: "EmbeddingIndex"      # index the positions above refer to
+    lexical_scores: Optional[np.ndarray] = None  # (n_audios,) best BM25 description score, when blended
+    scored: Optional[np.ndarray] = None          # positions of the audios actually scored; None when all were
+
+
+# (audio_file, descriptions, individual embeddings, combined embedding)
+AudioUpdate = Tuple[AudioFileName, List[str], np.ndarray, np.ndarray]
+
+
+class EmbeddingIndex:
+    """
+    Immutable snapshot of the catalog and its pre-normalized embedding matrices.
+
+    Rows ``offsets[i]:offsets[i + 1]`` of ``description_matrix`` belong to
+    ``audio_files[i]``; edits build a new index with a higher ``version``.
+    """
+
+    def __init__(self,
+                 audio_files: Sequence[AudioFileName],
+                 descriptions: Sequence[List[str]],
+                 description_matrix: Union[EmbeddingMatrix, np.ndarray],
+                 offsets: np.ndarray,
+                 combined_matrix: Union[EmbeddingMatrix, np.ndarray],
+                 search: Optional[SearchParams] = None,
+                 description_search: Optional[IVFIndex] = None,
+                 combined_search: Optional[IVFIndex] = None,
+                 quantization: Optional[Dict[str, float]] = None,
+                 version: int = 0,
+                 encoder: Optional[str] = None):
+        if not isinstance(description_matrix, EmbeddingMatrix):
+            description_matrix = EmbeddingMatrix.from_float32(description_matrix)
+        if not isinstance(combined_matrix, EmbeddingMatrix):
+            combined_matrix = EmbeddingMatrix.from_float32(combined_matrix)
+        self.audio_files: List[AudioFileName] = list(audio_files)
+        self.descriptions: List[List[str]] = list(descriptions)
+        self.description_matrix = description_matrix
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.combined_matrix = combined_matrix
+        self.search = search or SearchParams()
+        self.quantization = quantization  # score error against float32, measured at build time
+        self.version = version
+        self.encoder = encoder  # backend and model of the embeddings; queries must be encoded with the same
+        if description_search is None:
+            description_search = build_search_index(description_matrix, self.search)
+        if combined_search is None:
+            combined_search = build_search_index(combined_matrix, self.search)
+        self.description_search = description_search
+        self.combined_search = combined_search
+        # Lookups derived from this snapshot, attached by the owner before serving it
+        self.store_rows: Optional[Tuple[np.ndarray, np.ndarray]] = None  # embedding store rows of descriptions and combined texts
+        self.lexical: Optional[LexicalIndex] = None
+        self.catalog_digest: Optional[str] = None  # audio base file the snapshot was last reconciled with
+        self._positions = {audio_file: i for i, audio_file in enumerate(self.audio_files)}
+
+        counts = np.diff(self.offsets)
+        self._non_empty = counts > 0
+        self._segment_starts = self.offsets[:-1][self._non_empty]
+
+    @classmethod
+    def build(cls,
+              audio_files: Sequence[AudioFileName],
+              descriptions: Sequence[List[str]],
+              individual: Sequence[np.ndarray],
+              combined: Sequence[np.ndarray],
+              search: Optional[SearchParams] = None,
+              storage: str = "float32",
+              encoder: Optional[str] = None,
+              dimension: int = 0) -> "EmbeddingIndex":
+        """
+        Build an index from per-audio embeddings
+
+        Args:
+            audio_files: Audio names, in catalog order
+            descriptions: Description texts of every audio
+            individual: One (n_descriptions, dim) array per audio
+            combined: One combined embedding per audio
+            search: Search backend; exact scan by default
+            storage: Matrix storage type: float32, float16 or int8
+            encoder: Encoder backend and model that produced the embeddings
+            dimension: Embedding size, for an empty catalog that has no embedding to take it from
+        """
+        counts = [len(embs) for embs in individual]
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        dim = int(np.asarray(combined[0]).shape[-1]) if len(combined) else dimension
+        non_empty = [np.asarray(embs, dtype=np.float32).reshape(-1, dim) for embs in individual if len(embs)]
+        description_matrix = normalize_rows(np.concatenate(non_empty)) if non_empty else np.zeros((0, dim), dtype=np.float32)
+        combined_matrix = normalize_rows(np.stack(combined)) if len(combined) else np.zeros((0, dim), dtype=np.float32)
+
+        quantized = EmbeddingMatrix.from_float32(description_matrix, storage)
+        quantization = quantization_error(description_matrix, quantized) if storage != "float32" else None
+        del description_matrix
+        return cls(audio_files, descriptions, quantized, offsets, EmbeddingMatrix.from_float32(combined_matrix, storage),
+                   search, quantization=quantization, encoder=encoder)
+
+    def __len__(self) -> int:
+        return len(self.audio_files)
+
+    def __contains__(self, audio_file: AudioFileName) -> bool:
+        return audio_file in self._positions
+
+    @property
+    def total_descriptions(self) -> int:
+        return int(self.offsets[-1])
+
+    def position(self, audio_file: AudioFileName) -> int:
+        return self._positions[audio_file]
+
+    @property
+    def storage(self) -> str:
+        return self.description_matrix.storage
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.description_matrix.nbytes + self.combined_matrix.nbytes + self.offsets.nbytes
+
+    def description_range(self, position: int) -> slice:
+        return slice(int(self.offsets[position]), int(self.offsets[position + 1]))
+
+    def score(self, query_embedding: np.ndarray) -> IndexScores:
+        """Cosine similarity of a query against every description and every combined text"""
+        return self.score_batch(query_embedding)[0]
+
+    def score_batch(self, query_embeddings: np.ndarray) -> List[IndexScores]:
+        """Score a (n_queries, dim) query matrix with two matrix products and a segmented max"""
+        queries = normalize_rows(query_embeddings)
+        if self.description_search is not None:
+            return self._score_candidates(queries)
+
+        description_scores = self.description_matrix.dot(queries)
+        combined_scores = self.combined_matrix.dot(queries)
+        np.clip(description_scores, -1.0, 1.0, out=description_scores)
+        np.clip(combined_scores, -1.0, 1.0, out=combined_scores)
+
+        individual_scores = np.zeros((len(queries), len(self.audio_files)), dtype=np.float32)
+        if len(self._segment_starts):
+            individual_scores[:, self._non_empty] = np.maximum.reduceat(description_scores, self._segment_starts, axis=1)
+
+        return [
+            IndexScores(description_scores[i], individual_scores[i], combined_scores[i], self)
+            for i in range(len(queries))
+        ]
+
+    def _score_candidates(self, queries: np.ndarray) -> List[IndexScores]:
+        """
+        Exact scores for the audios found by the approximate indexes
+
+        Audios outside the candidate set keep a score of -1.0, the lowest possible
+        cosine similarity, so they can never win over a scored audio.
+        """
+        k = max(1, self.search.candidates)
+        description_hits = self.description_search.search(queries, k)
+        if self.combined_search is not None:
+            combined_hits = self.combined_search.search(queries, k)
+            combined_all = None
+        else:
+            combined_all = self.combined_matrix.dot(queries)
+            combined_hits = [top_k(scores, k) for scores in combined_all]
+
+        results: List[IndexScores] = []
+        for i, query in enumerate(queries):
+            owners = np.searchsorted(self.offsets, description_hits[i], side="right") - 1
+            positions = np.unique(np.concatenate([owners, combined_hits[i]]).astype(np.int64))
+            combined_scores = np.clip(combined_all[i], -1.0, 1.0) if combined_all is not None else None
+            results.append(self._score_positions(query, positions, combined_scores))
+        return results
+
+    def score_positions(self, query_embeddings: np.ndarray, positions: Sequence[np.ndarray]) -> List[IndexScores]:
+        """
+        Exact scores of each query against its own subset of audios
+
+        ``positions[i]`` lists the audios scored for query ``i``; the others keep
+        a score of -1.0, as with the approximate backend.
+        """
+        queries = normalize_rows(query_embeddings)
+        return [
+            self._score_positions(query, np.unique(np.asarray(audio_positions, dtype=np.int64)))
+            for query, audio_positions in zip(queries, positions)
+        ]
+
+    def _score_positions(self,
+                         query: np.ndarray,
+                         positions: np.ndarray,
+                         combined_scores: Optional[np.ndarray] = None) -> IndexScores:
+        starts = self.offsets[positions]
+        counts = self.offsets[positions + 1] - starts
+        local_starts = np.zeros(len(positions), dtype=np.int64)
+        np.cumsum(counts[:-1], out=local_starts[1:])
+        rows = np.repeat(starts - local_starts, counts) + np.arange(int(counts.sum()), dtype=np.int64)
+
+        description_scores = np.full(self.total_descriptions, -1.0, dtype=np.float32)
+        description_scores[rows] = np.clip(self.description_matrix[rows] @ query, -1.0, 1.0)
+
+        individual_scores = np.full(len(self.audio_files), -1.0, dtype=np.float32)
+        has_rows = counts > 0
+        individual_scores[positions[~has_rows]] = 0.0
+        if has_rows.any():
+            individual_scores[positions[has_rows]] = np.maximum.reduceat(
+                description_scores[rows], local_starts[has_rows]
+            )
+
+        if combined_scores is None:
+            combined_scores = np.full(len(self.audio_files), -1.0, dtype=np.float32)
+            combined_scores[positions] = np.clip(self.combined_matrix[positions] @ query, -1.0, 1.0)
+
+        return IndexScores(description_scores, individual_scores, combined_scores, self, scored=positions)
+
+    def get_stats(self) -> Dict:
+        stats = {
+            "backend": "ivf" if self.description_search is not None else "exact",
+            "descriptions": self.total_descriptions,
+            "audios": len(self.audio_files),
+            "version": self.version,
+            "encoder": self.encoder,
+            "storage": self.storage,
+            "memory_mb": round(self.memory_bytes / 2**20, 3)
+        }
+        if self.quantization is not None:
+            stats["quantization_error"] = self.quantization
+        if self.description_search is not None:
+            stats["descriptions_ivf"] = self.description_search.get_stats()
+            stats["candidates"] = self.search.candidates
+        if self.combined_search is not None:
+            stats["combined_ivf"] = self.combined_search.get_stats()
+        return stats
+
+    def with_audio(self,
+                   audio_file: AudioFileName,
+                   descriptions: List[str],
+                   individual: np.ndarray,
+                   combined: np.ndarray) -> "EmbeddingIndex":
+        """Return a new index where ``audio_file`` is added, or replaced if it already exists"""
+        return self.with_audios([(audio_file, descriptions, individual, combined)])
+
+    def with_audios(self, updates: Sequence[AudioUpdate]) -> "EmbeddingIndex":
+        """
+        Return a new index where every audio of ``updates`` is added, or replaced if it already exists
+
+        The matrices are copied once for the whole batch. Replaced audios keep
+        their position; new audios are appended in order. When an audio appears
+        more than once, its last update wins.
+        """
+        latest: Dict[AudioFileName, AudioUpdate] = {}
+        for update in updates:
+            latest[update[0]] = update
+        if not latest:
+            return self
+
+        dim = self.combined_matrix.shape[1] if len(self.audio_files) else int(np.asarray(updates[0][3]).shape[-1])
+        replaced = sorted((self._positions[audio_file], update) for audio_file, update in latest.items()
+                          if audio_file in self._positions)
+        appended = [update for audio_file, update in latest.items() if audio_file not in self._positions]
+
+        counts = np.diff(self.offsets)
+        all_descriptions = list(self.descriptions)
+        description_parts: List[EmbeddingMatrix] = []
+        description_search = self.description_search
+        previous_stop = 0
+        shift = 0
+        replaced_rows: List[Tuple[int, int, int]] = []
+        for position, (_, descriptions, individual, _) in replaced:
+            rows = self.description_range(position)
+            new_rows = self._quantized(individual, dim)
+            description_parts.extend([self.description_matrix.take(slice(previous_stop, rows.start)), new_rows])
+            replaced_rows.append((rows.start + shift, rows.stop + shift, len(new_rows)))
+            previous_stop = rows.stop
+            shift += len(new_rows) - (rows.stop - rows.start)
+            counts[position] = len(new_rows)
+            all_descriptions[position] = list(descriptions)
+        description_parts.append(self.description_matrix.take(slice(previous_stop, None)))
+
+        combined_matrix = self.combined_matrix
+        if replaced:
+            positions = [position for position, _ in replaced]
+            combined_matrix = combined_matrix.with_rows(
+                positions, self._quantized(np.stack([update[3] for _, update in replaced]), dim)
+            )
+
+        audio_files = self.audio_files
+        if appended:
+            description_parts.extend(self._quantized(update[2], dim) for update in appended)
+            combined_matrix = EmbeddingMatrix.concatenate(
+                [combined_matrix, self._quantized(np.stack([update[3] for update in appended]), dim)]
+            )
+            counts = np.append(counts, [len(update[2]) for update in appended])
+            audio_files = audio_files + [update[0] for update in appended]
+            all_descriptions.extend(list(update[1]) for update in appended)
+        description_matrix = EmbeddingMatrix.concatenate(description_parts)
+
+        # Rows after a replaced audio shift, so surviving ids are moved rather than reassigned
+        combined_search = self.combined_search
+        for start, stop, inserted in replaced_rows:
+            description_search = self._spliced(description_search, description_matrix, start, stop, inserted)
+        for position, _ in replaced:
+            combined_search = self._spliced(combined_search, combined_matrix, position, position + 1, 1)
+        if appended:
+            appended_rows = int(sum(len(update[2]) for update in appended))
+            description_start = len(description_matrix) - appended_rows
+            description_search = self._spliced(description_search, description_matrix,
+                                               description_start, description_start, appended_rows)
+            combined_search = self._spliced(combined_search, combined_matrix,
+                                            len(self.audio_files), len(self.audio_files), len(appended))
+
+        return self._derived(audio_files, all_descriptions, description_matrix, counts, combined_matrix,
+                             description_search, combined_search)
+
+    def _quantized(self, embeddings: np.ndarray, dim: int) -> EmbeddingMatrix:
+        return EmbeddingMatrix.from_float32(
+            normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(-1, dim)), self.storage
+        )
+
+    def without_audio(self, audio_file: AudioFileName) -> "EmbeddingIndex":
+        """Return a new index without ``audio_file``; raises KeyError when it is not indexed"""
+        return self.without_audios([audio_file])
+
+    def without_audios(self, audio_files: Sequence[AudioFileName]) -> "EmbeddingIndex":
+        """
+        Return a new index without ``audio_files``, copying the matrices once
+
+        Raises KeyError when one of them is not indexed.
+        """
+        positions = sorted({self._positions[audio_file] for audio_file in audio_files})
+        if not positions:
+            return self
+        keep = np.ones(len(self.audio_files), dtype=bool)
+        keep[positions] = False
+        counts = np.diff(self.offsets)
+        keep_rows = np.repeat(keep, counts)
+        description_matrix = self.description_matrix.take(keep_rows)
+        combined_matrix = self.combined_matrix.take(keep)
+        audio_files_left = [audio_file for audio_file, kept in zip(self.audio_files, keep) if kept]
+        all_descriptions = [descriptions for descriptions, kept in zip(self.descriptions, keep) if kept]
+
+        description_search = self.description_search
+        if description_search is not None:
+            description_search = description_search.without_rows(description_matrix, keep_rows)
+        combined_search = self.combined_search
+        if combined_search is not None:
+            combined_search = combined_search.without_rows(combined_matrix, keep)
+
+        return self._derived(audio_files_left, all_descriptions, description_matrix, counts[keep], combined_matrix,
+                             description_search, combined_search)
+
+    @staticmethod
+    def _spliced(search: Optional[IVFIndex], matrix: EmbeddingMatrix,
+                 start: int, stop: int, inserted: int) -> Optional[IVFIndex]:
+        return search.spliced(matrix, start, stop, inserted) if search is not None else None
+
+    def _derived(self, audio_files, descriptions, description_matrix, counts, combined_matrix,
+                 description_search, combined_search) -> "EmbeddingIndex":
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return EmbeddingIndex(audio_files, descriptions, description_matrix, offsets, combined_matrix,
+                              self.search, description_search, combined_search, self.quantization, self.version + 1,
+                              self.encoder)
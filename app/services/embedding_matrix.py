@@ -0,0 +1,131 @@
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+STORAGE_TYPES = ("float32", "float16", "int8")
+
+
+class EmbeddingMatrix:
+    """
+    Row-major matrix of unit vectors stored as float32, float16 or int8.
+
+    int8 rows carry their own scale (max absolute component / 127), so every row
+    uses the full int8 range. Indexing returns dequantized float32 rows, and
+    ``dot`` converts the matrix chunk by chunk, so the float32 copy of the whole
+    matrix never exists at once.
+    """
+
+    CHUNK_ROWS = 1024
+
+    def __init__(self, data: np.ndarray, scales: Optional[np.ndarray] = None):
+        self.data = data
+        self.scales = scales
+
+    @classmethod
+    def from_float32(cls, matrix: np.ndarray, storage: str = "float32") -> "EmbeddingMatrix":
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if storage == "float32":
+            return cls(np.ascontiguousarray(matrix))
+        if storage == "float16":
+            return cls(np.ascontiguousarray(matrix, dtype=np.float16))
+        if storage == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0 if len(matrix) else np.zeros(0, dtype=np.float32)
+            scales[scales == 0.0] = 1.0
+            data = np.round(matrix / scales[:, None]).astype(np.int8)
+            return cls(np.ascontiguousarray(data), scales.astype(np.float32))
+        raise ValueError(f"Unknown embedding storage: {storage}. Valid options: {list(STORAGE_TYPES)}")
+
+    @property
+    def storage(self) -> str:
+        return "int8" if self.scales is not None else self.data.dtype.name
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, key) -> np.ndarray:
+        rows = self.data[key].astype(np.float32)
+        if self.scales is not None:
+            scales = self.scales[key]
+            rows *= scales[..., None] if np.ndim(scales) else scales
+        return rows
+
+    def to_float32(self) -> np.ndarray:
+        return self[:]
+
+    def dot(self, queries: np.ndarray) -> np.ndarray:
+        """(n_queries, n_rows) inner products with unit-normalized float32 queries"""
+        if self.storage == "float32":
+            return queries @ self.data.T
+
+        out = np.empty((len(queries), len(self.data)), dtype=np.float32)
+        for start in range(0, len(self.data), self.CHUNK_ROWS):
+            stop = start + self.CHUNK_ROWS
+            out[:, start:stop] = queries @ self.data[start:stop].astype(np.float32).T
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def take(self, key) -> "EmbeddingMatrix":
+        """Rows selected by ``key``, keeping the compact storage"""
+        return EmbeddingMatrix(self.data[key], self.scales[key] if self.scales is not None else None)
+
+    def with_rows(self, positions: Sequence[int], rows: "EmbeddingMatrix") -> "EmbeddingMatrix":
+        """Copy of the matrix with the rows at ``positions`` replaced by ``rows`` (same storage)"""
+        positions = np.asarray(positions, dtype=np.int64)
+        data = self.data.copy()
+        data[positions] = rows.data
+        scales = None
+        if self.scales is not None:
+            scales = self.scales.copy()
+            scales[positions] = rows.scales
+        return EmbeddingMatrix(data, scales)
+
+    @staticmethod
+    def concatenate(parts: Sequence["EmbeddingMatrix"]) -> "EmbeddingMatrix":
+        # Empty parts may come from an empty catalog, whose dimension is unknown
+        parts = [part for part in parts if len(part)] or list(parts[:1])
+        data = np.ascontiguousarray(np.concatenate([part.data for part in parts]))
+        scales = None
+        if parts[0].scales is not None:
+            scales = np.concatenate([part.scales for part in parts])
+        return EmbeddingMatrix(data, scales)
+
+
+def quantization_error(reference: np.ndarray, quantized: EmbeddingMatrix,
+                       n_queries: int = 256, n_rows: int = 50000, seed: int = 0) -> Dict[str, float]:
+    """
+    Score error of a quantized matrix against its float32 ``reference``, measured
+    with a sample of the rows themselves as queries
+
+    A query row is its own nearest neighbour under both matrices, so
+    ``top1_agreement`` compares the best match among the *other* rows.
+    """
+    if not len(reference) or quantized.storage == "float32":
+        return {"mean_abs_error": 0.0, "max_abs_error": 0.0, "top1_agreement": 1.0}
+
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(reference), min(n_rows, len(reference)), replace=False))
+    query_columns = rng.choice(len(rows), min(n_queries, len(rows)), replace=False)
+    queries = reference[rows[query_columns]]
+
+    exact = queries @ reference[rows].T
+    approx = queries @ quantized[rows].T
+    error = np.abs(exact - approx)
+    if len(rows) < 2:
+        return {"mean_abs_error": float(error.mean()), "max_abs_error": float(error.max()), "top1_agreement": 1.0}
+
+    own = (np.arange(len(queries)), query_columns)
+    exact[own] = -np.inf
+    approx[own] = -np.inf
+    return {
+        "mean_abs_error": float(error.mean()),
+        "max_abs_error": float(error.max()),
+        "top1_agreement": float(np.mean(np.argmax(exact, axis=1) == np.argmax(approx, axis=1)))
+    }
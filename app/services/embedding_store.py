@@ -0,0 +1,229 @@
+import hashlib
+import io
+import logging
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+import numpy as np
+
+from app.services.encoders import namespace_dir
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock; flushes are then only safe from one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingStore:
+    """
+    Persistent text -> embedding cache backed by memory-mappable ``.npy`` files.
+
+    Each model gets its own directory holding ``vectors.npy`` (float32, one row per
+    text) and ``keys.npy`` (SHA-1 of the text, same row order). Rows are only ever
+    appended: new rows are written after the existing ones and the header is
+    updated last, so a crash at any point leaves a consistent prefix. Appends
+    from several processes are serialized by the ``LOCK`` file lock.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    KEYS_FILE = "keys.npy"
+    LOCK_FILE = "LOCK"
+
+    def __init__(self, cache_dir: str, model_name: str):
+        """
+        Args:
+            cache_dir: Root directory of the cache
+            model_name: Model that produced the embeddings, used as namespace
+        """
+        self.model_name = model_name
+        self.path = namespace_dir(cache_dir, model_name)
+        self._rows: Dict[bytes, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._pending_keys: List[bytes] = []
+        self._pending_vectors: List[np.ndarray] = []
+        self._load()
+        if self._rows:
+            logger.info(f"Embedding cache loaded from {self.path}: {len(self._rows)} vectors")
+
+    @staticmethod
+    def text_key(text: str) -> bytes:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest().encode("ascii")
+
+    def _load(self):
+        vectors_path = os.path.join(self.path, self.VECTORS_FILE)
+        keys_path = os.path.join(self.path, self.KEYS_FILE)
+        if not (os.path.exists(vectors_path) and os.path.exists(keys_path)):
+            return
+        try:
+            vectors = np.load(vectors_path, mmap_mode="r")
+            keys = np.load(keys_path, mmap_mode="r")
+            count = min(len(vectors), len(keys))
+            self._vectors = vectors[:count]
+            self._rows = {bytes(key): row for row, key in enumerate(keys[:count])}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding cache {self.path}: {e}")
+            self._vectors = None
+            self._rows = {}
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._pending_keys)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached embedding of every text, or None for texts that were never stored"""
+        pending = {key: i for i, key in enumerate(self._pending_keys)}
+        result: List[Optional[np.ndarray]] = []
+        for text in texts:
+            key = self.text_key(text)
+            row = self._rows.get(key)
+            if row is not None:
+                result.append(np.asarray(self._vectors[row]))
+            elif key in pending:
+                result.append(self._pending_vectors[pending[key]])
+            else:
+                result.append(None)
+        return result
+
+    def rows(self, texts: Sequence[str]) -> np.ndarray:
+        """Row of every text in the on-disk arrays, or -1 for texts not flushed yet"""
+        return np.fromiter((self._rows.get(self.text_key(text), -1) for text in texts), dtype=np.int64, count=len(texts))
+
+    def vectors_at(self, rows: np.ndarray) -> np.ndarray:
+        """Stored embeddings of on-disk ``rows``; only those pages of the memory map are read"""
+        return np.asarray(self._vectors[rows], dtype=np.float32)
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray):
+        """Queue new embeddings; they are written to disk on ``flush``"""
+        known = set(self._pending_keys)
+        for text, vector in zip(texts, vectors):
+            key = self.text_key(text)
+            if key in self._rows or key in known:
+                continue
+            known.add(key)
+            self._pending_keys.append(key)
+            self._pending_vectors.append(np.asarray(vector, dtype=np.float32))
+
+    def flush(self):
+        """
+        Append queued embeddings to the on-disk arrays
+
+        Only the new rows are written, so flushing after every import batch costs
+        the size of the batch rather than the size of the cache.
+        """
+        if not self._pending_keys:
+            return
+        os.makedirs(self.path, exist_ok=True)
+
+        with self._lock():
+            count = self._sync_rows()
+            pending = [(key, vector) for key, vector in zip(self._pending_keys, self._pending_vectors)
+                       if key not in self._rows]
+            self._pending_keys = []
+            self._pending_vectors = []
+            if not pending:
+                return
+            new_keys = np.array([key for key, _ in pending], dtype="S40")
+            new_vectors = np.stack([vector for _, vector in pending]).astype(np.float32, copy=False)
+
+            vectors_path = os.path.join(self.path, self.VECTORS_FILE)
+            keys_path = os.path.join(self.path, self.KEYS_FILE)
+            # Vectors first: until the keys header grows, readers do not see the new rows
+            if count and self._append_rows(vectors_path, new_vectors, count) \
+                    and self._append_rows(keys_path, new_keys, count):
+                self._rows.update({key: count + i for i, key in enumerate(new_keys.tolist())})
+                self._vectors = np.load(vectors_path, mmap_mode="r")[:count + len(new_keys)]
+                return
+
+            # No usable arrays yet, or a header without room for the new shape: write both files whole
+            if self._vectors is not None and len(self._vectors):
+                vectors = np.concatenate([np.asarray(self._vectors), new_vectors])
+                keys = np.concatenate([np.array(list(self._rows.keys()), dtype="S40"), new_keys])
+            else:
+                vectors, keys = new_vectors, new_keys
+            self._atomic_save(self.VECTORS_FILE, vectors)
+            self._atomic_save(self.KEYS_FILE, keys)
+            self._load()
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.path, self.LOCK_FILE), "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sync_rows(self) -> int:
+        """
+        Pick up rows other processes appended since the last flush; returns the rows on disk
+
+        Returns 0 when the arrays are missing or no longer extend the rows known
+        here, in which case they are rewritten whole.
+        """
+        try:
+            counts = [self._header(os.path.join(self.path, name))[0][0] for name in (self.VECTORS_FILE, self.KEYS_FILE)]
+        except (OSError, ValueError, IndexError):
+            return 0
+        count = min(counts)
+        known = len(self._rows)
+        if count < known:
+            return 0
+        if count > known:
+            keys = np.load(os.path.join(self.path, self.KEYS_FILE), mmap_mode="r")
+            self._rows.update({bytes(key): known + i for i, key in enumerate(keys[known:count])})
+            self._vectors = np.load(os.path.join(self.path, self.VECTORS_FILE), mmap_mode="r")[:count]
+        return count
+
+    @staticmethod
+    def _header(path: str):
+        with open(path, "rb") as f:
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            return read_header(f) + (f.tell(), version)
+
+    @classmethod
+    def _append_rows(cls, path: str, rows: np.ndarray, count: int) -> bool:
+        """
+        Write ``rows`` after the first ``count`` rows of a ``.npy`` file and grow its header in place
+
+        False, with the file untouched, when the rows do not fit the stored
+        dtype and shape or the header has no room for the new row count.
+        """
+        shape, fortran_order, dtype, header_size, version = cls._header(path)
+        if fortran_order or dtype != rows.dtype or tuple(shape[1:]) != rows.shape[1:]:
+            return False
+        header = io.BytesIO()
+        write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+        write_header(header, {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (count + len(rows),) + tuple(shape[1:])
+        })
+        if len(header.getvalue()) != header_size:
+            return False
+
+        with open(path, "r+b") as f:
+            # Drops rows a crashed append wrote past the header's count
+            f.seek(header_size + count * dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64)))
+            f.truncate()
+            f.write(np.ascontiguousarray(rows).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            f.write(header.getvalue())
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+    def _atomic_save(self, filename: str, array: np.ndarray):
+        target = os.path.join(self.path, filename)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
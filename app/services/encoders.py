@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Union
+import numpy as np
+
+from app.config.settings import Config
+
+logger = logging.getLogger(__name__)
+
+ENCODER_BACKENDS = ("sentence-transformers", "onnx", "hashing")
+
+# Mixed case and accents; a tokenizer that lower-cases gives its lower-cased form the same ids
+_CASE_PROBE = "Hola Mundo, ¿CUÁNDO Paga Ñandú?"
+
+
+def _lowercases(tokenize) -> bool:
+    try:
+        return list(tokenize(_CASE_PROBE)) == list(tokenize(_CASE_PROBE.lower()))
+    except Exception:
+        return False
+
+
+class HashingEncoder:
+    """
+    Deterministic offline encoder, for tests and benchmarks.
+
+    Every word and character trigram is hashed (CRC32, so results do not depend on
+    PYTHONHASHSEED) into a signed bucket of a fixed-size vector. Texts sharing words
+    get similar vectors, which is enough to exercise the matcher without a model
+    download. Vectors are unit length, or zero for a text without words.
+    """
+
+    backend = "hashing"
+    uncased = True
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self.name = f"hashing-{dimension}"
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _features(self, text: str) -> List[int]:
+        words = text.casefold().split()
+        features = [zlib.crc32(word.encode("utf-8")) for word in words]
+        for word in words:
+            padded = f" {word} "
+            features.extend(zlib.crc32(padded[i:i + 3].encode("utf-8")) for i in range(len(padded) - 2))
+        return features
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        hashes = np.asarray(self._features(text), dtype=np.uint64)
+        if len(hashes):
+            signs = np.where(hashes & 1, 1.0, -1.0).astype(np.float32)
+            np.add.at(vector, (hashes >> 1) % self.dimension, signs)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               convert_to_numpy: bool = True, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            return self._encode_one(sentences)
+        if not sentences:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.stack([self._encode_one(text) for text in sentences])
+
+
+class SentenceTransformerEncoder:
+    """Full-precision PyTorch inference through ``sentence_transformers``"""
+
+    backend = "sentence-transformers"
+
+    def __init__(self, model_name: str, threads: int = 0):
+        """
+        Args:
+            model_name: sentence-transformers model name or path
+            threads: PyTorch intra-op threads; 0 keeps the library default
+        """
+        # Imported lazily: torch and transformers dominate the import time of the app
+        from sentence_transformers import SentenceTransformer
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name)
+        # Same namespace as before backends existed, so existing embedding caches stay valid
+        self.name = model_name
+        tokenizer = getattr(self.model, "tokenizer", None)
+        self.uncased = tokenizer is not None and _lowercases(lambda text: tokenizer(text)["input_ids"])
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               convert_to_numpy: bool = True, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        return self.model.encode(sentences, batch_size=batch_size, convert_to_numpy=True,
+                                 show_progress_bar=show_progress_bar, **kwargs)
+
+
+class OnnxEncoder:
+    """
+    CPU inference of an exported transformer with ONNX Runtime.
+
+    The model directory holds ``model.onnx`` (or ``model-int8.onnx``, with weights
+    dynamically quantized to int8), the fast tokenizer as ``tokenizer.json`` and
+    ``encoder.json`` with the pooling settings of the original sentence-transformers
+    model. Serving only needs ``onnxruntime`` and ``tokenizers``; the directory is
+    produced by ``export_onnx``, which needs ``sentence_transformers`` and ``torch``.
+    """
+
+    backend = "onnx"
+    SETTINGS_FILE = "encoder.json"
+
+    def __init__(self, model_name: str, model_dir: str, quantized: bool = True, threads: int = 0):
+        """
+        Args:
+            model_name: Name of the exported sentence-transformers model
+            model_dir: Directory of the exported model; it is exported first when missing
+            quantized: Use the int8 model instead of the float32 one
+            threads: ONNX Runtime intra-op threads; 0 lets it use every core
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_file = onnx_model_file(quantized)
+        if not os.path.exists(os.path.join(model_dir, model_file)):
+            logger.info(f"No ONNX export of {model_name} in {model_dir}, exporting it...")
+            export_onnx(model_name, model_dir, quantize=quantized)
+
+        with open(os.path.join(model_dir, self.SETTINGS_FILE), "r", encoding="utf-8") as f:
+            settings = json.load(f)
+        self.pooling = settings.get("pooling", "mean")
+        self.dimension = int(settings["dimension"])
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.uncased = _lowercases(lambda text: self.tokenizer.encode(text).ids)
+        self.tokenizer.enable_truncation(max_length=int(settings.get("max_length", 256)))
+        self.tokenizer.enable_padding(pad_id=int(settings.get("pad_id", 0)), pad_token=settings.get("pad_token", "[PAD]"))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(os.path.join(model_dir, model_file), sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.name = f"{model_name}-onnx{'-int8' if quantized else ''}"
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {
+            "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": attention_mask,
+            "token_type_ids": np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+        }
+        hidden = self.session.run(None, {name: inputs[name] for name in self.input_names})[0]
+        if self.pooling == "cls":
+            return np.ascontiguousarray(hidden[:, 0], dtype=np.float32)
+        mask = attention_mask[..., None].astype(np.float32)
+        return ((hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)).astype(np.float32)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               convert_to_numpy: bool = True, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            return self.encode([sentences], batch_size)[0]
+        if not sentences:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        batch_size = max(1, batch_size)
+        return np.concatenate([
+            self._encode_batch(list(sentences[start:start + batch_size]))
+            for start in range(0, len(sentences), batch_size)
+        ])
+
+
+def onnx_model_file(quantized: bool) -> str:
+    return "model-int8.onnx" if quantized else "model.onnx"
+
+
+def onnx_model_dir(model_name: str, base_dir: Optional[str] = None) -> str:
+    return namespace_dir(base_dir or Config.ONNX_MODEL_DIR, model_name)
+
+
+def export_onnx(model_name: str, model_dir: str, quantize: bool = True, opset: int = 14) -> str:
+    """
+    Export the transformer of a sentence-transformers model to ONNX
+
+    Writes the float32 model, its int8 dynamically quantized copy when
+    ``quantize`` is set, the tokenizer and the pooling settings. Returns the
+    path of the model the ``onnx`` backend will load.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(model_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    tokenizer.save_pretrained(model_dir)
+
+    sample = tokenizer(["exportar el modelo"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    float_path = os.path.join(model_dir, onnx_model_file(False))
+    with torch.no_grad():
+        torch.onnx.export(transformer, tuple(sample[name] for name in input_names), float_path,
+                          input_names=input_names, output_names=["last_hidden_state"],
+                          dynamic_axes=dynamic_axes, opset_version=opset)
+
+    pooling = model[1].get_pooling_mode_str() if len(model) > 1 and hasattr(model[1], "get_pooling_mode_str") else "mean"
+    settings: Dict[str, object] = {
+        "model": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_length": model.max_seq_length,
+        "pooling": "cls" if pooling == "cls" else "mean",
+        "pad_id": tokenizer.pad_token_id or 0,
+        "pad_token": tokenizer.pad_token or "[PAD]"
+    }
+    with open(os.path.join(model_dir, OnnxEncoder.SETTINGS_FILE), "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+
+    if not quantize:
+        return float_path
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantized_path = os.path.join(model_dir, onnx_model_file(True))
+    quantize_dynamic(float_path, quantized_path, weight_type=QuantType.QInt8)
+    logger.info(f"Modelo ONNX exportado en {model_dir} (int8: {quantized_path})")
+    return quantized_path
+
+
+def load_encoder(backend: Optional[str] = None, model_name: Optional[str] = None):
+    """Encoder selected by ``Config.ENCODER_BACKEND`` (or ``backend``) for ``Config.MODEL_NAME``"""
+    backend = backend or Config.ENCODER_BACKEND
+    model_name = model_name or Config.MODEL_NAME
+    if backend == "sentence-transformers":
+        return SentenceTransformerEncoder(model_name, Config.ENCODER_THREADS)
+    if backend == "onnx":
+        return OnnxEncoder(model_name, onnx_model_dir(model_name), Config.ONNX_QUANTIZE, Config.ENCODER_THREADS)
+    if backend == "hashing":
+        return HashingEncoder(Config.HASHING_DIMENSION)
+    raise ValueError(f"Unknown encoder backend: {backend}. Valid options: {list(ENCODER_BACKENDS)}")
+
+
+def encoder_name(model) -> str:
+    """Identity of an encoder, ``backend:name``; namespaces caches and is recorded in the index"""
+    backend = getattr(model, "backend", None) or "custom"
+    name = getattr(model, "name", None) or type(model).__name__
+    return f"{backend}:{name}"
+
+
+def is_uncased(model) -> bool:
+    """Whether ``model`` lower-cases its input, so queries differing only in case share an embedding"""
+    return bool(getattr(model, "uncased", False))
+
+
+def namespace_dir(base_dir: str, name: str) -> str:
+    """Directory of the model or namespace ``name`` under ``base_dir``, safe as a single path component"""
+    return os.path.join(base_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", name))
+
+
+def cache_namespace(model) -> str:
+    """Name under which an encoder's embeddings are cached and shared"""
+    return getattr(model, "name", None) or Config.MODEL_NAME
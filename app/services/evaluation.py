@@ -0,0 +1,304 @@
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Tuple
+import numpy as np
+
+from app.config.settings import Config
+from app.models.enums import AudioFileName
+from app.services.query_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Labels meaning "no audio should answer this query"
+NO_MATCH_LABELS = (None, "", "none", "no_match")
+
+
+class LabeledQuery(NamedTuple):
+    text: str
+    expected: Optional[AudioFileName]  # None when the query should get no match
+
+
+def read_query_log(stream: TextIO) -> Iterator[LabeledQuery]:
+    """
+    Labeled queries of a JSONL log, one ``{"text", "expected"}`` object per line
+
+    ``query`` is accepted for ``text`` and ``audio_file`` or ``label`` for
+    ``expected``; a null, empty or ``"none"`` label expects no match. Lines
+    without text are skipped.
+    """
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Línea {line_number} ignorada: {e}")
+            continue
+        if not isinstance(entry, dict):
+            continue
+        text = entry.get("text", entry.get("query"))
+        if not isinstance(text, str) or not text.strip():
+            continue
+        expected = entry.get("expected", entry.get("audio_file", entry.get("label")))
+        yield LabeledQuery(text, None if expected in NO_MATCH_LABELS else str(expected))
+
+
+def parse_grid(spec: str) -> np.ndarray:
+    """``start:stop:step`` (stop included) or a comma-separated list of values"""
+    if ":" in spec:
+        start, stop, step = (float(value) for value in spec.split(":"))
+        if step <= 0:
+            raise ValueError(f"Invalid grid step: {spec}")
+        values = np.arange(start, stop + step / 2, step)
+    else:
+        values = np.array([float(value) for value in spec.split(",") if value.strip()])
+    return np.unique(np.round(values, 6)).astype(np.float64)
+
+
+class Curve(NamedTuple):
+    """One way of picking the answer of a query; hybrid curves weight individual vs combined scores"""
+    method: str
+    individual_weight: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return self.method if self.individual_weight is None else f"{self.method}@{self.individual_weight:g}"
+
+
+class SweepEvaluator:
+    """
+    Replays a labeled query log and sweeps thresholds and hybrid weights
+
+    Queries are processed in chunks: unique texts are encoded with batched
+    calls, the chunk is scored against the whole index once, and for every
+    curve (individual, combined, max and hybrid at each weight) the best audio
+    and score of each query are taken from those matrices. A query is answered
+    at threshold ``t`` when its best score is at least ``t``, so the answered
+    and correct counts of every threshold come from one ``searchsorted`` and
+    a reversed cumulative sum, never from replaying the query.
+
+    Scores go through the matcher's own scoring, so candidate search, the
+    lexical prefilter and blend, and full-precision rescoring apply as in the
+    server. Rescoring picks its candidates with the configured hybrid weight,
+    so other swept weights are rescored approximately. Queries labeled with an
+    audio missing from the catalog cannot be judged; they are skipped and
+    counted under ``unknown_labels``.
+    """
+
+    def __init__(self,
+                 matcher,
+                 thresholds: Sequence[float],
+                 weights: Sequence[float],
+                 chunk_size: int = 4096):
+        """
+        Args:
+            matcher: Loaded ``AudioMatcher`` whose index and encoder are evaluated
+            thresholds: Similarity thresholds to sweep
+            weights: Individual weights of the hybrid method; combined gets the rest
+            chunk_size: Queries scored at once; bounds memory to chunk_size x audios scores
+        """
+        self.matcher = matcher
+        self.thresholds = np.unique(np.asarray(list(thresholds) + [matcher.threshold], dtype=np.float64))
+        self.curves: List[Curve] = [Curve("individual"), Curve("combined"), Curve("max")]
+        self.curves.extend(Curve("hybrid", float(w)) for w in np.unique(np.clip(weights, 0.0, 1.0)))
+        self.chunk_size = max(1, chunk_size)
+
+        shape = (len(self.curves), len(self.thresholds))
+        self.answered = np.zeros(shape, dtype=np.int64)
+        self.correct = np.zeros(shape, dtype=np.int64)
+        self.answered_negative = np.zeros(shape, dtype=np.int64)
+        self.queries = 0
+        self.positives = 0
+        self.unknown_labels = 0
+        self.unknown_label_sample: List[AudioFileName] = []
+        self.lexical_hits = 0
+        self.timings = {"encode": 0.0, "score": 0.0, "sweep": 0.0}
+
+    def run(self, queries: Iterable[LabeledQuery], progress=None, full: bool = False) -> Dict[str, Any]:
+        """
+        Evaluate every query of ``queries`` and return the report
+
+        Args:
+            queries: Labeled queries, consumed as a stream
+            progress: Called as ``progress(queries, seconds)`` after every chunk
+            full: Include the metrics of every threshold of every curve
+        """
+        index = self.matcher.index
+        positions = {audio_file: i for i, audio_file in enumerate(index.audio_files)}
+        started = time.perf_counter()
+        chunk: List[LabeledQuery] = []
+        for query in queries:
+            chunk.append(query)
+            if len(chunk) >= self.chunk_size:
+                self._evaluate_chunk(index, positions, chunk)
+                chunk = []
+                if progress:
+                    progress(self.queries, time.perf_counter() - started)
+        if chunk:
+            self._evaluate_chunk(index, positions, chunk)
+        return self.report(time.perf_counter() - started, full)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        # Logged queries repeat a lot; encode every normalized text once per chunk
+        keys = [normalize_query(text, self.matcher.lowercase_queries) for text in texts]
+        unique: Dict[str, int] = {}
+        for key in keys:
+            unique.setdefault(key, len(unique))
+        representatives = [""] * len(unique)
+        for text, key in zip(texts, keys):
+            if not representatives[unique[key]]:
+                representatives[unique[key]] = text
+        encoded = self.matcher.model.encode(
+            representatives, batch_size=Config.ENCODE_BATCH_SIZE, convert_to_numpy=True, show_progress_bar=False
+        )
+        return np.asarray(encoded, dtype=np.float32)[[unique[key] for key in keys]]
+
+    def _evaluate_chunk(self, index, positions: Dict[AudioFileName, int], chunk: List[LabeledQuery]):
+        known: List[LabeledQuery] = []
+        for query in chunk:
+            if query.expected is None or query.expected in positions:
+                known.append(query)
+                continue
+            self.unknown_labels += 1
+            if len(self.unknown_label_sample) < 20 and query.expected not in self.unknown_label_sample:
+                self.unknown_label_sample.append(query.expected)
+        chunk = known
+        if not chunk:
+            return
+        texts = [query.text for query in chunk]
+        expected = np.array([positions[query.expected] if query.expected is not None else -1
+                             for query in chunk], dtype=np.int64)
+        self.queries += len(chunk)
+        self.positives += int((expected >= 0).sum())
+
+        started = time.perf_counter()
+        embeddings = self._encode(texts)
+        encoded = time.perf_counter()
+        batch_scores = self.matcher._score_queries(index, texts, embeddings) if len(index) else []
+        if index.store_rows is not None and Config.RESCORE_CANDIDATES > 0:
+            for scores, embedding in zip(batch_scores, embeddings):
+                self.matcher._rescore(scores, embedding)
+        individual = np.stack([scores.individual_scores for scores in batch_scores]) if batch_scores else None
+        combined = np.stack([scores.combined_scores for scores in batch_scores]) if batch_scores else None
+        lexical = None
+        if batch_scores and batch_scores[0].lexical_scores is not None:
+            lexical = np.stack([scores.lexical_scores for scores in batch_scores])
+        scored = time.perf_counter()
+
+        exact = self._exact_hits(index, texts)
+        for curve_index, curve in enumerate(self.curves):
+            if individual is None:
+                best = np.full(len(chunk), -1, dtype=np.int64)
+                best_scores = np.zeros(len(chunk))
+            else:
+                best, best_scores = self._best(curve, individual, combined, lexical)
+            if exact is not None:
+                hits = exact >= 0
+                best = np.where(hits, exact, best)
+                best_scores = np.where(hits, 1.0, best_scores)
+            self._accumulate(curve_index, best, best_scores, expected)
+        self.timings["encode"] += encoded - started
+        self.timings["score"] += scored - encoded
+        self.timings["sweep"] += time.perf_counter() - scored
+
+    def _exact_hits(self, index, texts: List[str]) -> Optional[np.ndarray]:
+        """Positions answered by the lexical fast path (-1 otherwise), as the matcher would"""
+        if not Config.LEXICAL_FAST_PATH:
+            return None
+        lexical = index.lexical
+        if lexical is None:
+            return None
+        hits = np.array([(lexical.lookup(text) or (-1, -1))[0] for text in texts], dtype=np.int64)
+        self.lexical_hits += int((hits >= 0).sum())
+        return hits
+
+    @staticmethod
+    def _best(curve: Curve,
+              individual: np.ndarray,
+              combined: np.ndarray,
+              lexical: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.arange(len(individual))
+        if curve.method == "max":
+            # The better of the individual and combined winners, individual on ties; whichever
+            # of them passes a threshold also has the higher score, so this matches _match_max
+            best_individual, individual_scores = SweepEvaluator._best(Curve("individual"), individual, combined, lexical)
+            best_combined, combined_scores = SweepEvaluator._best(Curve("combined"), individual, combined, lexical)
+            use_individual = individual_scores >= combined_scores
+            return (np.where(use_individual, best_individual, best_combined),
+                    np.where(use_individual, individual_scores, combined_scores))
+        if curve.method == "individual":
+            scores = individual
+        elif curve.method == "combined":
+            scores = combined
+        else:
+            scores = curve.individual_weight * individual + (1.0 - curve.individual_weight) * combined
+            if lexical is not None:
+                scores = (1.0 - Config.LEXICAL_WEIGHT) * scores + Config.LEXICAL_WEIGHT * lexical
+        best = scores.argmax(axis=1)
+        best_scores = scores[rows, best]
+        if curve.method != "hybrid":
+            # Individual and combined never answer with a non-positive score
+            best = np.where(best_scores > 0.0, best, -1)
+            best_scores = np.maximum(best_scores, 0.0)
+        return best, best_scores
+
+    def _accumulate(self, curve_index: int, best: np.ndarray, best_scores: np.ndarray, expected: np.ndarray):
+        # Query q is answered at every threshold index below passed[q]
+        passed = np.searchsorted(self.thresholds, best_scores, side="right")
+        n_thresholds = len(self.thresholds)
+        answerable = best >= 0
+
+        def count_from(mask: np.ndarray) -> np.ndarray:
+            counts = np.bincount(passed[mask], minlength=n_thresholds + 1)
+            return np.cumsum(counts[::-1])[::-1][1:]
+
+        self.answered[curve_index] += count_from(answerable)
+        self.correct[curve_index] += count_from(answerable & (best == expected))
+        self.answered_negative[curve_index] += count_from(answerable & (expected < 0))
+
+    def _metrics(self, curve_index: int, threshold_index: int) -> Dict[str, float]:
+        answered = int(self.answered[curve_index, threshold_index])
+        correct = int(self.correct[curve_index, threshold_index])
+        negatives = self.queries - self.positives
+        precision = correct / answered if answered else 0.0
+        recall = correct / self.positives if self.positives else 0.0
+        return {
+            "threshold": round(float(self.thresholds[threshold_index]), 6),
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+            "no_match_rate": 1.0 - answered / self.queries if self.queries else 0.0,
+            "false_match_rate": int(self.answered_negative[curve_index, threshold_index]) / negatives if negatives else 0.0
+        }
+
+    def report(self, elapsed: float, full: bool = False) -> Dict[str, Any]:
+        """Best threshold of every curve by F1, the configured operating point and throughput"""
+        curves = []
+        for curve_index, curve in enumerate(self.curves):
+            table = [self._metrics(curve_index, t) for t in range(len(self.thresholds))]
+            entry = {"curve": curve.name, "method": curve.method, "individual_weight": curve.individual_weight,
+                     "best": max(table, key=lambda row: (row["f1"], row["precision"])) if table else None}
+            if full:
+                entry["sweep"] = table
+            curves.append(entry)
+
+        current_curve = next((i for i, curve in enumerate(self.curves)
+                              if curve.method == "hybrid" and curve.individual_weight == self.matcher.HYBRID_WEIGHT_INDIVIDUAL), None)
+        current_threshold = int(np.searchsorted(self.thresholds, self.matcher.threshold))
+        return {
+            "queries": self.queries,
+            "labeled_positive": self.positives,
+            "labeled_no_match": self.queries - self.positives,
+            "unknown_labels": self.unknown_labels,
+            "unknown_label_sample": list(self.unknown_label_sample),
+            "lexical_hits": self.lexical_hits,
+            "elapsed_seconds": elapsed,
+            "queries_per_second": self.queries / elapsed if elapsed > 0 else 0.0,
+            "seconds": dict(self.timings),
+            "current": {
+                "curve": self.curves[current_curve].name,
+                **self._metrics(current_curve, current_threshold)
+            } if current_curve is not None and self.queries else None,
+            "curves": curves
+        }
@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+from app.services.embedding_index import EmbeddingIndex
+from app.services.embedding_matrix import EmbeddingMatrix
+from app.services.encoders import namespace_dir
+from app.services.lexical_index import LexicalIndex
+from app.services.vector_index import IVFIndex, SearchParams
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock; writers are then only serialized in-process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentStore:
+    """
+    Versioned, memory-mapped snapshots of an ``EmbeddingIndex`` shared by worker processes.
+
+    Segments are immutable directories of ``.npy`` files; ``CURRENT`` names the
+    latest one and is written under the ``LOCK`` file lock.
+    """
+
+    CURRENT_FILE = "CURRENT"
+    LOCK_FILE = "LOCK"
+    META_FILE = "catalog.json"
+    LEXICAL_DIR = "lexical"
+    # Older segments kept around so a worker that just read CURRENT can still map them
+    KEEP_SEGMENTS = 3
+
+    def __init__(self, directory: str, model_name: str):
+        """
+        Args:
+            directory: Root directory of the shared segments
+            model_name: Encoder that produced the embeddings, used as namespace
+        """
+        self.model_name = model_name
+        self.path = namespace_dir(directory, model_name)
+        os.makedirs(self.path, exist_ok=True)
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file = None
+
+    @staticmethod
+    def sequence(name: Optional[str]) -> int:
+        return int(name.rsplit("-", 1)[1]) if name else 0
+
+    def current(self) -> Optional[str]:
+        """Name of the latest published segment, or None before the first publish"""
+        try:
+            with open(os.path.join(self.path, self.CURRENT_FILE), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive writer lock across processes; re-entrant within the process"""
+        with self._thread_lock:
+            self._lock_depth += 1
+            try:
+                if self._lock_depth == 1 and fcntl is not None:
+                    lock_file = open(os.path.join(self.path, self.LOCK_FILE), "a+")
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    except BaseException:
+                        lock_file.close()
+                        raise
+                    self._lock_file = lock_file
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def publish(self, index: EmbeddingIndex, search: Optional[SearchParams] = None) -> Tuple[str, EmbeddingIndex]:
+        """
+        Write ``index`` as the next segment, make it current and map it back
+
+        The returned index reads from the segment files, so the caller can drop
+        its private copy of the matrices. Every file is rewritten and fsynced,
+        so the cost grows with the catalog, not with the edit.
+        """
+        with self.lock():
+            sequence = max(self.sequence(self.current()) + 1, index.version)
+            name = f"seg-{sequence:08d}"
+            tmp_path = os.path.join(self.path, f".{name}.{os.getpid()}.tmp")
+            os.makedirs(tmp_path)
+            try:
+                self._write_segment(tmp_path, index, sequence)
+                os.rename(tmp_path, os.path.join(self.path, name))
+            except BaseException:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                raise
+            self._write_current(name)
+            self._prune(sequence)
+        logger.info(f"Segmento compartido publicado: {name} ({len(index)} audios, {index.total_descriptions} descripciones)")
+        return self.attach(name, search)
+
+    def attach(self, name: Optional[str] = None, search: Optional[SearchParams] = None) -> Optional[Tuple[str, EmbeddingIndex]]:
+        """Map a segment (the current one by default) read-only; None when nothing was published"""
+        name = name or self.current()
+        if name is None:
+            return None
+        path = os.path.join(self.path, name)
+        with open(os.path.join(path, self.META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        description_matrix = self._load_matrix(path, "descriptions")
+        combined_matrix = self._load_matrix(path, "combined")
+        index = EmbeddingIndex(
+            meta["audio_files"],
+            meta["descriptions"],
+            description_matrix,
+            self._load(path, "offsets.npy"),
+            combined_matrix,
+            search,
+            description_search=self._load_ivf(path, "descriptions", description_matrix, search),
+            combined_search=self._load_ivf(path, "combined", combined_matrix, search),
+            quantization=meta.get("quantization"),
+            version=meta["version"],
+            encoder=meta.get("encoder")
+        )
+        index.catalog_digest = meta.get("catalog_digest")
+        # Built once by the publisher; the postings are mapped like the matrices
+        index.lexical = LexicalIndex.load(os.path.join(path, self.LEXICAL_DIR), index.offsets)
+        return name, index
+
+    def _write_segment(self, path: str, index: EmbeddingIndex, sequence: int):
+        self._save_matrix(path, "descriptions", index.description_matrix)
+        self._save_matrix(path, "combined", index.combined_matrix)
+        self._save(path, "offsets.npy", index.offsets)
+        self._save_ivf(path, "descriptions", index.description_search)
+        self._save_ivf(path, "combined", index.combined_search)
+        if index.lexical is not None:
+            index.lexical.save(os.path.join(path, self.LEXICAL_DIR))
+        meta = {
+            "version": sequence,
+            "model": self.model_name,
+            "encoder": index.encoder,
+            "storage": index.storage,
+            "quantization": index.quantization,
+            "catalog_digest": index.catalog_digest,
+            "audio_files": index.audio_files,
+            "descriptions": index.descriptions
+        }
+        with open(os.path.join(path, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_current(self, name: str):
+        target = os.path.join(self.path, self.CURRENT_FILE)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+
+    def _prune(self, sequence: int):
+        # Mapped files stay readable after unlinking, so workers still on an old segment are unaffected
+        for entry in os.listdir(self.path):
+            if entry.startswith("seg-") and self.sequence(entry) <= sequence - self.KEEP_SEGMENTS:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+    @staticmethod
+    def _save(path: str, filename: str, array: np.ndarray):
+        with open(os.path.join(path, filename), "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _load(path: str, filename: str) -> np.ndarray:
+        return np.load(os.path.join(path, filename), mmap_mode="r")
+
+    def _save_matrix(self, path: str, name: str, matrix: EmbeddingMatrix):
+        self._save(path, f"{name}.npy", matrix.data)
+        if matrix.scales is not None:
+            self._save(path, f"{name}_scales.npy", matrix.scales)
+
+    def _load_matrix(self, path: str, name: str) -> EmbeddingMatrix:
+        scales_path = os.path.join(path, f"{name}_scales.npy")
+        scales = self._load(path, f"{name}_scales.npy") if os.path.exists(scales_path) else None
+        return EmbeddingMatrix(self._load(path, f"{name}.npy"), scales)
+
+    def _save_ivf(self, path: str, name: str, search: Optional[IVFIndex]):
+        if search is None:
+            return
+        sizes = np.array([len(ids) for ids in search.list_ids], dtype=np.int64)
+        bounds = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=bounds[1:])
+        ids = np.concatenate(search.list_ids) if search.list_ids else np.zeros(0, dtype=np.int64)
+        self._save(path, f"{name}_centroids.npy", search.centroids)
+        self._save(path, f"{name}_lists.npy", ids.astype(np.int64))
+        self._save(path, f"{name}_list_bounds.npy", bounds)
+
+    def _load_ivf(self,
+                  path: str,
+                  name: str,
+                  matrix: EmbeddingMatrix,
+                  search: Optional[SearchParams]) -> Optional[IVFIndex]:
+        # Without a stored IVF, or with another backend configured, EmbeddingIndex decides as usual
+        if not search or search.backend != "ivf" or not os.path.exists(os.path.join(path, f"{name}_centroids.npy")):
+            return None
+        ids = self._load(path, f"{name}_lists.npy")
+        bounds = self._load(path, f"{name}_list_bounds.npy")
+        list_ids: List[np.ndarray] = [ids[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+        return IVFIndex(matrix, np.asarray(self._load(path, f"{name}_centroids.npy")), list_ids, search.n_probe)
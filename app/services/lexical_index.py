@@ -0,0 +1,243 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+# Exact texts shared by several audios cannot answer a query on their own
+AMBIGUOUS = (-1, -1)
+
+
+def fold_text(text: str) -> str:
+    """
+    Lexical form of a text: case-folded, without accents or punctuation, single spaces
+
+    "¿Cuándo me pagan la nómina?" and "cuando me pagan la nomina" fold to the same text.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_NON_WORD.sub(" ", stripped).split())
+
+
+def text_terms(folded: str, ngram: int = 3) -> List[str]:
+    """Whole words plus the character n-grams of every word, so inflections and typos still overlap"""
+    terms: List[str] = []
+    for word in folded.split():
+        terms.append(f"={word}")
+        padded = f" {word} "
+        terms.extend(padded[i:i + ngram] for i in range(len(padded) - ngram + 1))
+    return terms
+
+
+class LexicalVocabulary:
+    """
+    Term ids and tokenized descriptions shared by consecutive ``LexicalIndex`` snapshots
+
+    Tokenizing is the slow part of a build, so every description is tokenized
+    once and reused until it leaves the catalog. Ids are only ever added, so an
+    older snapshot keeps resolving the ids it was built with.
+    """
+
+    def __init__(self, ngram: int = 3):
+        self.ngram = ngram
+        self.term_ids: Dict[str, int] = {}
+        # text -> (folded text, term ids, term frequencies, length in terms)
+        self._documents: Dict[str, Tuple[str, np.ndarray, np.ndarray, int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_terms(cls, terms: Sequence[str], ngram: int = 3) -> "LexicalVocabulary":
+        """Vocabulary whose term ids are the positions of ``terms``, as saved by ``LexicalIndex.save``"""
+        vocabulary = cls(ngram)
+        vocabulary.term_ids = {term: term_id for term_id, term in enumerate(terms)}
+        return vocabulary
+
+    def terms(self, count: int) -> List[str]:
+        """The first ``count`` terms, in id order"""
+        with self._lock:
+            return list(islice(self.term_ids, count))
+
+    def _term_counts(self, folded: str, add: bool) -> Tuple[np.ndarray, np.ndarray, int]:
+        terms = text_terms(folded, self.ngram)
+        counts = Counter(terms)
+        if add:
+            ids = [self.term_ids.setdefault(term, len(self.term_ids)) for term in counts]
+        else:
+            ids = [self.term_ids.get(term, -1) for term in counts]
+        return np.asarray(ids, dtype=np.int64), np.asarray(list(counts.values()), dtype=np.float32), len(terms)
+
+    def documents(self, texts: Sequence[str]) -> List[Tuple[str, np.ndarray, np.ndarray, int]]:
+        """Tokenized ``texts``; texts no longer passed are forgotten"""
+        with self._lock:
+            known = self._documents
+            documents: Dict[str, Tuple[str, np.ndarray, np.ndarray, int]] = {}
+            for text in texts:
+                if text not in documents:
+                    document = known.get(text)
+                    if document is None:
+                        folded = fold_text(text)
+                        document = (folded, *self._term_counts(folded, add=True))
+                    documents[text] = document
+            self._documents = documents
+            return [documents[text] for text in texts]
+
+    def query(self, folded: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Term ids (-1 when unknown) and frequencies of a folded query"""
+        ids, counts, _ = self._term_counts(folded, add=False)
+        return ids, counts
+
+
+class LexicalIndex:
+    """
+    Lexical view of one ``EmbeddingIndex`` snapshot
+
+    Exact lookup of folded descriptions, and BM25 scores over words and
+    character n-grams normalized to [0, 1].
+    """
+
+    K1 = 1.2
+    B = 0.75
+    ARRAYS = ("postings", "weights", "bounds", "idf")
+    META_FILE = "lexical.json"
+
+    def __init__(self, descriptions: Sequence[List[str]], offsets: np.ndarray, vocabulary: LexicalVocabulary):
+        """
+        Args:
+            descriptions: Description texts of every audio, in catalog order
+            offsets: Description row offsets of every audio, as in ``EmbeddingIndex``
+            vocabulary: Term ids and tokenized texts reused across snapshots
+        """
+        self.vocabulary = vocabulary
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        texts = [text for audio_texts in descriptions for text in audio_texts]
+        documents = vocabulary.documents(texts)
+
+        self.exact: Dict[str, Tuple[int, int]] = {}
+        owners = np.repeat(np.arange(len(descriptions)), np.diff(self.offsets)) if len(texts) else np.zeros(0, dtype=np.int64)
+        for row, (document, position) in enumerate(zip(documents, owners.tolist())):
+            known = self.exact.setdefault(document[0], (position, row))
+            if known[0] != position:
+                self.exact[document[0]] = AMBIGUOUS
+
+        counts = np.asarray([len(document[1]) for document in documents], dtype=np.int64)
+        lengths = np.asarray([document[3] for document in documents], dtype=np.float32)
+        self.n_documents = len(documents)
+        if self.n_documents and counts.sum():
+            term_ids = np.concatenate([document[1] for document in documents])
+            frequencies = np.concatenate([document[2] for document in documents])
+        else:
+            term_ids = np.zeros(0, dtype=np.int64)
+            frequencies = np.zeros(0, dtype=np.float32)
+        rows = np.repeat(np.arange(self.n_documents), counts)
+
+        average_length = float(lengths.mean()) if self.n_documents else 1.0
+        length_norm = self.K1 * (1.0 - self.B + self.B * lengths / max(average_length, 1e-9))
+        weights = frequencies * (self.K1 + 1.0) / (frequencies + length_norm[rows])
+
+        order = np.argsort(term_ids, kind="stable")
+        self.postings = rows[order].astype(np.int32)
+        self.weights = weights[order].astype(np.float32)
+        self.n_terms = len(vocabulary.term_ids)
+        self.bounds = np.searchsorted(term_ids[order], np.arange(self.n_terms + 1))
+        frequencies_per_term = np.diff(self.bounds)
+        self.idf = self._idf(frequencies_per_term).astype(np.float32)
+        self.unknown_idf = float(self._idf(np.zeros(1))[0])
+        self._index_audios()
+
+    def _index_audios(self):
+        non_empty = np.diff(self.offsets) > 0
+        self._non_empty = non_empty
+        self._segment_starts = self.offsets[:-1][non_empty]
+
+    def save(self, path: str):
+        """Write the index to the directory ``path``: postings as ``.npy`` arrays, terms and exact texts as JSON"""
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            with open(os.path.join(path, f"{name}.npy"), "wb") as f:
+                np.save(f, np.ascontiguousarray(getattr(self, name)))
+                f.flush()
+                os.fsync(f.fileno())
+        meta = {
+            "ngram": self.vocabulary.ngram,
+            "n_documents": self.n_documents,
+            "unknown_idf": self.unknown_idf,
+            "terms": self.vocabulary.terms(self.n_terms),
+            "exact": [[text, position, row] for text, (position, row) in self.exact.items()]
+        }
+        with open(os.path.join(path, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @classmethod
+    def load(cls, path: str, offsets: np.ndarray) -> Optional["LexicalIndex"]:
+        """
+        Map an index written by ``save`` read-only; None when ``path`` holds none
+
+        Args:
+            path: Directory the index was saved to
+            offsets: Description row offsets of the snapshot it was built for
+        """
+        try:
+            with open(os.path.join(path, cls.META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        index = cls.__new__(cls)
+        index.vocabulary = LexicalVocabulary.from_terms(meta["terms"], meta["ngram"])
+        index.offsets = np.asarray(offsets, dtype=np.int64)
+        index.exact = {text: (position, row) for text, position, row in meta["exact"]}
+        index.n_documents = meta["n_documents"]
+        index.n_terms = len(meta["terms"])
+        index.unknown_idf = meta["unknown_idf"]
+        for name in cls.ARRAYS:
+            setattr(index, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+        index._index_audios()
+        return index
+
+    def _idf(self, document_frequency: np.ndarray) -> np.ndarray:
+        return np.log1p((self.n_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def lookup(self, query: str) -> Optional[Tuple[int, int]]:
+        """Audio position and description row whose text equals ``query`` once folded, if only one audio has it"""
+        hit = self.exact.get(fold_text(query))
+        return None if hit is None or hit == AMBIGUOUS else hit
+
+    def score(self, query: str) -> np.ndarray:
+        """Normalized BM25 score of ``query`` against every description"""
+        scores = np.zeros(self.n_documents, dtype=np.float32)
+        ids, frequencies = self.vocabulary.query(fold_text(query))
+        ideal = 0.0
+        for term_id, frequency in zip(ids.tolist(), frequencies.tolist()):
+            if 0 <= term_id < self.n_terms:
+                idf = float(self.idf[term_id])
+                start, stop = self.bounds[term_id], self.bounds[term_id + 1]
+                # A description appears once in the postings of a term, so plain fancy indexing accumulates correctly
+                scores[self.postings[start:stop]] += idf * frequency * self.weights[start:stop]
+            else:
+                idf = self.unknown_idf
+            ideal += idf * frequency
+        if ideal > 0.0:
+            scores /= ideal
+        return np.minimum(scores, 1.0, out=scores)
+
+    def audio_scores(self, description_scores: np.ndarray) -> np.ndarray:
+        """Best description score of every audio"""
+        audio_scores = np.zeros(len(self.offsets) - 1, dtype=np.float32)
+        if len(self._segment_starts):
+            audio_scores[self._non_empty] = np.maximum.reduceat(description_scores, self._segment_starts)
+        return audio_scores
+
+    def get_stats(self) -> Dict:
+        return {
+            "exact_texts": sum(1 for hit in self.exact.values() if hit != AMBIGUOUS),
+            "terms": self.n_terms,
+            "postings": int(len(self.postings)),
+            "memory_mb": round((self.postings.nbytes + self.weights.nbytes + self.bounds.nbytes + self.idf.nbytes) / 2**20, 3)
+        }
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Union
+
+from app.models.enums import MatchingMethod
+from app.services.audio_matcher import AudioMatcher
+from app.services.query_batcher import QueryBatcher
+
+logger = logging.getLogger(__name__)
+
+_worker_matcher: Optional[AudioMatcher] = None
+
+
+def _init_process_worker(audio_base_path: str):
+    global _worker_matcher
+    _worker_matcher = AudioMatcher(audio_base_path)
+
+
+def _process_find_best_match(query: str,
+                             method: Union[MatchingMethod, str],
+                             top_k: Optional[int],
+                             threshold: float) -> Dict[str, any]:
+    _worker_matcher.threshold = threshold
+    return _worker_matcher.find_best_match(query, method, top_k)
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when the matcher queue is full and the request must be rejected"""
+
+
+class MatcherExecutor:
+    """
+    Runs matcher inference outside the asyncio event loop.
+
+    At most ``max_queue`` queries are in flight; further submissions raise
+    ``ExecutorOverloaded``.
+    """
+
+    MODES = ("thread", "process")
+
+    def __init__(self,
+                 matcher: AudioMatcher,
+                 mode: str = "thread",
+                 workers: int = 4,
+                 max_queue: int = 64,
+                 timeout: float = 10.0,
+                 batcher: Optional[QueryBatcher] = None,
+                 audio_base_path: str = "audio_base.json"):
+        """
+        Args:
+            matcher: In-process matcher
+            mode: "thread" or "process"
+            workers: Number of pool workers
+            max_queue: Maximum number of queries running or waiting
+            timeout: Per-request timeout in seconds
+            batcher: Optional micro-batcher used instead of the thread pool
+            audio_base_path: Catalog loaded by process workers
+
+        Raises:
+            ValueError: Unknown mode, or process mode while ``matcher`` has no shared index
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown executor mode: {mode}. Valid options: {list(self.MODES)}")
+        if mode == "process" and matcher.segments is None:
+            # Each worker would serve the catalog it loaded at startup and never see admin edits
+            raise ValueError("EXECUTOR_MODE=process needs SHARED_INDEX_DIR so catalog edits reach the worker processes")
+
+        self.matcher = matcher
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.timeout = timeout
+        self.batcher = batcher if mode == "thread" else None
+        if batcher and mode == "process":
+            logger.warning("Query batching is not available in process mode and will be ignored")
+
+        self._pool: Executor
+        if mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_worker,
+                initargs=(audio_base_path,)
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="matcher")
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.max_queue:
+                self._rejected += 1
+                raise ExecutorOverloaded(f"Matcher queue is full ({self.max_queue} requests in flight)")
+            self._in_flight += 1
+
+    def _release(self, _future: Future):
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def _submit(self, query: str, method: Union[MatchingMethod, str], top_k: Optional[int]) -> Future:
+        if self.batcher:
+            return self.batcher.submit(query, method, top_k)
+        if self.mode == "process":
+            return self._pool.submit(_process_find_best_match, query, method, top_k, self.matcher.threshold)
+        return self._pool.submit(self.matcher.find_best_match, query, method, top_k)
+
+    async def find_best_match(self,
+                              query: str,
+                              method: Union[MatchingMethod, str] = MatchingMethod.HYBRID,
+                              top_k: Optional[int] = None) -> Dict[str, any]:
+        """
+        Run ``find_best_match`` off the event loop
+
+        Raises:
+            ExecutorOverloaded: The queue is full
+            asyncio.TimeoutError: The query did not finish within ``timeout`` seconds
+        """
+        self._acquire()
+        try:
+            future = self._submit(query, method, top_k)
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is freed when the work really finishes, not when the caller gives up
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "timeout_seconds": self.timeout,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts
+            }
@@ -0,0 +1,225 @@
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from app.config.settings import Config
+
+# Latency buckets in seconds, from sub-millisecond pydantic validation to slow encoder calls
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    TYPE = "untyped"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, label_names: Sequence[str]):
+        self._registry = registry
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, label_values: Sequence[str]) -> Tuple[str, ...]:
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {list(self.label_names)}")
+        return tuple(label_values)
+
+    def _labels(self, key: Tuple[str, ...], **extra: str) -> Dict[str, str]:
+        labels = dict(zip(self.label_names, key))
+        labels.update(extra)
+        return labels
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter with labels"""
+
+    TYPE = "counter"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help_text: str, label_names: Sequence[str] = ()):
+        super().__init__(registry, name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        if not self._registry.enabled:
+            return
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(label_values), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self._labels(key))} {_format_value(v)}" for key, v in values]
+
+
+class Histogram(_Metric):
+    """
+    Cumulative histogram with fixed buckets, as Prometheus expects
+
+    Observations only bump one bucket count under a lock; buckets are made
+    cumulative when rendered.
+    """
+
+    TYPE = "histogram"
+
+    def __init__(self,
+                 registry: "MetricsRegistry",
+                 name: str,
+                 help_text: str,
+                 label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., count above the last bucket], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        if not self._registry.enabled:
+            return
+        key = self._key(label_values)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][slot] += 1
+            series[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(label_values))
+            return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        lines = self.header()
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self._labels(key, le=_format_value(bound)))} {cumulative}")
+            labels = _format_labels(self._labels(key))
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text exposition format
+
+    Counters and histograms are updated where the work happens. Values that
+    already live elsewhere (catalog size, cache counters, queue depth) are read
+    by collectors when the metrics are scraped, so they cost nothing per request.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(self, name, help_text, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self,
+                  name: str,
+                  help_text: str,
+                  label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(self, name, help_text, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]):
+        """
+        Add a function called on every scrape
+
+        It yields ``(name, type, help, samples)`` tuples, where ``samples`` is a
+        list of ``(labels, value)`` pairs.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, metric_type, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry(enabled=Config.METRICS_ENABLED)
+
+STAGE_SECONDS = registry.histogram(
+    "audio_matcher_stage_seconds",
+    "Time spent per query in each stage of the matching pipeline",
+    ("stage", "method")
+)
+REQUEST_SECONDS = registry.histogram(
+    "audio_matcher_request_seconds",
+    "End-to-end latency of /api/process",
+    ("method",)
+)
+REQUESTS = registry.counter(
+    "audio_matcher_requests_total",
+    "Queries received by /api/process",
+    ("method",)
+)
+NO_MATCHES = registry.counter(
+    "audio_matcher_no_matches_total",
+    "Queries answered without a match above the threshold",
+    ("method",)
+)
+LEXICAL_HITS = registry.counter(
+    "audio_matcher_lexical_hits_total",
+    "Queries answered by an exact description match, without encoding",
+    ("method",)
+)
+CATALOG_RELOADS = registry.counter(
+    "audio_matcher_catalog_reloads_total",
+    "Reloads of the audio base file, by what triggered them and their outcome",
+    ("trigger", "status")
+)
+ERRORS = registry.counter(
+    "audio_matcher_errors_total",
+    "Queries that failed, by reason",
+    ("method", "reason")
+)
+
@@ -0,0 +1,134 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from app.models.enums import MatchingMethod
+from app.services.audio_matcher import AudioMatcher
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingQuery(NamedTuple):
+    query: str
+    method: Union[MatchingMethod, str]
+    top_k: Optional[int]
+    future: Future
+
+
+class QueryBatcher:
+    """
+    Coalesces concurrent queries in front of ``AudioMatcher.find_best_matches``.
+
+    A single worker thread waits for the first query, then keeps collecting until
+    ``max_wait_ms`` has passed or ``max_batch_size`` queries are pending, and runs
+    the whole batch through one encoder call and one scoring pass.
+    """
+
+    def __init__(self, matcher: AudioMatcher, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Args:
+            matcher: Matcher used to score the batches
+            max_batch_size: Maximum number of queries per batch
+            max_wait_ms: Maximum time the first query of a batch waits for company
+        """
+        self.matcher = matcher
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue[_PendingQuery]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="query-batcher", daemon=True)
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._queries = 0
+        self._max_observed = 0
+        self._size_histogram: Dict[int, int] = {}
+
+    def start(self):
+        self._thread.start()
+        logger.info(f"Query batching enabled (max batch {self.max_batch_size}, max wait {self.max_wait * 1000:.1f} ms)")
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def submit(self,
+               query: str,
+               method: Union[MatchingMethod, str] = MatchingMethod.HYBRID,
+               top_k: Optional[int] = None) -> Future:
+        """Queue a query; the returned future resolves to the same dict ``find_best_match`` returns"""
+        future: Future = Future()
+        self._queue.put(_PendingQuery(query, method, top_k, future))
+        return future
+
+    def _collect(self) -> List[_PendingQuery]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Callers that already timed out cancelled their futures; skip them
+            batch = [item for item in self._collect() if item.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            self._record(len(batch))
+            try:
+                results = self.matcher.find_best_matches(
+                    [item.query for item in batch],
+                    [item.method for item in batch],
+                    [item.top_k for item in batch]
+                )
+            except Exception as e:
+                logger.error(f"Error processing query batch: {e}")
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+
+            for item, result in zip(batch, results):
+                item.future.set_result(result)
+
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            item.future.set_exception(RuntimeError("Query batcher stopped"))
+
+    def _record(self, size: int):
+        with self._stats_lock:
+            self._batches += 1
+            self._queries += size
+            self._max_observed = max(self._max_observed, size)
+            self._size_histogram[size] = self._size_histogram.get(size, 0) + 1
+
+    def get_stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self._batches,
+                "queries": self._queries,
+                "mean_batch_size": self._queries / self._batches if self._batches else 0.0,
+                "max_observed_batch_size": self._max_observed,
+                "batch_size_histogram": dict(sorted(self._size_histogram.items())),
+                "queue_depth": self._queue.qsize()
+            }
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+def normalize_query(query: str, lowercase: bool = False) -> str:
+    """
+    Cache key of a query: trimmed and with collapsed whitespace, lower-cased with ``lowercase``.
+
+    Only encoders whose tokenizer lower-cases its input (``encoders.is_uncased``)
+    give "Hello" and "hello" the same embedding, so only they may share a key.
+    """
+    return " ".join((query.lower() if lowercase else query).split())
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional time-to-live and hit/miss counters"""
+
+    def __init__(self, max_size: int, ttl_seconds: float = 0.0):
+        """
+        Args:
+            max_size: Maximum number of entries; 0 disables the cache
+            ttl_seconds: Lifetime of an entry; 0 keeps entries until evicted
+        """
+        self.max_size = max(0, max_size)
+        self.ttl = max(0.0, ttl_seconds)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.max_size:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if not expires_at or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any):
+        if not self.max_size:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,52 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from app.models.enums import StartupPhase
+
+
+class StartupTracker:
+    """Thread-safe record of the matcher startup phase, for the readiness endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phase = StartupPhase.PENDING
+        self.progress = 0.0
+        self.error: Optional[str] = None
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def update(self, phase: StartupPhase, progress: float = 0.0):
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = time.monotonic()
+            self.phase = phase
+            self.progress = min(max(progress, 0.0), 1.0)
+            if phase in (StartupPhase.READY, StartupPhase.FAILED):
+                self._finished_at = time.monotonic()
+
+    def fail(self, error: Exception):
+        with self._lock:
+            self.error = str(error)
+        self.update(StartupPhase.FAILED)
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == StartupPhase.READY
+
+    @property
+    def in_progress(self) -> bool:
+        return self.phase not in (StartupPhase.READY, StartupPhase.FAILED)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            elapsed = 0.0
+            if self._started_at is not None:
+                elapsed = (self._finished_at or time.monotonic()) - self._started_at
+            return {
+                "ready": self.phase == StartupPhase.READY,
+                "phase": self.phase.value,
+                "progress": self.progress,
+                "elapsed_seconds": elapsed,
+                "error": self.error
+            }
@@ -0,0 +1,171 @@
+import logging
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SearchParams(NamedTuple):
+    """
+    Search backend of an ``EmbeddingIndex``
+
+    ``exact`` scans every vector. ``ivf`` partitions the vectors with spherical
+    k-means and only scans the ``n_probe`` closest lists, then the matcher rescores
+    the audios owning the best ``candidates`` vectors exactly.
+    """
+    backend: str = "exact"
+    n_lists: int = 0          # 0 picks ~sqrt(n) lists
+    n_probe: int = 8
+    candidates: int = 100
+    min_vectors: int = 10000  # smaller matrices are always scanned exactly
+
+
+BACKENDS = ("exact", "ivf")
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the ``k`` highest scores, best first, without sorting everything"""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class IVFIndex:
+    """
+    Inverted-file index over the rows of a unit-normalized matrix.
+
+    Only row ids are stored per list; vectors are read from the referenced matrix
+    (an ``EmbeddingMatrix`` dequantizes them on read), so the index adds a few
+    bytes per row. Instances are immutable: ``spliced`` and ``rebuilt`` return
+    new indexes that share the centroids.
+    """
+
+    def __init__(self, matrix: np.ndarray, centroids: np.ndarray, list_ids: List[np.ndarray], n_probe: int):
+        self.matrix = matrix
+        self.centroids = centroids
+        self.list_ids = list_ids
+        self.n_probe = max(1, min(n_probe, len(centroids)))
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, n_lists: int = 0, n_probe: int = 8,
+              iterations: int = 10, sample_per_list: int = 256, seed: int = 0) -> "IVFIndex":
+        """
+        Cluster the rows of ``matrix`` and build the inverted lists
+
+        Args:
+            matrix: (n, dim) unit-normalized vectors
+            n_lists: Number of clusters; 0 picks ~sqrt(n)
+            n_probe: Lists scanned per query
+            iterations: Spherical k-means iterations
+            sample_per_list: Training sample size per cluster
+            seed: Random seed, for reproducible builds
+        """
+        n = len(matrix)
+        n_lists = n_lists or int(np.sqrt(n))
+        n_lists = max(1, min(n_lists, n))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(n, n_lists * sample_per_list)
+        sample = matrix[np.sort(rng.choice(n, sample_size, replace=False))] if sample_size < n else matrix[:]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0.0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        index = cls(matrix, centroids, [], n_probe)
+        return index.rebuilt(matrix)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            labels[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return labels
+
+    @staticmethod
+    def _group(ids: np.ndarray, labels: np.ndarray, n_lists: int) -> List[np.ndarray]:
+        order = np.argsort(labels, kind="stable")
+        bounds = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=bounds[1:])
+        sorted_ids = ids[order]
+        return [sorted_ids[bounds[i]:bounds[i + 1]] for i in range(n_lists)]
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def rebuilt(self, matrix: np.ndarray) -> "IVFIndex":
+        """Reassign every row of ``matrix`` to the existing centroids"""
+        labels = self._assign(matrix, self.centroids)
+        ids = np.arange(len(matrix), dtype=np.int64)
+        return IVFIndex(matrix, self.centroids, self._group(ids, labels, len(self.centroids)), self.n_probe)
+
+    def spliced(self, matrix: np.ndarray, start: int, stop: int, inserted: int) -> "IVFIndex":
+        """
+        Index for ``matrix``, where rows ``start:stop`` of the indexed matrix were
+        replaced by ``inserted`` rows
+
+        Surviving ids are shifted instead of reassigned, so only the inserted rows
+        are compared against the centroids.
+        """
+        shift = inserted - (stop - start)
+        list_ids = []
+        for ids in self.list_ids:
+            ids = ids[(ids < start) | (ids >= stop)]
+            list_ids.append(np.where(ids >= stop, ids + shift, ids))
+
+        if inserted:
+            new_ids = np.arange(start, start + inserted, dtype=np.int64)
+            labels = self._assign(matrix[start:start + inserted], self.centroids)
+            for label, ids in enumerate(self._group(new_ids, labels, len(self.centroids))):
+                if len(ids):
+                    list_ids[label] = np.concatenate([list_ids[label], ids])
+        return IVFIndex(matrix, self.centroids, list_ids, self.n_probe)
+
+    def without_rows(self, matrix: np.ndarray, keep: np.ndarray) -> "IVFIndex":
+        """Index for ``matrix``, the indexed matrix restricted to the rows where ``keep`` is set"""
+        new_ids = np.cumsum(keep, dtype=np.int64) - 1
+        list_ids = [new_ids[ids[keep[ids]]] for ids in self.list_ids]
+        return IVFIndex(matrix, self.centroids, list_ids, self.n_probe)
+
+    def search(self, queries: np.ndarray, k: int) -> List[np.ndarray]:
+        """Row ids of the (approximately) ``k`` best rows for each unit-normalized query"""
+        centroid_scores = queries @ self.centroids.T
+        results: List[np.ndarray] = []
+        for query, scores in zip(queries, centroid_scores):
+            probed = top_k(scores, self.n_probe)
+            ids = np.concatenate([self.list_ids[label] for label in probed])
+            if not len(ids):
+                results.append(ids)
+                continue
+            candidate_scores = self.matrix[ids] @ query
+            results.append(ids[top_k(candidate_scores, k)])
+        return results
+
+    def get_stats(self) -> Dict:
+        sizes = [len(ids) for ids in self.list_ids]
+        return {
+            "n_lists": len(self.centroids),
+            "n_probe": self.n_probe,
+            "largest_list": max(sizes) if sizes else 0
+        }
+
+
+def build_search_index(matrix: np.ndarray, params: Optional[SearchParams]) -> Optional[IVFIndex]:
+    """Approximate index for ``matrix``, or None when it should be scanned exactly"""
+    if not params or params.backend == "exact" or len(matrix) < max(1, params.min_vectors):
+        return None
+    if params.backend != "ivf":
+        raise ValueError(f"Unknown index backend: {params.backend}. Valid options: {list(BACKENDS)}")
+    logger.info(f"Training IVF index over {len(matrix)} vectors...")
+    return IVFIndex.train(matrix, params.n_lists, params.n_probe)
@@ -0,0 +1,301 @@
+"""
+Reproducible performance benchmark for AudioMatcher.
+
+Runs the matcher against synthetic catalogs with a deterministic offline encoder,
+so no network or model download is needed, and writes the results as JSON:
+
+    python -m benchmarks.run --sizes 10,1000,100000 --output bench_results.json
+
+Sizes are numbers of descriptions. Compare two result files to spot regressions
+between commits. ``--encoder`` benchmarks a real encoder backend instead, to
+compare their throughput, latency and accuracy on the same catalog:
+
+    python -m benchmarks.run --encoder onnx --encoder-threads 4 --output onnx.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.config.settings import Config
+from app.models.enums import MatchingMethod
+from app.services.audio_matcher import AudioMatcher
+from app.services.embedding_index import EmbeddingIndex
+from app.services.encoders import ENCODER_BACKENDS, encoder_name, load_encoder
+
+SYLLABLES = [
+    "ba", "be", "bi", "bo", "ca", "ce", "ci", "co", "da", "de", "di", "do", "fa", "fe",
+    "ga", "go", "la", "le", "li", "lo", "ma", "me", "mi", "mo", "na", "ne", "ni", "no",
+    "pa", "pe", "pi", "po", "ra", "re", "ri", "ro", "sa", "se", "si", "so", "ta", "te"
+]
+FILLER = ["cómo", "dónde", "cuándo", "necesito", "solicitar", "para", "del", "de", "la", "el", "mi", "trabajo"]
+
+
+def synthetic_catalog(n_descriptions: int, per_audio: int, n_queries: int, seed: int = 0
+                      ) -> Tuple[Dict[str, List[str]], List[Tuple[str, str]]]:
+    """
+    Deterministic catalog of about ``n_descriptions`` descriptions plus labeled queries
+
+    Every audio has a few topic words; its descriptions mix topic words with common
+    filler words. Queries are descriptions with one word replaced by filler.
+    """
+    rng = random.Random(seed)
+    n_audios = max(1, n_descriptions // per_audio)
+    vocabulary_size = max(1000, n_audios * 2)
+    vocabulary = set()
+    while len(vocabulary) < vocabulary_size:
+        vocabulary.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    vocabulary = sorted(vocabulary)
+
+    catalog: Dict[str, List[str]] = {}
+    remaining = n_descriptions
+    for i in range(n_audios):
+        count = per_audio if i < n_audios - 1 else max(1, remaining)
+        topic = rng.sample(vocabulary, 4)
+        descriptions = []
+        for _ in range(count):
+            words = rng.sample(topic, rng.randint(2, 3)) + rng.sample(FILLER, 2)
+            rng.shuffle(words)
+            descriptions.append(" ".join(words))
+        catalog[f"audio_{i:07d}.ogg"] = descriptions
+        remaining -= count
+
+    audio_files = list(catalog.keys())
+    queries: List[Tuple[str, str]] = []
+    for _ in range(n_queries):
+        audio_file = rng.choice(audio_files)
+        words = rng.choice(catalog[audio_file]).split()
+        words[rng.randrange(len(words))] = rng.choice(FILLER)
+        queries.append((" ".join(words), audio_file))
+    return catalog, queries
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples_ms)
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p90_ms": float(np.percentile(values, 90)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max())
+    }
+
+
+def measure_methods(matcher: AudioMatcher, queries: List[Tuple[str, str]], warmup: int = 5) -> Dict[str, Dict]:
+    results = {}
+    for method in MatchingMethod:
+        for text, _ in queries[:warmup]:
+            matcher.find_best_match(text, method)
+
+        samples: List[float] = []
+        correct = 0
+        for text, expected in queries:
+            start = time.perf_counter()
+            result = matcher.find_best_match(text, method)
+            samples.append((time.perf_counter() - start) * 1000)
+            candidate = result["response"] if result["response"] != Config.NO_MATCH_RESPONSE else result["best_candidate"]
+            correct += candidate == expected
+
+        results[method.value] = {**percentiles(samples), "top1_accuracy": correct / len(queries)}
+    return results
+
+
+def measure_encoder(encoder, queries: List[Tuple[str, str]], batch_size: int, warmup: int = 5) -> Dict[str, float]:
+    """Single-query encode latency and batched encode throughput, outside the matcher"""
+    texts = [text for text, _ in queries]
+    encoder.encode(texts[:warmup], batch_size=batch_size)
+
+    samples: List[float] = []
+    for text in texts:
+        start = time.perf_counter()
+        encoder.encode([text], batch_size=1)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    encoder.encode(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    return {**percentiles(samples), "batch_size": batch_size, "batch_texts_per_second": len(texts) / elapsed}
+
+
+def measure_index_build(matcher: AudioMatcher) -> Tuple[float, float]:
+    """Time and peak traced memory (MB) to assemble the index from already computed embeddings"""
+    index = matcher.index
+    individual = np.split(index.description_matrix.to_float32(), index.offsets[1:-1])
+    combined = list(index.combined_matrix.to_float32())
+
+    start = time.perf_counter()
+    EmbeddingIndex.build(index.audio_files, index.descriptions, individual, combined, matcher._search_params(), index.storage)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    EmbeddingIndex.build(index.audio_files, index.descriptions, individual, combined, matcher._search_params(), index.storage)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def index_memory_mb(index: EmbeddingIndex) -> float:
+    return index.memory_bytes / 2**20
+
+
+def measure_http(matcher: AudioMatcher, audio_base_path: str, queries: List[Tuple[str, str]],
+                 requests: int, concurrency: int) -> Dict[str, float]:
+    """Throughput of /api/process through the FastAPI app, in-process (no network)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    import app.routes.api as api
+
+    api.matcher = matcher
+    api.initialize_matcher(audio_base_path)
+    try:
+        with TestClient(app) as client:
+            payloads = [{"text": queries[i % len(queries)][0], "method": "hybrid"} for i in range(requests)]
+
+            def post(payload):
+                start = time.perf_counter()
+                response = client.post("/api/process", json=payload)
+                return response.status_code, (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outcomes = list(pool.map(post, payloads))
+            elapsed = time.perf_counter() - start
+    finally:
+        api.shutdown_matcher()
+        api.matcher = None
+
+    ok = sum(1 for status, _ in outcomes if status == 200)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "successful": ok,
+        "throughput_rps": requests / elapsed,
+        **percentiles([latency for _, latency in outcomes])
+    }
+
+
+def run_size(n_descriptions: int, args: argparse.Namespace, encoder) -> Dict:
+    catalog, queries = synthetic_catalog(n_descriptions, args.descriptions_per_audio, args.queries, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        audio_base_path = os.path.join(tmp_dir, "audio_base.json")
+        with open(audio_base_path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f, ensure_ascii=False)
+        del catalog
+        if Config.EMBEDDING_STORAGE != "float32":
+            # Full-precision rescoring reads float32 vectors from the embedding cache
+            Config.EMBEDDING_CACHE_DIR = os.path.join(tmp_dir, "embedding_cache")
+
+        start = time.perf_counter()
+        matcher = AudioMatcher(audio_base_path, model=encoder)
+        startup_seconds = time.perf_counter() - start
+        build_seconds, build_peak_mb = measure_index_build(matcher)
+
+        result = {
+            "descriptions": matcher.index.total_descriptions,
+            "audios": len(matcher.index),
+            "startup_seconds": startup_seconds,
+            "index_build_seconds": build_seconds,
+            "index_build_peak_memory_mb": build_peak_mb,
+            "index_memory_mb": index_memory_mb(matcher.index),
+            "index": matcher.index.get_stats(),
+            "encoder": measure_encoder(encoder, queries, Config.ENCODE_BATCH_SIZE),
+            "methods": measure_methods(matcher, queries)
+        }
+        if args.http_requests:
+            result["http"] = measure_http(matcher, audio_base_path, queries, args.http_requests, args.concurrency)
+
+    result["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AudioMatcher performance benchmark")
+    parser.add_argument("--sizes", default="10,1000,10000,100000",
+                        help="Comma-separated catalog sizes, in descriptions (up to 1000000)")
+    parser.add_argument("--descriptions-per-audio", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=200, help="Queries timed per method")
+    parser.add_argument("--http-requests", type=int, default=500, help="Requests sent to /api/process; 0 skips it")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent HTTP clients")
+    parser.add_argument("--encoder", choices=ENCODER_BACKENDS, default="hashing",
+                        help="Encoder backend; hashing needs no model download")
+    parser.add_argument("--encoder-threads", type=int, default=Config.ENCODER_THREADS,
+                        help="Inference threads of the encoder; 0 keeps the backend default")
+    parser.add_argument("--dimension", type=int, default=384, help="Hashing encoder embedding dimension")
+    parser.add_argument("--index-backend", default=Config.INDEX_BACKEND, help="exact or ivf")
+    parser.add_argument("--storage", default=Config.EMBEDDING_STORAGE, help="float32, float16 or int8")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    # The app configures INFO logging on import; keep per-request logs out of the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # Measure the matcher itself: no persistent embedding cache, no query caches
+    Config.EMBEDDING_CACHE_DIR = ""
+    # Synthetic catalogs have no audio files
+    Config.AUDIO_DIR = ""
+    Config.QUERY_CACHE_SIZE = 0
+    Config.RESULT_CACHE = False
+    Config.DEBUG_MODE = False
+    Config.INDEX_BACKEND = args.index_backend
+    Config.EMBEDDING_STORAGE = args.storage
+    Config.BACKGROUND_STARTUP = False
+
+    Config.HASHING_DIMENSION = args.dimension
+    Config.ENCODER_THREADS = args.encoder_threads
+    encoder = load_encoder(args.encoder)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "encoder": encoder_name(encoder),
+            "args": vars(args)
+        },
+        "results": []
+    }
+
+    for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+        print(f"Benchmarking {size} descriptions...", flush=True)
+        result = run_size(size, args, encoder)
+        report["results"].append(result)
+        methods = ", ".join(f"{name} p50 {stats['p50_ms']:.2f} ms" for name, stats in result["methods"].items())
+        print(f"  startup {result['startup_seconds']:.2f} s, index build {result['index_build_seconds']:.3f} s, {methods}")
+        print(f"  encode p50 {result['encoder']['p50_ms']:.2f} ms, "
+              f"{result['encoder']['batch_texts_per_second']:.0f} texts/s batched")
+        if "http" in result:
+            print(f"  /api/process {result['http']['throughput_rps']:.0f} req/s")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
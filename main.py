@@ -2,9 +2,15 @@ import uvicorn
 from app.config.settings import Config
 
 if __name__ == "__main__":
+    if Config.WORKERS > 1 and Config.SHARED_INDEX_DIR:
+        # Build the index once; every worker maps the published segment instead of encoding the catalog again
+        from app.services.audio_matcher import AudioMatcher
+        AudioMatcher(attach=False).close()
+    
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=Config.PORT,
-        reload=Config.DEBUG_MODE
+        reload=Config.DEBUG_MODE,
+        workers=Config.WORKERS
     )
\ No newline at end of file
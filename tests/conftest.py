@@ -0,0 +1,57 @@
+import json
+from typing import Optional
+
+import pytest
+
+from app.config.settings import Config
+from app.services.audio_matcher import AudioMatcher
+
+CATALOG = {
+    "horario_trabajo.ogg": ["horario de oficina", "a qué hora abren"],
+    "nomina_salario.ogg": ["cuándo me pagan el salario", "fecha de pago de la nómina"],
+    "vacaciones.ogg": ["cuántos días de vacaciones tengo"]
+}
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """Hashing encoder without cache, shared index, audio files or background threads, run from ``tmp_path`` over CATALOG"""
+    settings = {
+        "ENCODER_BACKEND": "hashing",
+        "BACKGROUND_STARTUP": False,
+        "EMBEDDING_CACHE_DIR": "",
+        "SHARED_INDEX_DIR": "",
+        "AUDIO_DIR": "",
+        "PERSIST_CATALOG": False,
+        "CATALOG_WATCH_SECONDS": 0,
+        "QUERY_BATCHING": False,
+        "EXECUTOR_MODE": "thread",
+        "DEBUG_MODE": False
+    }
+    for name, value in settings.items():
+        monkeypatch.setattr(Config, name, value)
+    write_catalog(tmp_path / "audio_base.json", CATALOG)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def write_catalog(path, catalog: dict):
+    path.write_text(json.dumps(catalog, ensure_ascii=False), encoding="utf-8")
+
+
+@pytest.fixture
+def make_matcher(offline):
+    """Build matchers over ``catalog``, CATALOG by default; closed on teardown"""
+    matchers = []
+
+    def make(catalog: Optional[dict] = None, **kwargs) -> AudioMatcher:
+        path = offline / "audio_base.json"
+        if catalog is not None:
+            write_catalog(path, catalog)
+        matcher = AudioMatcher(str(path), **kwargs)
+        matchers.append(matcher)
+        return matcher
+
+    yield make
+    for matcher in matchers:
+        matcher.close()
@@ -0,0 +1,45 @@
+import pytest
+
+from app.services.audio_files import parse_range
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 100)),
+    ("bytes=100-100", (100, 101)),
+    ("bytes=900-5000", (900, SIZE)),    # last byte past the end is clamped
+    ("bytes=500-", (500, SIZE)),        # open-ended
+    ("bytes=999-", (999, SIZE)),
+    ("bytes=-200", (800, SIZE)),        # suffix
+    ("bytes=-5000", (0, SIZE)),         # suffix longer than the file
+    ("BYTES = 10-19", (10, 20))
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", SIZE),
+    ("bytes=1000-2000", SIZE),
+    ("bytes=20-10", SIZE),
+    ("bytes=-0", SIZE),
+    ("bytes=0-", 0),
+    ("bytes=-10", 0)
+])
+def test_unsatisfiable_ranges_raise(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
+
+
+@pytest.mark.parametrize("header", [
+    "items=0-10",
+    "bytes=0-10,20-30",
+    "bytes=abc-",
+    "bytes=1-x",
+    "bytes=-",
+    "bytes=10",
+    ""
+])
+def test_ignored_headers_return_none(header):
+    assert parse_range(header, SIZE) is None
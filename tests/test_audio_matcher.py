@@ -0,0 +1,170 @@
+import numpy as np
+import pytest
+
+from app.config.settings import Config
+from app.models.enums import MatchingMethod
+from app.services.embedding_index import normalize_rows
+from benchmarks.run import synthetic_catalog
+
+
+@pytest.mark.parametrize("method", ["individual", "combined", "hybrid", "max"])
+def test_empty_catalog_answers_no_match(make_matcher, method):
+    matcher = make_matcher({})
+
+    result = matcher.find_best_match("a qué hora abren", method, top_k=3)
+
+    assert result["status"] == "no_match"
+    assert result["top_matches"] == []
+    assert matcher.index.description_matrix.shape == (0, matcher.model.get_sentence_embedding_dimension())
+
+
+def test_empty_catalog_accepts_new_audios(make_matcher):
+    matcher = make_matcher({})
+
+    matcher.add_audio("horario_trabajo.ogg", ["horario de oficina", "a qué hora abren"])
+
+    assert matcher.find_best_match("a qué hora abren", "hybrid")["response"] == "horario_trabajo.ogg"
+
+
+def _count_encoded(matcher, monkeypatch):
+    encoded = []
+    encode = matcher.model.encode
+
+    def counting(sentences, *args, **kwargs):
+        encoded.extend([sentences] if isinstance(sentences, str) else sentences)
+        return encode(sentences, *args, **kwargs)
+
+    monkeypatch.setattr(matcher.model, "encode", counting)
+    return encoded
+
+
+def test_replace_reuses_unchanged_description_embeddings(make_matcher, monkeypatch):
+    matcher = make_matcher()
+    before = matcher.index
+    kept = before.description_matrix.to_float32()[before.description_range(before.position("horario_trabajo.ogg"))][0]
+    encoded = _count_encoded(matcher, monkeypatch)
+
+    matcher.replace_audio("horario_trabajo.ogg", ["horario de oficina", "hasta qué hora atienden"])
+
+    assert sorted(encoded) == sorted(["hasta qué hora atienden", "horario de oficina hasta qué hora atienden"])
+    after = matcher.index
+    rows = after.description_matrix.to_float32()[after.description_range(after.position("horario_trabajo.ogg"))]
+    np.testing.assert_array_equal(rows[0], kept)
+    assert matcher.find_best_match("hasta qué hora atienden", "individual")["response"] == "horario_trabajo.ogg"
+
+
+def test_replace_of_a_missing_audio_raises(make_matcher):
+    matcher = make_matcher()
+    version = matcher.index.version
+
+    with pytest.raises(KeyError):
+        matcher.replace_audio("no_existe.ogg", ["hola"])
+    assert matcher.index.version == version
+
+
+def test_deleted_audio_leaves_the_results(make_matcher):
+    matcher = make_matcher()
+    query = "cuándo me pagan el salario"
+    assert matcher.find_best_match(query, "hybrid")["response"] == "nomina_salario.ogg"
+
+    assert matcher.delete_audio("nomina_salario.ogg")
+
+    result = matcher.find_best_match(query, "hybrid", top_k=5)
+    assert result["response"] != "nomina_salario.ogg"
+    assert "nomina_salario.ogg" not in [match["audio_file"] for match in result["top_matches"]]
+    assert not matcher.delete_audio("nomina_salario.ogg")
+
+
+def test_every_edit_bumps_the_version(make_matcher):
+    matcher = make_matcher()
+    versions = [matcher.index.version]
+
+    matcher.add_audio("nuevo.ogg", ["audio nuevo"])
+    versions.append(matcher.index.version)
+    matcher.replace_audio("nuevo.ogg", ["audio reemplazado"])
+    versions.append(matcher.index.version)
+    matcher.delete_audio("nuevo.ogg")
+    versions.append(matcher.index.version)
+
+    assert versions == sorted(set(versions))
+
+
+def test_old_snapshot_stays_consistent_after_a_swap(make_matcher):
+    matcher = make_matcher()
+    old = matcher.index
+    old_descriptions = [list(texts) for texts in old.descriptions]
+    query = matcher._encode_queries(["fecha de pago de la nómina"])
+
+    # Grows the first audio, so every later description row of the new snapshot shifts
+    matcher.replace_audio("horario_trabajo.ogg", ["horario de oficina", "a qué hora abren", "a qué hora cierran"])
+    matcher.delete_audio("vacaciones.ogg")
+
+    assert old.descriptions == old_descriptions
+    scores = old.score_batch(query)[0]
+    texts = [text for descriptions in old_descriptions for text in descriptions]
+    expected = normalize_rows(matcher.model.encode(texts)) @ normalize_rows(query)[0]
+    for position, descriptions in enumerate(old_descriptions):
+        rows = old.description_range(position)
+        assert rows.stop - rows.start == len(descriptions)
+        np.testing.assert_allclose(scores.description_scores[rows], expected[rows], atol=1e-5)
+    ranked = matcher._rank(scores, MatchingMethod.INDIVIDUAL, 3)
+    assert ranked[0] == {
+        "audio_file": "nomina_salario.ogg",
+        "score": pytest.approx(float(expected[old.description_range(1)].max()), abs=1e-5),
+        "matched_description": "fecha de pago de la nómina"
+    }
+
+
+def test_spliced_ivf_lists_match_a_rebuild_after_mixed_edits(make_matcher, monkeypatch):
+    catalog, _ = synthetic_catalog(600, 6, 0)
+    monkeypatch.setattr(Config, "INDEX_BACKEND", "ivf")
+    monkeypatch.setattr(Config, "ANN_MIN_VECTORS", 1)
+    monkeypatch.setattr(Config, "IVF_N_LISTS", 8)
+    matcher = make_matcher(catalog)
+    audio_files = list(catalog)
+
+    with matcher._editing():
+        index = matcher.index.with_audios(matcher._embed_audios(matcher.index, [
+            (audio_files[3], catalog[audio_files[3]] + ["descripción añadida al reemplazar"]),
+            (audio_files[10], catalog[audio_files[10]][:1]),
+            ("nuevo.ogg", ["audio añadido al final", "segunda descripción"])
+        ]))
+        matcher._swap_index(index.without_audios([audio_files[0], audio_files[20]]))
+    index = matcher.index
+
+    for search, matrix in [(index.description_search, index.description_matrix),
+                           (index.combined_search, index.combined_matrix)]:
+        fresh = search.rebuilt(matrix)
+        assert len(search.list_ids) == len(fresh.list_ids)
+        for ids, fresh_ids in zip(search.list_ids, fresh.list_ids):
+            np.testing.assert_array_equal(np.sort(ids), np.sort(fresh_ids))
+    assert matcher.find_best_match("audio añadido al final", "individual")["response"] == "nuevo.ogg"
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_rescoring_restores_float32_scores_of_the_top_candidates(make_matcher, offline, monkeypatch, storage):
+    catalog, queries = synthetic_catalog(300, 6, 20)
+    monkeypatch.setattr(Config, "LEXICAL_FAST_PATH", False)
+    monkeypatch.setattr(Config, "RESULT_CACHE", False)
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_DIR", str(offline / "cache"))
+    exact = make_matcher(catalog)
+    monkeypatch.setattr(Config, "EMBEDDING_STORAGE", storage)
+    monkeypatch.setattr(Config, "RESCORE_CANDIDATES", 10)
+    rescored = make_matcher()
+    assert rescored.index.storage == storage and rescored.index.store_rows is not None
+    monkeypatch.setattr(Config, "RESCORE_CANDIDATES", 0)
+    quantized = make_matcher()
+    monkeypatch.setattr(Config, "RESCORE_CANDIDATES", 10)
+
+    differs = False
+    for query, _ in queries:
+        for method in ["individual", "combined", "hybrid"]:
+            expected = exact.find_best_match(query, method, top_k=3)["top_matches"]
+            result = rescored.find_best_match(query, method, top_k=3)["top_matches"]
+            assert [m["audio_file"] for m in result] == [m["audio_file"] for m in expected]
+            np.testing.assert_allclose([m["score"] for m in result], [m["score"] for m in expected], atol=1e-6)
+            approx = [m["score"] for m in quantized.find_best_match(query, method, top_k=3)["top_matches"]]
+            np.testing.assert_allclose(approx[:1], [expected[0]["score"]], atol=2e-2)
+            differs = differs or approx != [m["score"] for m in expected]
+    # Without rescoring the quantization error is visible
+    assert differs
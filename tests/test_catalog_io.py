@@ -0,0 +1,104 @@
+import io
+import json
+
+import pytest
+
+from app.services.catalog_io import CatalogReader, iter_json_entries, read_audio_base
+
+CATALOG = {
+    "a.ogg": ["hola", "buenos días"],
+    "b.ogg": ["número 12345", "emoji 🎵 y comillas \"escapadas\""],
+    "c.ogg": []
+}
+
+
+def _entries(text: str, chunk_size: int = 1 << 16):
+    return list(iter_json_entries(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+def test_object_layout_streams_entries_in_order(chunk_size):
+    text = json.dumps(CATALOG, ensure_ascii=False, indent=2)
+
+    entries = _entries(text, chunk_size)
+
+    assert entries == [{"audio_file": name, "descriptions": texts} for name, texts in CATALOG.items()]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 16])
+def test_array_layout_streams_entries(chunk_size):
+    items = [{"audio_file": name, "descriptions": texts} for name, texts in CATALOG.items()]
+
+    assert _entries(json.dumps(items), chunk_size) == items
+
+
+def test_number_split_across_chunks_is_read_whole():
+    assert _entries('[12345, 6]', chunk_size=3) == [12345, 6]
+
+
+@pytest.mark.parametrize("text", ["{}", "[]", "  { }  ", "\n[\n]\n"])
+def test_empty_documents_yield_nothing(text):
+    assert _entries(text) == []
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "42",
+    '"a.ogg"',
+    '{"a.ogg": ["x"]',
+    '{"a.ogg" ["x"]}',
+    '{"a.ogg": ["x"],}',
+    '{"a.ogg": ["x"]} trailing',
+    '[{"audio_file": "a.ogg"} {"audio_file": "b.ogg"}]',
+    '{"a.ogg": ["x"'
+])
+def test_malformed_documents_raise_value_error(text):
+    with pytest.raises(ValueError, match="Invalid JSON catalog"):
+        _entries(text, chunk_size=4)
+
+
+def test_malformed_tail_raises_after_valid_entries():
+    entries = iter_json_entries(io.StringIO('{"a.ogg": ["x"], "b.ogg": ["y"], "c.ogg": [oops]}'), 8)
+
+    assert next(entries) == {"audio_file": "a.ogg", "descriptions": ["x"]}
+    assert next(entries) == {"audio_file": "b.ogg", "descriptions": ["y"]}
+    with pytest.raises(ValueError):
+        next(entries)
+
+
+def test_reader_skips_invalid_entries_and_reports_them():
+    lines = [
+        json.dumps({"audio_file": "a.ogg", "descriptions": ["  hola  ", ""]}),
+        "{not json",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"audio_file": "b.ogg", "descriptions": []}),
+        "",
+        json.dumps({"audio_file": "c.ogg", "descriptions": ["adiós"]})
+    ]
+    reader = CatalogReader(io.StringIO("\n".join(lines)), "jsonl")
+
+    assert list(reader) == [("a.ogg", ["hola"]), ("c.ogg", ["adiós"])]
+    assert reader.read == 5
+    assert reader.skipped == 3
+    assert [error["entry"] for error in reader.errors] == [2, 3, 4]
+
+
+def test_read_audio_base_keeps_descriptions_verbatim(tmp_path):
+    path = tmp_path / "audio_base.json"
+    path.write_text(json.dumps({"a.ogg": ["hola ", "  adiós"], "b.ogg": []}), encoding="utf-8")
+
+    assert read_audio_base(str(path)) == {"a.ogg": ["hola ", "  adiós"], "b.ogg": []}
+
+
+@pytest.mark.parametrize("catalog", [
+    {"a.ogg": "hola"},
+    {"a.ogg": ["hola", 3]},
+    {"": ["hola"]},
+    [["a.ogg", ["hola"]]]
+])
+def test_read_audio_base_rejects_invalid_entries(tmp_path, catalog):
+    path = tmp_path / "audio_base.json"
+    path.write_text(json.dumps(catalog), encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        read_audio_base(str(path))
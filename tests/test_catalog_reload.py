@@ -0,0 +1,173 @@
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config.settings import Config
+from app.main import app
+from app.routes import api
+from app.services.catalog_io import ImportInProgress
+from app.services.metrics import CATALOG_RELOADS
+
+EDITED = {
+    "horario_trabajo.ogg": ["horario de oficina", "a qué hora abren", "a qué hora cierran"],
+    "vacaciones.ogg": ["cuántos días de vacaciones tengo"],
+    "bajas_medicas.ogg": ["cómo pido una baja médica", "parte de baja"]
+}
+
+
+def write_catalog(path, catalog: dict):
+    path.write_text(json.dumps(catalog, ensure_ascii=False), encoding="utf-8")
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def _reloaded(matcher, trigger: str):
+    return lambda: (matcher.last_reload or {}).get("trigger") == trigger and matcher.last_reload["status"] != "running"
+
+
+@pytest.fixture
+def encoded(make_matcher, monkeypatch):
+    """Matcher over CATALOG and the texts its encoder is asked for from now on"""
+    matcher = make_matcher()
+    texts = []
+    encode = matcher.model.encode
+
+    def counting(sentences, *args, **kwargs):
+        texts.extend([sentences] if isinstance(sentences, str) else sentences)
+        return encode(sentences, *args, **kwargs)
+
+    monkeypatch.setattr(matcher.model, "encode", counting)
+    return matcher, texts
+
+
+def test_reload_applies_only_the_differences(encoded, offline):
+    matcher, texts = encoded
+    old = matcher.index
+    kept = old.description_matrix.to_float32()[old.description_range(old.position("horario_trabajo.ogg"))]
+    write_catalog(offline / "audio_base.json", EDITED)
+
+    report = matcher.reload_audio_base()
+
+    assert report["status"] == "reloaded"
+    assert (report["audios_added"], report["audios_changed"], report["audios_removed"]) == (1, 1, 1)
+    # Kept descriptions reuse their embeddings; only new texts and combined texts of changed audios are encoded
+    assert sorted(texts) == sorted([
+        "a qué hora cierran", " ".join(EDITED["horario_trabajo.ogg"]),
+        "cómo pido una baja médica", "parte de baja", " ".join(EDITED["bajas_medicas.ogg"])
+    ])
+    assert report["texts_encoded"] == len(texts)
+    assert matcher.audio_descriptions == EDITED
+    assert report["index_version"] == matcher.index.version > old.version
+    rows = matcher.index.description_matrix.to_float32()[matcher.index.description_range(0)]
+    assert (rows[:2] == kept).all()
+    assert matcher.find_best_match("parte de baja", "hybrid")["response"] == "bajas_medicas.ogg"
+
+
+def test_reload_of_an_unchanged_file_keeps_the_snapshot(encoded):
+    matcher, texts = encoded
+    index = matcher.index
+
+    report = matcher.reload_audio_base()
+
+    assert report["status"] == "unchanged"
+    assert matcher.index is index
+    assert texts == []
+
+
+@pytest.mark.parametrize("content", ['{"horario_trabajo.ogg": ["horario"', '{"horario_trabajo.ogg": "horario"}', ""])
+def test_invalid_file_keeps_the_old_index_live(make_matcher, offline, content):
+    matcher = make_matcher()
+    index = matcher.index
+    failed = CATALOG_RELOADS.value("manual", "failed")
+    (offline / "audio_base.json").write_text(content, encoding="utf-8")
+
+    report = matcher.reload_audio_base()
+
+    assert report["status"] == "failed" and report["error"]
+    assert matcher.index is index
+    assert matcher.find_best_match("a qué hora abren", "hybrid")["response"] == "horario_trabajo.ogg"
+    assert CATALOG_RELOADS.value("manual", "failed") == failed + 1
+
+
+def test_reload_waits_for_running_imports(make_matcher):
+    matcher = make_matcher()
+
+    with matcher._import_lock:
+        with pytest.raises(ImportInProgress):
+            matcher.reload_audio_base()
+
+
+def test_watcher_reloads_an_edited_file(make_matcher, offline, monkeypatch):
+    monkeypatch.setattr(Config, "CATALOG_WATCH_SECONDS", 0.02)
+    matcher = make_matcher()
+
+    write_catalog(offline / "audio_base.json", EDITED)
+
+    _wait_for(_reloaded(matcher, "watcher"))
+    assert matcher.last_reload["status"] == "reloaded"
+    assert matcher.audio_descriptions == EDITED
+
+
+def test_watcher_ignores_the_matchers_own_writes(make_matcher, monkeypatch):
+    monkeypatch.setattr(Config, "CATALOG_WATCH_SECONDS", 0.02)
+    monkeypatch.setattr(Config, "PERSIST_CATALOG", True)
+    matcher = make_matcher()
+
+    matcher.add_audio("nuevo.ogg", ["audio nuevo"])
+    time.sleep(0.2)
+
+    assert matcher.last_reload is None
+
+
+@pytest.fixture
+def client(offline, monkeypatch):
+    monkeypatch.setattr(api, "matcher", None)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_reload_endpoint(client, offline):
+    write_catalog(offline / "audio_base.json", EDITED)
+
+    response = client.post("/api/admin/reload-catalog")
+
+    assert response.status_code == 200
+    assert response.json()["trigger"] == "api"
+    assert response.json()["audios_added"] == 1
+    assert client.get("/api/stats").json()["last_reload"]["status"] == "reloaded"
+
+    (offline / "audio_base.json").write_text("{", encoding="utf-8")
+    failed = client.post("/api/admin/reload-catalog")
+    assert failed.status_code == 400
+    assert failed.json()["detail"]["status"] == "failed"
+    assert api.matcher.audio_descriptions == EDITED
+
+    with api.matcher._import_lock:
+        assert client.post("/api/admin/reload-catalog").status_code == 409
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="needs SIGHUP")
+def test_sighup_reloads_the_catalog(client, offline):
+    previous = signal.getsignal(signal.SIGHUP)
+    try:
+        api.install_reload_signal()
+        write_catalog(offline / "audio_base.json", EDITED)
+        assert threading.current_thread() is threading.main_thread()
+
+        os.kill(os.getpid(), signal.SIGHUP)
+
+        _wait_for(_reloaded(api.matcher, "signal"))
+    finally:
+        signal.signal(signal.SIGHUP, previous)
+    assert api.matcher.last_reload["status"] == "reloaded"
+    assert api.matcher.audio_descriptions == EDITED
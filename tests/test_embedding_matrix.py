@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from app.services.embedding_index import normalize_rows
+from app.services.embedding_matrix import EmbeddingMatrix, quantization_error
+
+# Worst-case score error of a unit-vector dot product for each storage type
+TOLERANCES = {"float16": 2e-3, "int8": 2e-2}
+
+
+@pytest.fixture
+def rows():
+    return normalize_rows(np.random.default_rng(3).standard_normal((300, 64)).astype(np.float32))
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_quantized_scores_stay_close_to_float32(rows, storage):
+    queries = rows[:20]
+    matrix = EmbeddingMatrix.from_float32(rows, storage)
+
+    assert matrix.storage == storage
+    np.testing.assert_allclose(matrix.dot(queries), queries @ rows.T, atol=TOLERANCES[storage])
+    np.testing.assert_allclose(matrix.to_float32(), rows, atol=TOLERANCES[storage])
+    error = quantization_error(rows, matrix)
+    assert error["max_abs_error"] < TOLERANCES[storage]
+    assert error["top1_agreement"] > 0.9
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_chunked_dot_equals_whole_matrix_dot(rows, storage, monkeypatch):
+    matrix = EmbeddingMatrix.from_float32(rows, storage)
+    whole = matrix.dot(rows[:5])
+    monkeypatch.setattr(EmbeddingMatrix, "CHUNK_ROWS", 7)
+
+    np.testing.assert_allclose(matrix.dot(rows[:5]), whole, atol=1e-6)
+
+
+def test_int8_rows_keep_their_own_scale():
+    matrix = EmbeddingMatrix.from_float32(np.array([[1.0, 0.0], [0.0, 0.0], [0.6, -0.8]], dtype=np.float32), "int8")
+
+    np.testing.assert_allclose(matrix.scales, [1 / 127, 1.0, 0.8 / 127])
+    np.testing.assert_array_equal(matrix.data, [[127, 0], [0, 0], [95, -127]])
+
+
+def test_take_and_with_rows_keep_the_storage(rows):
+    matrix = EmbeddingMatrix.from_float32(rows[:10], "int8")
+    replacement = EmbeddingMatrix.from_float32(rows[10:12], "int8")
+
+    edited = matrix.with_rows([2, 5], replacement)
+
+    np.testing.assert_array_equal(edited.take([2, 5]).data, replacement.data)
+    np.testing.assert_array_equal(edited.take([2, 5]).scales, replacement.scales)
+    np.testing.assert_array_equal(edited.take(slice(0, 2)).data, matrix.take(slice(0, 2)).data)
+    assert matrix.take([2]).data.tolist() != replacement.take([0]).data.tolist()
+
+
+def test_unknown_storage_is_rejected(rows):
+    with pytest.raises(ValueError, match="Unknown embedding storage"):
+        EmbeddingMatrix.from_float32(rows, "int4")
@@ -0,0 +1,127 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from app.config.settings import Config
+from app.services.embedding_store import EmbeddingStore
+from app.services.encoders import (HashingEncoder, cache_namespace, encoder_name, is_uncased, load_encoder,
+                                   onnx_model_dir)
+
+TEXTS = ["horario de oficina", "Horario de OFICINA", "cuándo me pagan el salario", ""]
+
+
+def test_hashing_encoder_is_deterministic():
+    batch = HashingEncoder(64).encode(TEXTS)
+
+    np.testing.assert_array_equal(batch, HashingEncoder(64).encode(TEXTS))
+    np.testing.assert_array_equal(batch[0], HashingEncoder(64).encode(TEXTS[0]))
+    # Case-folded before hashing, as its ``uncased`` flag promises
+    np.testing.assert_array_equal(batch[0], batch[1])
+
+
+def test_hashing_encoder_returns_unit_vectors():
+    embeddings = HashingEncoder(64).encode(TEXTS)
+
+    assert embeddings.shape == (4, 64)
+    assert embeddings.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(embeddings[:3], axis=1), 1.0, rtol=1e-6)
+    assert not embeddings[3].any()
+    assert HashingEncoder(64).encode([]).shape == (0, 64)
+
+
+def test_load_encoder_hashing(monkeypatch):
+    monkeypatch.setattr(Config, "HASHING_DIMENSION", 32)
+
+    model = load_encoder("hashing")
+
+    assert isinstance(model, HashingEncoder)
+    assert model.get_sentence_embedding_dimension() == 32
+    assert encoder_name(model) == "hashing:hashing-32"
+    assert cache_namespace(model) == "hashing-32"
+    assert is_uncased(model)
+
+
+def _fake_sentence_transformers(lowercase: bool) -> types.ModuleType:
+    class SentenceTransformer:
+        def __init__(self, model_name):
+            self.model_name = model_name
+
+        @staticmethod
+        def tokenizer(text):
+            return {"input_ids": [ord(c) for c in (text.lower() if lowercase else text)]}
+
+        @staticmethod
+        def get_sentence_embedding_dimension():
+            return 8
+
+    module = types.ModuleType("sentence_transformers")
+    module.SentenceTransformer = SentenceTransformer
+    return module
+
+
+@pytest.mark.parametrize("lowercase", [False, True])
+def test_load_encoder_sentence_transformers(monkeypatch, lowercase):
+    monkeypatch.setitem(sys.modules, "sentence_transformers", _fake_sentence_transformers(lowercase))
+    monkeypatch.setattr(Config, "ENCODER_BACKEND", "sentence-transformers")
+
+    model = load_encoder(model_name="org/modelo-v2")
+
+    assert model.model.model_name == "org/modelo-v2"
+    # Same namespace as before backends existed, so existing embedding caches stay valid
+    assert cache_namespace(model) == "org/modelo-v2"
+    assert encoder_name(model) == "sentence-transformers:org/modelo-v2"
+    assert is_uncased(model) == lowercase
+
+
+def test_load_encoder_rejects_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown encoder backend"):
+        load_encoder("word2vec")
+
+
+def test_custom_encoder_identity():
+    class Custom:
+        def encode(self, sentences, **kwargs):
+            return np.zeros((len(sentences), 4), dtype=np.float32)
+
+    assert encoder_name(Custom()) == "custom:Custom"
+    assert not is_uncased(Custom())
+
+
+def test_onnx_model_dir_is_a_safe_directory_name(tmp_path):
+    assert onnx_model_dir("org/modelo v2", str(tmp_path)) == str(tmp_path / "org_modelo_v2")
+
+
+def test_embedding_store_is_namespaced_by_encoder(tmp_path):
+    small, large = HashingEncoder(16), HashingEncoder(32)
+    store = EmbeddingStore(str(tmp_path), cache_namespace(small))
+    store.put_many(TEXTS[:1], small.encode(TEXTS[:1]))
+    store.flush()
+
+    assert EmbeddingStore(str(tmp_path), cache_namespace(small)).get_many(TEXTS[:1])[0] is not None
+    other = EmbeddingStore(str(tmp_path), cache_namespace(large))
+    assert other.path != store.path
+    assert other.get_many(TEXTS[:1]) == [None]
+
+
+class _OtherBackend(HashingEncoder):
+    """Same name, and so the same shared directory, as the hashing encoder, but another backend"""
+
+    backend = "other"
+
+
+def test_shared_segment_of_another_encoder_is_not_attached(make_matcher, offline, monkeypatch):
+    monkeypatch.setattr(Config, "SHARED_INDEX_DIR", str(offline / "shared"))
+    publisher = make_matcher()
+    published = publisher._segment
+
+    other = make_matcher(model=_OtherBackend(Config.HASHING_DIMENSION))
+
+    assert other.index.encoder == "other:" + publisher.model.name
+    # Rebuilt with its own encoder and published over the mismatched segment
+    assert other._segment != published
+    assert other.find_best_match("a qué hora abren", "hybrid")["response"] == "horario_trabajo.ogg"
+    # A different encoder gets a directory of its own
+    sized = make_matcher(model=HashingEncoder(Config.HASHING_DIMENSION // 2))
+    assert sized.segments.path != publisher.segments.path
@@ -0,0 +1,126 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app.cli import main
+from app.config.settings import Config
+from app.services.evaluation import LabeledQuery, SweepEvaluator, parse_grid, read_query_log
+from benchmarks.run import synthetic_catalog
+
+THRESHOLDS = [0.2, 0.35, 0.5, 0.65, 0.8]
+
+
+@pytest.fixture
+def labeled(make_matcher, monkeypatch):
+    """Matcher over a synthetic catalog and labeled queries: matching, exact descriptions, no-match and unknown labels"""
+    monkeypatch.setattr(Config, "RESULT_CACHE", False)
+    catalog, queries = synthetic_catalog(200, 5, 40)
+    matcher = make_matcher(catalog)
+    log = [LabeledQuery(text, audio_file) for text, audio_file in queries]
+    log += [LabeledQuery(descriptions[0], audio_file) for audio_file, descriptions in list(catalog.items())[:5]]
+    log += [LabeledQuery("zzz qqq xxx", None), LabeledQuery(queries[0][0], None)]
+    log += [LabeledQuery(queries[1][0], "fantasma.ogg"), LabeledQuery(queries[2][0], "fantasma.ogg"),
+            LabeledQuery(queries[3][0], "otro.ogg")]
+    return matcher, log
+
+
+def test_read_query_log():
+    stream = io.StringIO("\n".join([
+        '{"text": "horario", "expected": "a.ogg"}',
+        '{"query": "salario", "audio_file": "b.ogg"}',
+        '{"text": "nada", "label": "none"}',
+        '{"text": "vacío", "expected": null}',
+        '{"text": "   ", "expected": "a.ogg"}',
+        'no es json',
+        '["lista"]',
+        ''
+    ]))
+
+    assert list(read_query_log(stream)) == [
+        LabeledQuery("horario", "a.ogg"), LabeledQuery("salario", "b.ogg"),
+        LabeledQuery("nada", None), LabeledQuery("vacío", None)
+    ]
+
+
+@pytest.mark.parametrize("spec, values", [
+    ("0:1:0.25", [0.0, 0.25, 0.5, 0.75, 1.0]),
+    ("0.5, 0.1,0.5", [0.1, 0.5]),
+    ("0.1:0.3:0.1", [0.1, 0.2, 0.3])
+])
+def test_parse_grid(spec, values):
+    np.testing.assert_allclose(parse_grid(spec), values)
+
+
+def test_parse_grid_rejects_non_positive_steps():
+    with pytest.raises(ValueError):
+        parse_grid("0:1:0")
+
+
+def test_unknown_labels_are_skipped(labeled):
+    matcher, log = labeled
+
+    report = SweepEvaluator(matcher, THRESHOLDS, [0.7]).run(log)
+
+    assert report["unknown_labels"] == 3
+    assert report["unknown_label_sample"] == ["fantasma.ogg", "otro.ogg"]
+    assert report["queries"] == len(log) - 3
+    assert report["labeled_no_match"] == 2
+
+
+@pytest.mark.parametrize("lexical_fast_path", [True, False])
+def test_sweep_equals_the_matcher_answers(labeled, monkeypatch, lexical_fast_path):
+    monkeypatch.setattr(Config, "LEXICAL_FAST_PATH", lexical_fast_path)
+    matcher, log = labeled
+    known = [query for query in log if query.expected is None or query.expected in matcher.index]
+
+    # Small chunks, so the counts of several chunks are merged too
+    report = SweepEvaluator(matcher, THRESHOLDS, [0.7], chunk_size=16).run(log, full=True)
+
+    exact = sum(1 for query in known if matcher.index.lexical.lookup(query.text) is not None)
+    assert exact >= 5
+    assert report["lexical_hits"] == (exact if lexical_fast_path else 0)
+    positives = sum(1 for query in known if query.expected is not None)
+    for curve in report["curves"]:
+        method = curve["method"]
+        assert curve["individual_weight"] in (None, matcher.HYBRID_WEIGHT_INDIVIDUAL)
+        for row in curve["sweep"]:
+            matcher.threshold = row["threshold"]
+            answers = [result["response"] for result in matcher.find_best_matches(
+                [query.text for query in known], [method] * len(known))]
+            answered = [(answer, query) for answer, query in zip(answers, known) if answer != Config.NO_MATCH_RESPONSE]
+            correct = sum(1 for answer, query in answered if answer == query.expected)
+            assert row["no_match_rate"] == pytest.approx(1 - len(answered) / len(known)), (method, row)
+            assert row["recall"] == pytest.approx(correct / positives), (method, row)
+            assert row["precision"] == pytest.approx(correct / len(answered) if answered else 0.0), (method, row)
+            assert row["false_match_rate"] == pytest.approx(
+                sum(1 for _, query in answered if query.expected is None) / (len(known) - positives)), (method, row)
+
+
+def test_evaluate_cli(offline, capsys):
+    catalog, queries = synthetic_catalog(60, 4, 10)
+    (offline / "audio_base.json").write_text(json.dumps(catalog), encoding="utf-8")
+    lines = [json.dumps({"text": text, "expected": audio_file}) for text, audio_file in queries]
+    lines.append(json.dumps({"text": "zzz qqq", "expected": "none"}))
+    (offline / "queries.jsonl").write_text("\n".join(lines), encoding="utf-8")
+
+    status = main(["evaluate", "queries.jsonl", "--thresholds", "0.3,0.6", "--weights", "0.5,0.7",
+                   "--chunk-size", "4", "--output", "report.json"])
+
+    assert status == 0
+    printed = json.loads(capsys.readouterr().out)
+    assert printed["queries"] == len(lines)
+    assert printed["labeled_no_match"] == 1
+    assert [curve["curve"] for curve in printed["curves"]] == ["individual", "combined", "max", "hybrid@0.5", "hybrid@0.7"]
+    assert printed["current"]["curve"] == "hybrid@0.7"
+    assert all("sweep" not in curve for curve in printed["curves"])
+    written = json.loads((offline / "report.json").read_text(encoding="utf-8"))
+    assert [row["threshold"] for row in written["curves"][0]["sweep"]] == [0.3, 0.6, Config.SIMILARITY_THRESHOLD]
+
+
+def test_evaluate_cli_fails_without_queries(offline, capsys):
+    (offline / "queries.jsonl").write_text("\n", encoding="utf-8")
+
+    assert main(["evaluate", "queries.jsonl"]) == 1
+    assert json.loads(capsys.readouterr().out)["queries"] == 0
@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config.settings import Config
+from app.main import app
+from app.routes import api
+
+
+@pytest.fixture
+def client(offline, monkeypatch):
+    monkeypatch.setattr(api, "matcher", None)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _process(client, monkeypatch, lean: bool, body: dict) -> dict:
+    monkeypatch.setattr(Config, "LEAN_RESPONSES", lean)
+    # Both paths must be built from a fresh match, not from the other one's cached result
+    api.matcher.result_cache.clear()
+    response = client.post("/api/process", json=body)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("debug", [False, True])
+@pytest.mark.parametrize("method", ["individual", "combined", "hybrid", "max"])
+@pytest.mark.parametrize("query", [
+    {"text": "a qué hora abren la oficina"},
+    {"text": "cuándo pagan", "top_k": 2},
+    {"text": "zzz qqq"}
+])
+def test_lean_response_equals_validated_response(client, monkeypatch, debug, method, query):
+    monkeypatch.setattr(Config, "DEBUG_MODE", debug)
+    body = {**query, "method": method}
+
+    lean = _process(client, monkeypatch, True, body)
+    validated = _process(client, monkeypatch, False, body)
+
+    assert lean == validated
+    assert set(lean) == set(api.QueryResponse.__fields__)
+
+
+def test_lean_response_reports_top_matches_in_rank_order(client, monkeypatch):
+    result = _process(client, monkeypatch, True, {"text": "cuándo me pagan el salario", "method": "hybrid", "top_k": 3})
+
+    scores = [match["score"] for match in result["top_matches"]]
+    assert result["response"] == "nomina_salario.ogg"
+    assert result["top_matches"][0]["audio_file"] == "nomina_salario.ogg"
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize("confidence, status_code", [(-0.2, 400), (0.0, 200), (1.0, 200), (1.5, 400), (float("nan"), 400)])
+def test_lean_and_validated_paths_check_confidence_alike(client, monkeypatch, confidence, status_code):
+    result = api.matcher.find_best_match("zzz qqq", "hybrid")
+    result["confidence"] = confidence
+    monkeypatch.setattr(api.matcher, "find_best_match", lambda *args, **kwargs: dict(result))
+
+    for lean in (True, False):
+        monkeypatch.setattr(Config, "LEAN_RESPONSES", lean)
+        response = client.post("/api/process", json={"text": "zzz qqq", "method": "hybrid"})
+        assert response.status_code == status_code, lean
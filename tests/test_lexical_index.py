@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.config.settings import Config
+from app.services.index_segments import SegmentStore
+from app.services.lexical_index import AMBIGUOUS, LexicalIndex, LexicalVocabulary, fold_text
+from benchmarks.run import synthetic_catalog
+
+DESCRIPTIONS = [
+    ["horario de oficina", "¿A qué hora abren?"],
+    ["Cuándo me pagan la nómina", "horario de oficina"],
+    [],
+    ["días de vacaciones", "dias de vacaciones!"]
+]
+
+
+def _offsets(descriptions) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum([len(texts) for texts in descriptions])])
+
+
+@pytest.fixture
+def lexical():
+    return LexicalIndex(DESCRIPTIONS, _offsets(DESCRIPTIONS), LexicalVocabulary())
+
+
+@pytest.mark.parametrize("text, folded", [
+    ("¿Cuándo me pagan la NÓMINA?", "cuando me pagan la nomina"),
+    ("  horario\tde   oficina ", "horario de oficina"),
+    ("Ñandú, pingüino; straße", "nandu pinguino strasse"),
+    ("¡¿...?!", "")
+])
+def test_fold_text(text, folded):
+    assert fold_text(text) == folded
+
+
+def test_lookup_matches_folded_descriptions(lexical):
+    assert lexical.lookup("cuando me pagan la nomina") == (1, 2)
+    assert lexical.lookup("¿a que hora ABREN") == (0, 1)
+    # Both spellings belong to the same audio, so the text still has one owner
+    assert lexical.lookup("Días de vacaciones") == (3, 4)
+    assert lexical.lookup("horario de la oficina") is None
+
+
+def test_text_shared_by_several_audios_is_ambiguous(lexical):
+    assert lexical.exact["horario de oficina"] == AMBIGUOUS
+    assert lexical.lookup("Horario de oficina") is None
+    assert lexical.get_stats()["exact_texts"] == 3
+
+
+def test_bm25_scores_are_normalized():
+    catalog, queries = synthetic_catalog(400, 5, 50)
+    descriptions = list(catalog.values())
+    lexical = LexicalIndex(descriptions, _offsets(descriptions), LexicalVocabulary())
+    texts = [text for audio_texts in descriptions for text in audio_texts]
+
+    for query in [query for query, _ in queries] + texts[:50] + ["", "zzzz qqqq"]:
+        scores = lexical.score(query)
+        assert scores.shape == (len(texts),)
+        assert scores.min() >= 0.0 and scores.max() <= 1.0
+    assert not lexical.score("zzzz qqqq").any()
+    assert not lexical.score("").any()
+    # A description scores highest against itself
+    assert int(np.argmax(lexical.score(texts[7]))) == texts.index(texts[7])
+
+
+def test_audio_scores_take_the_best_description(lexical):
+    description_scores = np.array([0.1, 0.4, 0.3, 0.2, 0.9, 0.5], dtype=np.float32)
+
+    np.testing.assert_allclose(lexical.audio_scores(description_scores), [0.4, 0.3, 0.0, 0.9], rtol=1e-6)
+
+
+def _assert_same_index(loaded: LexicalIndex, built: LexicalIndex, queries):
+    assert loaded.exact == built.exact
+    assert loaded.get_stats() == built.get_stats()
+    for query in queries:
+        assert loaded.lookup(query) == built.lookup(query)
+        np.testing.assert_array_equal(loaded.score(query), built.score(query))
+
+
+def test_save_and_load_round_trip(lexical, tmp_path):
+    lexical.save(str(tmp_path / "lexical"))
+
+    loaded = LexicalIndex.load(str(tmp_path / "lexical"), lexical.offsets)
+
+    assert isinstance(loaded.postings, np.memmap)
+    _assert_same_index(loaded, lexical, ["horario de oficina", "a que hora abren", "vacaciones", "nada que ver"])
+    assert LexicalIndex.load(str(tmp_path / "missing"), lexical.offsets) is None
+
+
+def test_published_segment_carries_the_lexical_index(make_matcher, offline, monkeypatch):
+    monkeypatch.setattr(Config, "SHARED_INDEX_DIR", str(offline / "shared"))
+    monkeypatch.setattr(Config, "LEXICAL_WEIGHT", 0.2)
+    publisher = make_matcher()
+    segment = os.path.join(publisher.segments.path, publisher._segment, SegmentStore.LEXICAL_DIR)
+    assert os.path.exists(os.path.join(segment, LexicalIndex.META_FILE))
+
+    reader = make_matcher()
+
+    assert reader._segment == publisher._segment
+    index = reader.index
+    built = LexicalIndex(index.descriptions, index.offsets, LexicalVocabulary())
+    _assert_same_index(index.lexical, built, ["a qué hora abren", "cuándo me pagan", "vacaciones", ""])
+    assert reader.find_best_match("A QUÉ HORA ABREN", "hybrid")["method_used"] == "exact_match"
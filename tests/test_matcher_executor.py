@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config.settings import Config
+from app.main import app
+from app.routes import api
+from app.services.matcher_executor import ExecutorOverloaded, MatcherExecutor
+
+
+class _Gate:
+    """Holds ``find_best_match`` calls of a matcher until opened"""
+
+    def __init__(self, matcher, monkeypatch):
+        self.opened = threading.Event()
+        self.entered = threading.Semaphore(0)
+        find_best_match = matcher.find_best_match
+
+        def gated(*args, **kwargs):
+            self.entered.release()
+            self.opened.wait(5)
+            return find_best_match(*args, **kwargs)
+
+        monkeypatch.setattr(matcher, "find_best_match", gated)
+
+
+def _wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_process_mode_requires_a_shared_index(make_matcher):
+    with pytest.raises(ValueError, match="SHARED_INDEX_DIR"):
+        MatcherExecutor(make_matcher(), mode="process")
+
+
+def test_unknown_mode_is_rejected(make_matcher):
+    with pytest.raises(ValueError, match="Unknown executor mode"):
+        MatcherExecutor(make_matcher(), mode="fork")
+
+
+def test_full_queue_is_rejected(make_matcher, monkeypatch):
+    matcher = make_matcher()
+    gate = _Gate(matcher, monkeypatch)
+    executor = MatcherExecutor(matcher, workers=1, max_queue=1)
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.find_best_match("horario de oficina"))
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorOverloaded):
+            await executor.find_best_match("horario de oficina")
+        gate.opened.set()
+        return await running
+
+    try:
+        assert asyncio.run(scenario())["response"] == "horario_trabajo.ogg"
+    finally:
+        executor.shutdown()
+    assert executor.get_stats()["rejected"] == 1
+
+
+def test_timed_out_and_cancelled_queries_free_their_slots(make_matcher, monkeypatch):
+    matcher = make_matcher()
+    gate = _Gate(matcher, monkeypatch)
+    executor = MatcherExecutor(matcher, workers=1, max_queue=2, timeout=0.05)
+
+    async def scenario():
+        # The first query holds the only worker; the second waits in the pool behind it
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await executor.find_best_match("horario de oficina")
+
+    asyncio.run(scenario())
+    # The queued query was cancelled when its caller gave up; the running one keeps its slot until it returns
+    assert executor.get_stats()["in_flight"] == 1
+    gate.opened.set()
+    _wait_for(lambda: executor.get_stats()["in_flight"] == 0)
+    executor.shutdown()
+    assert executor.get_stats()["timeouts"] == 2
+
+
+@pytest.fixture
+def client(offline, monkeypatch):
+    monkeypatch.setattr(Config, "EXECUTOR_WORKERS", 1)
+    monkeypatch.setattr(Config, "EXECUTOR_MAX_QUEUE", 1)
+    monkeypatch.setattr(Config, "REQUEST_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(api, "matcher", None)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_process_answers_503_when_overloaded(client, monkeypatch):
+    gate = _Gate(api.matcher, monkeypatch)
+    body = {"text": "horario de oficina", "method": "hybrid"}
+    first = threading.Thread(target=client.post, args=("/api/process",), kwargs={"json": body})
+    first.start()
+    assert gate.entered.acquire(timeout=5)
+
+    overloaded = client.post("/api/process", json=body)
+    assert overloaded.status_code == 503
+    assert overloaded.headers["Retry-After"] == "1"
+
+    first.join()
+    # The timed out query still holds its slot until the matcher returns
+    assert api.executor.get_stats()["timeouts"] == 1
+    gate.opened.set()
+    _wait_for(lambda: api.executor.get_stats()["in_flight"] == 0)
+    assert client.post("/api/process", json=body).json()["response"] == "horario_trabajo.ogg"
+
+
+def test_process_answers_504_on_timeout(client, monkeypatch):
+    gate = _Gate(api.matcher, monkeypatch)
+
+    response = client.post("/api/process", json={"text": "horario de oficina", "method": "hybrid"})
+    gate.opened.set()
+
+    assert response.status_code == 504
+    _wait_for(lambda: api.executor.get_stats()["in_flight"] == 0)
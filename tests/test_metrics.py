@@ -0,0 +1,137 @@
+import math
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routes import api
+from app.services.metrics import MetricsRegistry
+
+_SAMPLE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$")
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"(?:,|$)')
+_UNESCAPE = {"\\\\": "\\", "\\n": "\n", '\\"': '"'}
+
+
+def parse_exposition(text: str) -> dict:
+    """Families of a Prometheus text exposition: name -> {"help", "type", "samples": [(name, labels, value)]}"""
+    assert text.endswith("\n")
+    families = {}
+    current = None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name, help_text = line[7:].split(" ", 1)
+            assert name not in families, f"{name} rendered twice"
+            current = families[name] = {"help": help_text, "type": None, "samples": []}
+        elif line.startswith("# TYPE "):
+            name, metric_type = line[7:].split(" ")
+            assert current is families[name] and current["type"] is None
+            current["type"] = metric_type
+        else:
+            match = _SAMPLE.match(line)
+            assert match, f"unparseable line: {line!r}"
+            name, labels, value = match.groups()
+            assert current is not None and name.startswith(next(reversed(families)))
+            parsed = {}
+            if labels:
+                assert "".join(m.group(0) for m in _LABEL.finditer(labels)) == labels
+                parsed = {key: re.sub(r'\\[\\n"]', lambda m: _UNESCAPE[m.group(0)], value)
+                          for key, value in _LABEL.findall(labels)}
+            current["samples"].append((name, parsed, float(value)))
+    return families
+
+
+def _samples(family: dict, name: str, **labels) -> list:
+    return [value for sample, sample_labels, value in family["samples"]
+            if sample == name and all(sample_labels.get(k) == v for k, v in labels.items())]
+
+
+def test_counter_rendering_escapes_label_values():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_requests_total", "Requests", ("path",))
+    awkward = 'a "quoted"\\path\nnext'
+    counter.inc(awkward)
+    counter.inc(awkward, amount=2)
+    counter.inc("plain")
+
+    family = parse_exposition(registry.render())["test_requests_total"]
+
+    assert (family["help"], family["type"]) == ("Requests", "counter")
+    assert _samples(family, "test_requests_total", path=awkward) == [3.0]
+    assert _samples(family, "test_requests_total", path="plain") == [1.0]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Latency", ("stage",), buckets=(1.0, 0.1))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "encode")
+
+    family = parse_exposition(registry.render())["test_seconds"]
+
+    assert family["type"] == "histogram"
+    buckets = {labels["le"]: value for name, labels, value in family["samples"] if name == "test_seconds_bucket"}
+    assert buckets == {"0.1": 2, "1": 3, "+Inf": 4}
+    assert _samples(family, "test_seconds_count", stage="encode") == [4]
+    assert _samples(family, "test_seconds_sum", stage="encode") == [pytest.approx(3.65)]
+    assert histogram.count("encode") == 4
+
+
+def test_collectors_are_rendered_on_scrape():
+    registry = MetricsRegistry()
+    depth = [3]
+    registry.register_collector(lambda: [("test_depth", "gauge", "Queue depth", [({}, depth[0]), ({"q": "b"}, math.inf)])])
+
+    first = parse_exposition(registry.render())["test_depth"]
+    depth[0] = 5
+    second = parse_exposition(registry.render())["test_depth"]
+
+    assert first["type"] == "gauge"
+    assert first["samples"] == [("test_depth", {}, 3.0), ("test_depth", {"q": "b"}, math.inf)]
+    assert second["samples"][0][2] == 5.0
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    counter = registry.counter("test_total", "Total")
+    histogram = registry.histogram("test_seconds", "Latency")
+    counter.inc()
+    histogram.observe(0.2)
+
+    families = parse_exposition(registry.render())
+    assert families["test_total"]["samples"] == families["test_seconds"]["samples"] == []
+
+
+def test_wrong_label_count_is_rejected():
+    counter = MetricsRegistry().counter("test_total", "Total", ("method",))
+
+    with pytest.raises(ValueError, match="expects labels"):
+        counter.inc("hybrid", "extra")
+
+
+@pytest.fixture
+def client(offline, monkeypatch):
+    monkeypatch.setattr(api, "matcher", None)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_metrics_route(client):
+    before = parse_exposition(client.get("/api/metrics").text)
+    requests_before = sum(_samples(before["audio_matcher_requests_total"], "audio_matcher_requests_total", method="combined"))
+
+    client.post("/api/process", json={"text": "cuándo cobro la nómina", "method": "combined"})
+    response = client.get("/api/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MetricsRegistry.CONTENT_TYPE
+    families = parse_exposition(response.text)
+    assert all(family["type"] for family in families.values())
+    assert _samples(families["audio_matcher_requests_total"], "audio_matcher_requests_total",
+                    method="combined") == [requests_before + 1]
+    stages = families["audio_matcher_stage_seconds"]
+    for stage in ("encode", "score", "format"):
+        assert _samples(stages, "audio_matcher_stage_seconds_count", stage=stage, method="combined")[0] >= 1
+    assert _samples(families["audio_matcher_ready"], "audio_matcher_ready") == [1]
+    assert _samples(families["audio_matcher_catalog_audios"], "audio_matcher_catalog_audios") == [3]
+    assert families["audio_matcher_in_flight"]["type"] == "gauge"
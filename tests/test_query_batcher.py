@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from app.config.settings import Config
+from app.services.query_batcher import QueryBatcher
+
+QUERIES = ["horario de oficina", "cuándo me pagan el salario", "cuántos días de vacaciones tengo",
+           "a qué hora abren", "fecha de pago de la nómina"]
+
+
+@pytest.fixture
+def matcher(make_matcher, monkeypatch):
+    # The queries are catalog descriptions; every one of them must reach the scoring pass
+    monkeypatch.setattr(Config, "LEXICAL_FAST_PATH", False)
+    matcher = make_matcher()
+    matcher.calls = []
+    score_queries = matcher._score_queries
+
+    def recording(index, queries, query_embeddings):
+        matcher.calls.append(list(queries))
+        return score_queries(index, queries, query_embeddings)
+
+    monkeypatch.setattr(matcher, "_score_queries", recording)
+    return matcher
+
+
+@pytest.fixture
+def make_batcher(matcher):
+    batchers = []
+
+    def make(**kwargs) -> QueryBatcher:
+        batcher = QueryBatcher(matcher, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.stop()
+
+
+def test_concurrent_queries_share_one_scoring_pass(matcher, make_batcher):
+    batcher = make_batcher(max_batch_size=32, max_wait_ms=50)
+    # Queued before the worker starts, so they are all pending when it collects the first one
+    futures = [batcher.submit(query, "hybrid", 2) for query in QUERIES]
+    batcher.start()
+
+    results = [future.result(timeout=5) for future in futures]
+
+    assert matcher.calls == [QUERIES]
+    matcher.result_cache.clear()
+    for result, query in zip(results, QUERIES):
+        alone = matcher.find_best_match(query, "hybrid", 2)
+        assert result["response"] == alone["response"]
+        assert result["confidence"] == pytest.approx(alone["confidence"], abs=1e-6)
+        assert [m["audio_file"] for m in result["top_matches"]] == [m["audio_file"] for m in alone["top_matches"]]
+    assert batcher.get_stats()["batch_size_histogram"] == {len(QUERIES): 1}
+
+
+def test_batches_are_capped_at_max_batch_size(matcher, make_batcher):
+    batcher = make_batcher(max_batch_size=2, max_wait_ms=50)
+    futures = [batcher.submit(query, "individual") for query in QUERIES]
+    batcher.start()
+
+    for future in futures:
+        future.result(timeout=5)
+
+    assert matcher.calls == [QUERIES[0:2], QUERIES[2:4], QUERIES[4:]]
+    stats = batcher.get_stats()
+    assert stats["max_observed_batch_size"] == 2
+    assert stats["batch_size_histogram"] == {1: 1, 2: 2}
+
+
+def test_batch_closes_after_max_wait(matcher, make_batcher):
+    batcher = make_batcher(max_batch_size=32, max_wait_ms=20)
+    batcher.start()
+
+    started = time.monotonic()
+    first = batcher.submit(QUERIES[0], "combined")
+    first.result(timeout=5)
+    # Did not wait for the batch to fill up
+    assert time.monotonic() - started < 1.0
+    time.sleep(0.1)
+    batcher.submit(QUERIES[1], "combined").result(timeout=5)
+
+    assert matcher.calls == [QUERIES[:1], QUERIES[1:2]]
+
+
+def test_failing_query_does_not_fail_its_batch(matcher, make_batcher):
+    batcher = make_batcher(max_batch_size=32, max_wait_ms=50)
+    futures = [
+        batcher.submit(QUERIES[0], "hybrid"),
+        batcher.submit(QUERIES[1], "bogus"),
+        batcher.submit("   ", "hybrid"),
+        batcher.submit(QUERIES[2], "max")
+    ]
+    batcher.start()
+
+    results = [future.result(timeout=5) for future in futures]
+
+    assert [result["status"] for result in results] == ["success", "error", "error", "success"]
+    assert results[0]["response"] == "horario_trabajo.ogg"
+    assert results[3]["response"] == "vacaciones.ogg"
+    assert matcher.calls == [[QUERIES[0], QUERIES[2]]]
+
+
+def test_stopped_batcher_fails_pending_queries(make_batcher):
+    batcher = make_batcher()
+    batcher.start()
+    batcher.stop()
+
+    future = batcher.submit(QUERIES[0])
+    batcher._run()
+
+    with pytest.raises(RuntimeError, match="stopped"):
+        future.result(timeout=5)
@@ -0,0 +1,85 @@
+import types
+
+import pytest
+
+from app.config.settings import Config
+from app.services import query_cache
+from app.services.query_cache import LRUCache, normalize_query
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=100.0)
+    monkeypatch.setattr(query_cache, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.get_stats() == {
+        "size": 2, "max_size": 2, "ttl_seconds": 0.0, "hits": 3, "misses": 1, "hit_rate": 0.75, "evictions": 1
+    }
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LRUCache(4, ttl_seconds=10)
+    cache.put("a", 1)
+
+    clock.now += 9.9
+    assert cache.get("a") == 1
+    clock.now += 0.2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_zero_size_disables_the_cache():
+    cache = LRUCache(0)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+    assert cache.get_stats()["misses"] == 0
+
+
+@pytest.mark.parametrize("lowercase, expected", [(False, "Hola Mundo"), (True, "hola mundo")])
+def test_normalize_query(lowercase, expected):
+    assert normalize_query("  Hola \t Mundo\n", lowercase) == expected
+
+
+def test_catalog_edit_invalidates_cached_results(make_matcher, monkeypatch):
+    monkeypatch.setattr(Config, "RESULT_CACHE", True)
+    monkeypatch.setattr(Config, "LEXICAL_FAST_PATH", False)
+    matcher = make_matcher()
+    query = "cuándo me pagan el salario"
+    first = matcher.find_best_match(query, "hybrid")
+    assert matcher.find_best_match(query, "hybrid") == first
+    assert matcher.result_cache.hits == 1
+
+    matcher.replace_audio("vacaciones.ogg", ["cuándo me pagan el salario exactamente"])
+    matcher.delete_audio("nomina_salario.ogg")
+    result = matcher.find_best_match(query, "hybrid")
+
+    assert first["response"] == "nomina_salario.ogg"
+    assert result["response"] == "vacaciones.ogg"
+    assert matcher.result_cache.hits == 1
+
+
+def test_cached_result_keys_carry_the_index_version(make_matcher, monkeypatch):
+    monkeypatch.setattr(Config, "LEXICAL_FAST_PATH", False)
+    matcher = make_matcher()
+    query = "a qué hora abren"
+    matcher.find_best_match(query, "hybrid")
+    stale_index = matcher.index
+    matcher.add_audio("nuevo.ogg", ["audio nuevo"])
+
+    # A result cached from the previous snapshot is never served for the new one
+    matcher.result_cache.put((normalize_query(query, matcher.lowercase_queries), "hybrid", matcher.threshold, None,
+                              stale_index.version), {"response": "stale"})
+    assert matcher.find_best_match(query, "hybrid")["response"] == "horario_trabajo.ogg"
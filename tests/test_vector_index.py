@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from app.services.vector_index import IVFIndex, top_k
+
+
+def _unit_rows(rng: np.random.Generator, n: int, dim: int = 16) -> np.ndarray:
+    rows = rng.standard_normal((n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def _assert_same_lists(index: IVFIndex, fresh: IVFIndex):
+    assert len(index.list_ids) == len(fresh.list_ids)
+    for ids, fresh_ids in zip(index.list_ids, fresh.list_ids):
+        np.testing.assert_array_equal(np.sort(ids), np.sort(fresh_ids))
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
+
+
+@pytest.fixture
+def ivf(rng):
+    return IVFIndex.train(_unit_rows(rng, 400), n_lists=12, n_probe=3)
+
+
+@pytest.mark.parametrize("start, stop, inserted", [
+    (100, 110, 10),   # same size replacement
+    (100, 110, 25),   # grows
+    (100, 140, 3),    # shrinks
+    (0, 0, 8),        # insert at the front
+    (400, 400, 8),    # append
+    (250, 260, 0)     # delete only
+])
+def test_spliced_equals_fresh_build(ivf, rng, start, stop, inserted):
+    matrix = np.concatenate([ivf.matrix[:start], _unit_rows(rng, inserted), ivf.matrix[stop:]])
+
+    spliced = ivf.spliced(matrix, start, stop, inserted)
+    fresh = ivf.rebuilt(matrix)
+
+    _assert_same_lists(spliced, fresh)
+    assert sum(len(ids) for ids in spliced.list_ids) == len(matrix)
+    queries = _unit_rows(rng, 5)
+    for found, expected in zip(spliced.search(queries, 10), fresh.search(queries, 10)):
+        np.testing.assert_array_equal(found, expected)
+
+
+@pytest.mark.parametrize("keep_fraction", [0.0, 0.3, 0.9, 1.0])
+def test_without_rows_equals_fresh_build(ivf, rng, keep_fraction):
+    keep = rng.random(len(ivf.matrix)) < keep_fraction
+    matrix = ivf.matrix[keep]
+
+    reduced = ivf.without_rows(matrix, keep)
+    fresh = ivf.rebuilt(matrix)
+
+    _assert_same_lists(reduced, fresh)
+    if len(matrix):
+        queries = _unit_rows(rng, 5)
+        for found, expected in zip(reduced.search(queries, 10), fresh.search(queries, 10)):
+            np.testing.assert_array_equal(found, expected)
+
+
+def test_without_rows_after_spliced_keeps_ids_in_range(ivf, rng):
+    matrix = np.concatenate([ivf.matrix[:50], _unit_rows(rng, 20), ivf.matrix[60:]])
+    spliced = ivf.spliced(matrix, 50, 60, 20)
+    keep = np.ones(len(matrix), dtype=bool)
+    keep[::3] = False
+
+    reduced = spliced.without_rows(matrix[keep], keep)
+
+    _assert_same_lists(reduced, ivf.rebuilt(matrix[keep]))
+    ids = np.concatenate(reduced.list_ids)
+    assert ids.min() >= 0 and ids.max() < int(keep.sum())
+
+
+def test_top_k_is_sorted_and_stable():
+    scores = np.array([0.2, 0.9, 0.5, 0.9, -1.0], dtype=np.float32)
+
+    np.testing.assert_array_equal(top_k(scores, 3), [1, 3, 2])
+    np.testing.assert_array_equal(top_k(scores, 10), [1, 3, 2, 0, 4])